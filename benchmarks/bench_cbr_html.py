@@ -0,0 +1,88 @@
+"""Micro-benchmark: streaming KeyRate table extractor vs the BeautifulSoup tree + get_text() search.
+
+Usage: python benchmarks/bench_cbr_html.py [--repeat 5]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import cbr_html
+
+
+def make_page(start, end, footer_links=2000):
+    days = pd.bdate_range(start, end)[::-1]
+    rates = [f"{5.5 + (i // 60) % 15:.2f}".replace(".", ",") for i in range(len(days))]
+    rows = "\n".join(f"<tr>\n  <td>{d:%d.%m.%Y}</td>\n  <td>{r}</td>\n</tr>" for d, r in zip(days, rates))
+    links = "".join(f'<li><a href="/page/{i}">Раздел {i}</a></li>' for i in range(footer_links))
+    page = (
+        '<html><head><meta charset="utf-8"></head><body>'
+        '<table class="layout"><tr><td>Банк России</td></tr></table>'
+        f'<table class="data"><tr><th>Дата</th><th>Ставка</th></tr>\n{rows}\n</table>'
+        f"<ul>{links}</ul></body></html>"
+    )
+    return page.encode("utf-8"), len(days)
+
+
+def legacy_parse(content):
+    soup = BeautifulSoup(content, "html.parser")
+    table = None
+    for t in soup.find_all("table"):
+        if "Дата" in t.get_text() and "Ставка" in t.get_text():
+            table = t
+            break
+    rows = []
+    for row in table.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        if len(cols) < 2:
+            continue
+        date = datetime.strptime(cols[0].get_text(strip=True), "%d.%m.%Y")
+        rows.append((date, float(cols[1].get_text(strip=True).replace(",", "."))))
+    return rows
+
+
+def streaming_parse(content):
+    return list(cbr_html.iter_key_rates(content))
+
+
+def measure(fn, content, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(content)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for label, start in (("1 month", "2026-09-15"), ("1 year", "2025-10-15"), ("full", "2013-09-13")):
+        content, rows = make_page(start, "2026-10-15")
+        assert streaming_parse(content) == legacy_parse(content)
+        legacy_t, legacy_mem = measure(legacy_parse, content, args.repeat)
+        stream_t, stream_mem = measure(streaming_parse, content, args.repeat)
+        print(
+            f"{label:>8} ({rows} rows, {len(content) / 1e3:.0f} KB): "
+            f"bs4 {legacy_t * 1000:7.1f} ms / {legacy_mem / 1e6:5.1f} MB peak, "
+            f"streaming {stream_t * 1000:6.1f} ms / {stream_mem / 1e6:5.1f} MB peak, "
+            f"x{legacy_t / stream_t:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
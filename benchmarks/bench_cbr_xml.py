@@ -0,0 +1,90 @@
+"""Micro-benchmark: streaming CBR XML_dynamic parser vs the record-by-record ElementTree parse.
+
+Usage: python benchmarks/bench_cbr_xml.py [--years 26] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import cbr_xml
+
+
+def make_payload(years):
+    start = date(2000, 1, 1)
+    lines = ['<?xml version="1.0" encoding="windows-1251"?>', '<ValCurs ID="R01235" name="Foreign Currency Market Dynamic">']
+    day = start
+    end = start + timedelta(days=365 * years)
+    i = 0
+    while day < end:
+        if day.weekday() not in (0, 6):
+            value = f"{25 + (i % 7000) / 100:.4f}".replace(".", ",")
+            lines.append(
+                f'<Record Date="{day.strftime("%d.%m.%Y")}" Id="R01235">'
+                f"<Nominal>1</Nominal><Value>{value}</Value><VunitRate>{value}</VunitRate></Record>"
+            )
+            i += 1
+        day += timedelta(days=1)
+    lines.append("</ValCurs>")
+    return "\n".join(lines).encode("windows-1251"), i
+
+
+def legacy_parse(content):
+    root = ET.fromstring(content)
+    records = []
+    for record in root.findall("Record"):
+        date_str = record.attrib.get("Date")
+        nominal = float(record.findtext("Nominal").replace(",", "."))
+        value = float(record.findtext("Value").replace(",", "."))
+        records.append({"date": datetime.strptime(date_str, "%d.%m.%Y").date(), "rate": value / nominal})
+    df = pd.DataFrame(records)
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def streaming_parse(content):
+    dates, rates = cbr_xml.parse_dynamic(content)
+    return pd.DataFrame({"date": dates, "rate": rates})
+
+
+def measure(fn, content, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(content)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", type=int, default=26)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    for years in sorted({1, max(1, args.years // 4), args.years}):
+        content, records = make_payload(years)
+        legacy_t, legacy_mem = measure(legacy_parse, content, args.repeat)
+        stream_t, stream_mem = measure(streaming_parse, content, args.repeat)
+        print(
+            f"{years:>3} years ({records} records, {len(content) / 1e6:.1f} MB): "
+            f"legacy {legacy_t * 1000:7.1f} ms / {legacy_mem / 1e6:5.1f} MB peak, "
+            f"streaming {stream_t * 1000:7.1f} ms / {stream_mem / 1e6:5.1f} MB peak, "
+            f"x{legacy_t / stream_t:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""Scaling benchmark: wide-frame build + calendar fill + aggregates at 9, 50 and 100 currencies.
+
+Each currency is a synthetic CBR-like series (business-day records since 2000). The pipeline is
+`build_wide_frame` -> `normalize_daily_rates` -> `fx_aggregate.aggregate` (W/M/Q/Y) and is compared
+with the chained `df.merge(..., how="outer")` it replaces. Growth is reported relative to the
+9-currency run next to the currency ratio. Past the fixed per-run overhead, time grows linearly
+with the number of currencies (50 -> 100 roughly doubles it).
+
+Usage: python benchmarks/bench_currency_scaling.py [--sizes 9,50,100] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import fx_aggregate
+import update_fx_daily
+
+
+def make_series(n, seed=5):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range("2000-01-01", "2026-08-31")
+    series = {}
+    for i in range(n):
+        # у разных валют немного разные даты записей, как у ЦБ
+        keep = rng.random(len(dates)) > 0.02
+        keep[0] = True
+        rates = np.abs(np.cumsum(rng.normal(0, 0.3, keep.sum()))) + 10.0 + i
+        series[f"C{i:03d}"] = pd.DataFrame({"date": dates[keep], "rate": rates})
+    return series
+
+
+def chained_merge(series):
+    frames = [s.rename(columns={"rate": code}) for code, s in series.items()]
+    df = frames[0]
+    for other in frames[1:]:
+        df = df.merge(other, on="date", how="outer")
+    return df
+
+
+def pipeline(series):
+    codes = list(series)
+    wide = update_fx_daily.build_wide_frame(series)
+    daily = update_fx_daily.normalize_daily_rates(wide, codes)
+    return fx_aggregate.aggregate(daily.set_index("date"), codes)
+
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="9,50,100")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    base = None
+    print(f"{'currencies':>10} {'pipeline':>10} {'x time':>7} {'x cur':>6} {'merge':>9} {'wide':>9}")
+    for n in sizes:
+        series = make_series(n)
+        assert chained_merge(series).sort_values("date").reset_index(drop=True).equals(
+            update_fx_daily.build_wide_frame(series)
+        )
+        total = measure(lambda: pipeline(series), args.repeat)
+        merge_t = measure(lambda: chained_merge(series), args.repeat)
+        wide_t = measure(lambda: update_fx_daily.build_wide_frame(series), args.repeat)
+        base = base or (n, total)
+        print(
+            f"{n:>10} {total * 1000:>8.1f}ms {total / base[1]:>6.2f}x {n / base[0]:>5.2f}x "
+            f"{merge_t * 1000:>7.1f}ms {wide_t * 1000:>7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Micro-benchmark: vectorized fx_daily.json writer vs the iterrows + json.dumps(indent=2) loop.
+
+Runs on the real data/fx_daily.json and checks that both paths produce identical bytes.
+
+Usage: python benchmarks/bench_fx_json.py [--repeat 5]
+"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import fx_json
+
+
+def load_frame():
+    data = json.loads((REPO_ROOT / "data" / "fx_daily.json").read_text(encoding="utf-8"))
+    records = [{"date": row["date"], **row["rates"]} for row in data["series"]]
+    df = pd.DataFrame(records)
+    df["date"] = pd.to_datetime(df["date"])
+    return df, data["meta"]
+
+
+def legacy_write(df, codes, meta, path):
+    output_rows = []
+    for _, row in df.iterrows():
+        rates = {}
+        for code in codes:
+            val = row.get(code)
+            rates[code] = round(float(val), 6) if pd.notna(val) else None
+        output_rows.append({"date": row["date"].strftime("%Y-%m-%d"), "rates": rates})
+    text = json.dumps({"meta": meta, "series": output_rows}, ensure_ascii=False, indent=2)
+    path.write_text(text, encoding="utf-8")
+
+
+def vectorized_write(df, codes, meta, path):
+    fx_json.dump(path, meta, fx_json.rows_from_frame(df, codes))
+
+
+def measure(fn, args, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    df, meta = load_frame()
+    codes = list(meta["currencies"])
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = Path(tmp) / "legacy.json"
+        vector_path = Path(tmp) / "vectorized.json"
+        legacy_t = measure(legacy_write, (df, codes, meta, legacy_path), args.repeat)
+        vector_t = measure(vectorized_write, (df, codes, meta, vector_path), args.repeat)
+        identical = legacy_path.read_bytes() == vector_path.read_bytes()
+
+    print(
+        f"{len(df)} rows x {len(codes)} currencies: "
+        f"legacy {legacy_t * 1000:7.1f} ms, vectorized {vector_t * 1000:7.1f} ms, "
+        f"x{legacy_t / vector_t:.1f}, identical={identical}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Micro-benchmark: vectorized fx_query.convert over N (amount, date, pair) tuples vs a per-tuple loop.
+
+Usage: python benchmarks/bench_fx_query.py [--n 1000000] [--repeat 3]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import fx_query
+
+
+def make_batch(fx, n, seed=1):
+    rng = np.random.default_rng(seed)
+    codes = np.array(fx.currencies + [fx_query.BASE])
+    amounts = rng.uniform(1, 10_000, n)
+    dates = fx.start + rng.integers(0, fx.rows, n).astype("timedelta64[D]")
+    return amounts, codes[rng.integers(0, len(codes), n)], codes[rng.integers(0, len(codes), n)], dates
+
+
+def loop_convert(fx, amounts, from_codes, to_codes, dates):
+    out = []
+    for amount, src, dst, day in zip(amounts.tolist(), from_codes.tolist(), to_codes.tolist(), dates):
+        row = int((day - fx.start).astype(int))
+        out.append(amount * fx.columns[fx._columns[src]][row] / fx.columns[fx._columns[dst]][row])
+    return out
+
+
+def measure(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    fx = fx_query.load()
+    load_t = time.perf_counter() - started
+    batch = make_batch(fx, args.n)
+
+    vector_t = measure(lambda: fx.convert(*batch), args.repeat)
+    sample = 50_000
+    small = tuple(a[:sample] for a in batch)
+    loop_t = measure(lambda: loop_convert(fx, *small), 1) * args.n / sample
+    check = np.allclose(fx.convert(*small), loop_convert(fx, *small))
+
+    print(
+        f"load {load_t * 1000:.1f} ms; {args.n} conversions: vectorized {vector_t * 1000:.1f} ms, "
+        f"per-tuple loop ~{loop_t * 1000:.0f} ms (extrapolated from {sample}), x{loop_t / vector_t:.0f}, match={check}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Micro-benchmark: macro_monthly row updates — per-row Period/.loc loops vs macro_merge.
+
+History is 10x today's macro_monthly.json (~4300 months); every row is refreshed from
+--refresh-rates-from, CPI is filled where missing and a few new months are appended.
+
+Usage: python benchmarks/bench_macro_merge.py [--scale 10] [--repeat 3]
+"""
+import argparse
+import copy
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+# эталонные построчные циклы живут рядом с тестами
+sys.path.insert(0, str(REPO_ROOT / "tests"))
+
+import macro_merge
+from test_macro_merge import _legacy_merge
+
+CODES = ["USD", "EUR", "CNY", "GBP", "CHF", "THB", "IDR", "TRY", "INR"]
+
+
+def make_sources(months, seed=11):
+    rng = np.random.default_rng(seed)
+    index = pd.period_range(pd.Period("2026-09", freq="M") - months + 1, periods=months, freq="M")
+    fx = pd.DataFrame({f: rng.uniform(1, 100, months) for f in macro_merge.rate_fields(CODES)}, index=index)
+    key = pd.Series(rng.uniform(4, 20, months), index=index)
+    cpi = pd.DataFrame({f: rng.normal(0.5, 0.3, months) for f in macro_merge.CPI_FIELDS}, index=index)
+    return fx, key, cpi
+
+
+def make_series(fx, cpi, rows):
+    series = []
+    for i, month in enumerate(fx.index[:rows]):
+        row = {"date": month.to_timestamp().strftime("%Y-%m-%d"), "month": str(month), "key_rate": 7.5}
+        row.update(zip(macro_merge.rate_fields(CODES), fx.iloc[i].round(2).tolist()))
+        if i % 7:
+            row.update(zip(macro_merge.CPI_FIELDS, cpi.iloc[i].tolist()))
+        series.append(row)
+    return series
+
+
+def vectorized_merge(series, fx, key_mean, key_end, cpi, codes, mode, refresh_from, last_month, current_month):
+    macro_merge.ensure_fields(series, macro_merge.rate_fields(codes) + ["key_rate", "key_rate_end", *macro_merge.CPI_FIELDS])
+    months = fx.index[(fx.index > last_month) & (fx.index < current_month)].sort_values()
+    new_rows = macro_merge.new_rows(months, fx, key_mean, key_end, cpi, codes, require_cpi=mode == "full")
+    index = macro_merge.month_index(series)
+    refreshed = macro_merge.refresh_rates(series, index, fx, codes, refresh_from, current_month)
+    filled = macro_merge.fill_cpi(series, index, cpi, current_month)
+    return new_rows, refreshed, filled
+
+
+def measure(fn, series, args, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        rows = copy.deepcopy(series)
+        started = time.perf_counter()
+        result = fn(rows, *args)
+        best = min(best, time.perf_counter() - started)
+    return best, rows, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=10, help="History length relative to macro_monthly.json")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    base_rows = len(json.loads((REPO_ROOT / "data" / "macro_monthly.json").read_text(encoding="utf-8"))["series"])
+    rows = base_rows * args.scale
+    fx, key, cpi = make_sources(rows + 4)
+    series = make_series(fx, cpi, rows)
+    last_month = pd.Period(series[-1]["month"], freq="M")
+    current_month = fx.index[-1]
+    merge_args = (fx, key, key, cpi, CODES, "full", fx.index[0], last_month, current_month)
+
+    legacy_t, legacy_rows, legacy_result = measure(_legacy_merge, series, merge_args, args.repeat)
+    vector_t, vector_rows, vector_result = measure(vectorized_merge, series, merge_args, args.repeat)
+    assert vector_result == legacy_result
+    assert json.dumps(vector_rows, ensure_ascii=False, indent=2) == json.dumps(legacy_rows, ensure_ascii=False, indent=2)
+
+    new_rows, refreshed, filled = legacy_result
+    print(
+        f"{rows} rows x {len(CODES)} currencies (new {len(new_rows)}, refreshed {refreshed}, CPI filled {filled}): "
+        f"row loops {legacy_t * 1000:7.1f} ms, macro_merge {vector_t * 1000:6.1f} ms, x{legacy_t / vector_t:.1f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
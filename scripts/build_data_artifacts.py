@@ -0,0 +1,113 @@
+"""Build minified and precompressed (gzip, brotli) deploy copies of the runtime data JSON.
+
+dist/ mirrors the remote layout: for every artifact there is the minified `.json` plus `.json.gz`
+and `.json.br` siblings for the web server to serve precompressed. The build is deterministic
+(no gzip timestamp or file name, fixed compression levels), and files whose bytes did not
+change are left untouched.
+
+Usage: python scripts/build_data_artifacts.py [--out dist]
+"""
+import argparse
+import gzip
+import json
+from pathlib import Path
+
+try:
+    import brotli
+except ImportError:  # brotli есть в requirements.txt; локально можно собрать только .gz
+    brotli = None
+
+DATA_REPO_ROOT = Path(__file__).resolve().parents[1]
+DATA_DIR = DATA_REPO_ROOT / "data"
+DIST_DIR = DATA_REPO_ROOT / "dist"
+
+# (файл в data/, путь на сервере)
+ARTIFACTS = (
+    ("macro_monthly.json", "assets/macro_monthly.json"),
+    ("fx_daily.json", "assets/fx_daily.json"),
+    ("fx_daily_columnar.json", "assets/fx_daily_columnar.json"),
+    ("fx_daily_delta.json", "assets/fx_daily_delta.json"),
+    ("fx_aggregates.json", "assets/fx_aggregates.json"),
+    ("inflation_ru_full_1991_2024.json", "inflation_ru_full_1991_2024.json"),
+)
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+
+def minify(raw):
+    return json.dumps(json.loads(raw), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def gzip_bytes(data):
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(data):
+    return brotli.compress(data, mode=brotli.MODE_TEXT, quality=11)
+
+
+def _write_if_changed(path, data):
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    tmp.replace(path)
+    return True
+
+
+def artifact_paths(remote_rel, out_dir=DIST_DIR):
+    """Built files for one artifact as (remote path, local path) pairs, minified JSON first."""
+    base = Path(out_dir) / remote_rel
+    suffixes = ("",) + tuple(s for s in COMPRESSED_SUFFIXES if s != ".br" or brotli is not None)
+    return [(remote_rel + suffix, base.with_name(base.name + suffix)) for suffix in suffixes]
+
+
+def build(out_dir=DIST_DIR, data_dir=DATA_DIR):
+    """Build every artifact; return one size report dict per artifact."""
+    out_dir = Path(out_dir)
+    reports = []
+    for name, remote_rel in ARTIFACTS:
+        raw = (Path(data_dir) / name).read_bytes()
+        outputs = {"": minify(raw)}
+        outputs[".gz"] = gzip_bytes(outputs[""])
+        if brotli is not None:
+            outputs[".br"] = brotli_bytes(outputs[""])
+
+        changed = False
+        for remote, path in artifact_paths(remote_rel, out_dir):
+            suffix = remote[len(remote_rel):]
+            changed |= _write_if_changed(path, outputs[suffix])
+        reports.append({
+            "name": remote_rel,
+            "raw": len(raw),
+            "minified": len(outputs[""]),
+            "gz": len(outputs[".gz"]),
+            "br": len(outputs[".br"]) if ".br" in outputs else None,
+            "changed": changed,
+        })
+    return reports
+
+
+def format_report(reports):
+    lines = []
+    for r in reports:
+        br = f"{r['br']:>9}" if r["br"] is not None else "        -"
+        lines.append(
+            f"{r['name']:<40} raw {r['raw']:>9}  min {r['minified']:>9}  gz {r['gz']:>8}  br {br}"
+            f"{'' if r['changed'] else '  (unchanged)'}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build minified + gzip/brotli deploy artifacts")
+    parser.add_argument("--out", type=Path, default=DIST_DIR)
+    args = parser.parse_args()
+
+    print(format_report(build(args.out)))
+    if brotli is None:
+        print("brotli is not installed: .br files were skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Rebuild the files derived from data/fx_daily.json: columnar JSON, fx_daily.bin, delta and aggregates.
+
+Only fx_daily.json and fx_daily_versions.json are committed. Everything here is a pure function
+of those two files, so update_fx_daily.py writes it locally after each run and the deploy
+workflow regenerates it from the checkout before build_data_artifacts.py packs the JSON.
+
+Usage: python scripts/build_fx_derived.py
+"""
+import argparse
+import json
+from pathlib import Path
+
+import fx_aggregate
+import fx_binary
+import fx_columnar
+import fx_delta
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+# generated, gitignored
+DERIVED_FILES = ("fx_daily_columnar.json", "fx_daily.bin", "fx_daily_delta.json", "fx_aggregates.json")
+
+
+def write_all(series, meta, source_sha256, versions, data_dir=DATA_DIR, delta_days=fx_delta.DEFAULT_DAYS):
+    """Write every derived file for `series`/`meta` of the fx_daily.json hashing to `source_sha256`."""
+    data_dir = Path(data_dir)
+    columnar = fx_columnar.build_payload(series, meta, source_sha256)
+    fx_columnar.write(data_dir / "fx_daily_columnar.json", columnar)
+    fx_binary.write(data_dir / "fx_daily.bin", series, meta, source_sha256)
+    fx_delta.write(data_dir / "fx_daily_delta.json", fx_delta.build_delta(meta, series, source_sha256, versions, delta_days))
+    if series:
+        frame = fx_columnar.frame_from_payload(columnar).set_index("date")
+        aggregates = fx_aggregate.aggregate(frame, meta["currencies"])
+        fx_aggregate.write(data_dir / "fx_aggregates.json", fx_aggregate.build_payload(aggregates, meta))
+
+
+def build(data_dir=DATA_DIR):
+    """Rebuild the derived files from `data_dir`/fx_daily.json."""
+    data_dir = Path(data_dir)
+    raw = (data_dir / "fx_daily.json").read_bytes()
+    data = json.loads(raw)
+    meta = dict(data["meta"])
+    meta.setdefault("version", 0)
+    versions = fx_delta.read_versions(data_dir / "fx_daily_versions.json")
+    sha256 = fx_columnar.sha256_bytes(raw)
+    write_all(data.get("series", []), meta, sha256, versions, data_dir)
+    return meta
+
+
+def main():
+    argparse.ArgumentParser(description="Rebuild files derived from fx_daily.json").parse_args()
+
+    meta = build()
+    print(f"Rebuilt {', '.join(DERIVED_FILES)} for fx_daily.json version {meta['version']} ({meta['rows']} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Streaming extractor for the CBR KeyRate HTML page.
+
+The page is fed to an event-based `HTMLParser` in chunks. Only the text of the current top-level
+<table> is scanned for the "Дата"/"Ставка" headers (incrementally, with a small overlap for words
+split between text events); rows of the matching table are yielded as their </tr> closes, and
+parsing stops as soon as that table ends. The rules follow the previous BeautifulSoup code: the
+first table whose text holds both words, every <tr> of it but the first, rows with at least two
+<td>, cell text stripped piece by piece.
+"""
+from datetime import datetime
+from html.parser import HTMLParser
+
+HEADERS = ("Дата", "Ставка")
+CHUNK_SIZE = 1 << 13
+
+
+class _KeyRateTable(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.depth = 0
+        self.found = False
+        self.done = False
+        self.ready = []
+        self._reset_table()
+
+    def _reset_table(self):
+        self._seen = {word: False for word in HEADERS}
+        self._tail = ""
+        self._pending = []
+        self._row_index = -1
+        self._cells = None
+        self._cell = None
+
+    def _close_cell(self):
+        if self._cell is not None and self._cells is not None:
+            self._cells.append("".join(piece.strip() for piece in self._cell))
+        self._cell = None
+
+    def _close_row(self):
+        self._close_cell()
+        if self._cells is not None and self._row_index >= 1 and len(self._cells) >= 2:
+            row = (self._cells[0], self._cells[1])
+            (self.ready if self.found else self._pending).append(row)
+        self._cells = None
+
+    def _check_headers(self):
+        if not self.found and all(self._seen.values()):
+            self.found = True
+            self.ready.extend(self._pending)
+            self._pending = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            self.depth += 1
+        elif not self.depth:
+            return
+        elif tag == "tr":
+            self._close_row()
+            self._row_index += 1
+            self._cells = []
+        elif tag == "td":
+            self._close_cell()
+            if self._cells is not None:
+                self._cell = []
+
+    def handle_endtag(self, tag):
+        if self.done or not self.depth:
+            return
+        if tag == "td":
+            self._close_cell()
+        elif tag == "tr":
+            self._close_row()
+            self._check_headers()
+        elif tag == "table":
+            self.depth -= 1
+            if self.depth == 0:
+                self._close_row()
+                self._check_headers()
+                if self.found:
+                    self.done = True
+                else:
+                    self._reset_table()
+
+    def handle_data(self, data):
+        if self.done or not self.depth:
+            return
+        if self._cell is not None:
+            self._cell.append(data)
+        if not self.found:
+            window = self._tail + data
+            for word in HEADERS:
+                if not self._seen[word] and word in window:
+                    self._seen[word] = True
+            self._tail = window[-(max(map(len, HEADERS)) - 1):]
+
+    def finish(self):
+        """End of input inside an open table: keep what the table has so far."""
+        if self.depth and not self.done:
+            self._close_row()
+            self._check_headers()
+            self.done = self.found
+
+    def drain(self):
+        rows, self.ready = self.ready, []
+        return rows
+
+
+def _decode(content):
+    if isinstance(content, str):
+        return content
+    try:
+        return content.decode("utf-8")
+    except UnicodeDecodeError:
+        return content.decode("cp1251")
+
+
+def _convert(rows):
+    for day, rate in rows:
+        yield datetime.strptime(day, "%d.%m.%Y"), float(rate.replace(",", "."))
+
+
+def iter_key_rates(content, chunk_size=CHUNK_SIZE):
+    """Yield (datetime, rate) from the KeyRate table of a CBR page; ValueError if there is no such table."""
+    text = _decode(content)
+    parser = _KeyRateTable()
+    for start in range(0, len(text), chunk_size):
+        parser.feed(text[start:start + chunk_size])
+        yield from _convert(parser.drain())
+        if parser.done:
+            break
+    else:
+        parser.close()
+        parser.finish()
+        yield from _convert(parser.drain())
+    if not parser.found:
+        raise ValueError("Key rate table not found on CBR page")
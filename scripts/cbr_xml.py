@@ -0,0 +1,83 @@
+"""Streaming parsers for CBR XML payloads.
+
+Records are read with `iterparse` and cleared as soon as their fields are collected, so the
+tree never holds more than one populated record. Field texts are converted in bulk at the end
+instead of one `strptime`/`float` call per record.
+"""
+from io import BytesIO
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+
+def _to_float_array(texts):
+    """Convert CBR decimal strings ("79,8573") to float64 in one pass."""
+    if not texts:
+        return np.empty(0, dtype=np.float64)
+    return np.array("\n".join(texts).replace(",", ".").split("\n"), dtype=np.float64)
+
+
+def _to_date_index(texts):
+    """Convert "dd.mm.yyyy" strings to a DatetimeIndex by reordering bytes, without strptime."""
+    if not texts:
+        return pd.DatetimeIndex([], dtype="datetime64[ns]")
+    raw = np.frombuffer("".join(texts).encode("ascii"), dtype="S1")
+    if raw.size != 10 * len(texts):
+        raise ValueError("Unexpected CBR date format")
+    raw = raw.reshape(-1, 10)
+    if not ((raw[:, 2] == b".") & (raw[:, 5] == b".")).all():
+        raise ValueError("Unexpected CBR date format")
+    iso = np.empty_like(raw)
+    iso[:, 0:4] = raw[:, 6:10]
+    iso[:, 4] = b"-"
+    iso[:, 5:7] = raw[:, 3:5]
+    iso[:, 7] = b"-"
+    iso[:, 8:10] = raw[:, 0:2]
+    days = iso.view("S10").ravel().astype("datetime64[D]")
+    return pd.DatetimeIndex(days.astype("datetime64[ns]"))
+
+
+def _collect(content, item_tag, key_attr):
+    """Collect `key_attr`, Nominal and Value of every `item_tag` element in one streaming pass."""
+    keys, nominals, values = [], [], []
+    for _, elem in ET.iterparse(BytesIO(content), events=("end",)):
+        tag = elem.tag
+        if tag == "Value":
+            values.append(elem.text)
+        elif tag == "Nominal":
+            nominals.append(elem.text)
+        elif tag == item_tag:
+            keys.append(elem.get(key_attr))
+            elem.clear()
+            if not len(keys) == len(nominals) == len(values):
+                raise ValueError(f"{item_tag} without Nominal/Value near {keys[-1]}")
+    return keys, _to_float_array(nominals), _to_float_array(values)
+
+
+def parse_dynamic(content):
+    """Parse an XML_dynamic payload into (DatetimeIndex of record dates, float64 rates per unit)."""
+    dates, nominals, values = _collect(content, "Record", "Date")
+    return _to_date_index(dates), values / nominals
+
+
+def parse_daily(content):
+    """Parse an XML_daily payload into {valute ID: rate per unit}."""
+    ids, nominals, values = _collect(content, "Valute", "ID")
+    return dict(zip(ids, (values / nominals).tolist()))
+
+
+def parse_val_full(content):
+    """Parse an XML_valFull payload into [{"id", "code", "name"}] for items with an ISO letter code."""
+    items = []
+    fields = {}
+    for _, elem in ET.iterparse(BytesIO(content), events=("end",)):
+        tag = elem.tag
+        if tag in ("Name", "ISO_Char_Code"):
+            fields[tag] = (elem.text or "").strip()
+        elif tag == "Item":
+            if fields.get("ISO_Char_Code"):
+                items.append({"id": elem.get("ID"), "code": fields["ISO_Char_Code"], "name": fields.get("Name", "")})
+            fields = {}
+            elem.clear()
+    return items
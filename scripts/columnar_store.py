@@ -0,0 +1,237 @@
+"""Optional Parquet store for the data series (needs pyarrow; enable with FIN_CALC_STORE=parquet).
+
+data/store/
+    fx_daily.parquet          date + one float64 column per currency, one row group per year
+    macro_monthly.parquet     one column per macro field plus `__keys__` (each row's key order)
+    key_rate_changes.parquet  CBR key rate change dates and values
+
+File-level metadata holds the JSON `meta` block and the sha256 of the JSON file the store was
+written together with. When the store is enabled the updaters read from it (with column
+projection and row-group filtering on date) only while that JSON is unchanged, and fall back to
+the JSON otherwise; they write the JSON first and then the store with its hash. The JSON files
+stay byte-identical and `export` regenerates them from the store. data/store/ is not committed.
+
+Usage: python scripts/columnar_store.py import|export
+"""
+import argparse
+import hashlib
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # store is optional
+    pa = None
+    pq = None
+
+import fx_json
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+STORE_DIR = DATA_DIR / "store"
+FX_JSON_FILE = DATA_DIR / "fx_daily.json"
+MACRO_JSON_FILE = DATA_DIR / "macro_monthly.json"
+
+META_KEY = b"fin_calc.meta"
+SOURCE_KEY = b"fin_calc.source_sha256"
+KEYS_COLUMN = "__keys__"
+STRING_FIELDS = ("date", "month")
+
+
+def available():
+    return pa is not None
+
+
+def enabled():
+    return available() and os.getenv("FIN_CALC_STORE", "").lower() == "parquet"
+
+
+def _path(name, store_dir):
+    return Path(store_dir) / f"{name}.parquet"
+
+
+def _write_table(path, table, row_groups=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with pq.ParquetWriter(tmp, table.schema) as writer:
+        for start, length in row_groups or [(0, table.num_rows)]:
+            writer.write_table(table.slice(start, length))
+    os.replace(tmp, path)
+
+
+def _with_meta(table, meta, source_sha256=None):
+    metadata = {META_KEY: json.dumps(meta, ensure_ascii=False).encode("utf-8")}
+    if source_sha256 is not None:
+        metadata[SOURCE_KEY] = source_sha256.encode("ascii")
+    return table.replace_schema_metadata(metadata)
+
+
+def _meta(schema):
+    raw = (schema.metadata or {}).get(META_KEY)
+    return json.loads(raw) if raw else {}
+
+
+def in_sync(path, json_path):
+    """True when the store file at `path` was written together with the current `json_path`
+    (always for None or a missing file: then the store is the only copy)."""
+    if json_path is None or not Path(json_path).exists():
+        return True
+    source = (pq.read_schema(path).metadata or {}).get(SOURCE_KEY)
+    return source is not None and source.decode("ascii") == hashlib.sha256(Path(json_path).read_bytes()).hexdigest()
+
+
+def _as_date(value):
+    return pd.Timestamp(value).date() if value is not None else None
+
+
+# --- fx_daily ----------------------------------------------------------------------------------
+
+def write_fx(meta, series, store_dir=STORE_DIR, source_sha256=None):
+    """Store fx_daily `series` rows (as written to fx_daily.json, hashing to `source_sha256`)
+    with one row group per year."""
+    codes = list(meta["currencies"])
+    columns = {"date": pa.array([date.fromisoformat(row["date"]) for row in series], type=pa.date32())}
+    for code in codes:
+        columns[code] = pa.array([row["rates"].get(code) for row in series], type=pa.float64())
+    table = _with_meta(pa.table(columns), meta, source_sha256)
+
+    years = [row["date"][:4] for row in series]
+    groups = []
+    for i, year in enumerate(years):
+        if i == 0 or year != years[i - 1]:
+            groups.append([i, 0])
+        groups[-1][1] += 1
+    _write_table(_path("fx_daily", store_dir), table, [tuple(g) for g in groups])
+
+
+def read_fx(start=None, end=None, codes=None, store_dir=STORE_DIR, json_path=FX_JSON_FILE):
+    """fx_daily frame (`date` + currency columns) for [start, end]; None when the store has no fx
+    data or was not written with the current `json_path`."""
+    path = _path("fx_daily", store_dir)
+    if not path.exists() or not in_sync(path, json_path):
+        return None
+    filters = []
+    if start is not None:
+        filters.append(("date", ">=", _as_date(start)))
+    if end is not None:
+        filters.append(("date", "<=", _as_date(end)))
+    columns = None if codes is None else ["date", *codes]
+    table = pq.read_table(path, columns=columns, filters=filters or None)
+    df = table.to_pandas()
+    df["date"] = pd.to_datetime(df["date"]).astype("datetime64[us]")
+    for code in df.columns[1:]:
+        df[code] = df[code].astype(float)
+    return df
+
+
+def read_fx_meta(store_dir=STORE_DIR):
+    return _meta(pq.read_schema(_path("fx_daily", store_dir)))
+
+
+def export_fx_json(json_path=FX_JSON_FILE, store_dir=STORE_DIR):
+    """Regenerate fx_daily.json from the store; returns its sha256."""
+    meta = read_fx_meta(store_dir)
+    # экспорт как раз заменяет JSON, сверять с ним не нужно
+    series = fx_json.rows_from_frame(read_fx(store_dir=store_dir, json_path=None), meta["currencies"])
+    return fx_json.dump(json_path, meta, series)
+
+
+# --- macro_monthly -----------------------------------------------------------------------------
+
+def write_macro(payload, store_dir=STORE_DIR, source_sha256=None):
+    """Store a macro_monthly payload; the row key order is kept so the JSON export is byte-identical."""
+    series = payload.get("series", [])
+    fields = []
+    for row in series:
+        for key in row:
+            if key not in fields:
+                fields.append(key)
+
+    columns = {}
+    for field in fields:
+        values = [row.get(field) for row in series]
+        if field in STRING_FIELDS:
+            columns[field] = pa.array(values, type=pa.string())
+            continue
+        for v in values:
+            if v is not None and type(v) is not float:
+                raise TypeError(f"macro_monthly field {field} has non-float value {v!r}")
+        columns[field] = pa.array(values, type=pa.float64())
+    columns[KEYS_COLUMN] = pa.array([",".join(row) for row in series], type=pa.string()).dictionary_encode()
+    table = _with_meta(pa.table(columns), payload.get("meta", {}), source_sha256)
+    _write_table(_path("macro_monthly", store_dir), table)
+
+
+def read_macro(columns=None, start_month=None, store_dir=STORE_DIR, json_path=MACRO_JSON_FILE):
+    """macro_monthly payload rebuilt from the store, optionally only some fields / months >= start_month;
+    None when there is none or it was not written with the current `json_path`."""
+    path = _path("macro_monthly", store_dir)
+    if not path.exists() or not in_sync(path, json_path):
+        return None
+    filters = [("month", ">=", str(start_month))] if start_month is not None else None
+    projection = None if columns is None else list(dict.fromkeys(["month", *columns, KEYS_COLUMN]))
+    table = pq.read_table(path, columns=projection, filters=filters)
+    data = table.to_pydict()
+    keys = data.pop(KEYS_COLUMN)
+    series = []
+    for i, row_keys in enumerate(keys):
+        row = {}
+        for key in row_keys.split(","):
+            if key in data:
+                row[key] = data[key][i]
+        series.append(row)
+    return {"meta": _meta(table.schema), "series": series}
+
+
+def export_macro_json(json_path=MACRO_JSON_FILE, store_dir=STORE_DIR):
+    payload = read_macro(store_dir=store_dir, json_path=None)
+    Path(json_path).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+# --- key rate ----------------------------------------------------------------------------------
+
+def write_key_rates(changes, store_dir=STORE_DIR):
+    """Store key rate changes: a frame with `date` and `rate` columns (one row per decision)."""
+    table = pa.table({
+        "date": pa.array([_as_date(d) for d in changes["date"]], type=pa.date32()),
+        "rate": pa.array(np.asarray(changes["rate"], dtype=float), type=pa.float64()),
+    })
+    _write_table(_path("key_rate_changes", store_dir), table)
+
+
+def read_key_rates(store_dir=STORE_DIR):
+    path = _path("key_rate_changes", store_dir)
+    if not path.exists():
+        return None
+    df = pq.read_table(path).to_pandas()
+    df["date"] = pd.to_datetime(df["date"]).astype("datetime64[us]")
+    return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import JSON data files into the Parquet store or export them back")
+    parser.add_argument("action", choices=["import", "export"])
+    args = parser.parse_args()
+    if not available():
+        raise SystemExit("pyarrow is not installed")
+
+    if args.action == "import":
+        fx_raw = FX_JSON_FILE.read_bytes()
+        fx = json.loads(fx_raw)
+        write_fx(fx["meta"], fx["series"], source_sha256=hashlib.sha256(fx_raw).hexdigest())
+        macro_raw = MACRO_JSON_FILE.read_bytes()
+        write_macro(json.loads(macro_raw), source_sha256=hashlib.sha256(macro_raw).hexdigest())
+        print(f"Imported fx_daily and macro_monthly into {STORE_DIR}")
+    else:
+        export_fx_json()
+        export_macro_json()
+        print(f"Exported {FX_JSON_FILE} and {MACRO_JSON_FILE} from {STORE_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""CPI series from Rosstat ipc_mes.xlsx as array operations over a years x 12 matrix.
+
+Every sheet of the workbook ("01" all goods and services, "02" food, "03" non-food, "04"
+services) has the same layout: years in row 4, monthly indices to the previous month
+(previous month = 100) for January..December in rows 6-17 and the official December to
+December index in row 19 (for the current year: the latest month to December, with a
+footnote mark, e.g. "103,562)").
+
+`compute` derives from the monthly matrix, in one pass: month on month (index - 100), year to
+date (cumulative product along the months), the chain index over all months, year on year
+(chain index to the one 12 months earlier) and December to December (year to date at the last
+reported month). Missing months are skipped in the products as pandas' cumprod skips them.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+import xlsx_reader
+
+MONTHS = (
+    "январь", "февраль", "март", "апрель", "май", "июнь",
+    "июль", "август", "сентябрь", "октябрь", "ноябрь", "декабрь",
+)
+SHEETS = {"total": "01", "food": "02", "nonfood": "03", "services": "04"}
+
+HEADER_ROW = 4
+FIRST_MONTH_ROW = 6
+DEC_DEC_ROW = 19
+# индексы даны с двумя знаками: "103,562)" — значение 103,56 со сноской "2)"
+NUMBER = re.compile(r"\s*(-?\d+(?:[.,]\d{1,2})?)")
+
+
+def _value(cell):
+    if isinstance(cell, bool):
+        return np.nan
+    if isinstance(cell, (int, float)):
+        return float(cell)
+    match = NUMBER.match(str(cell).replace("\xa0", ""))
+    return float(match.group(1).replace(",", ".")) if match else np.nan
+
+
+def read_sheet(content, sheet="01"):
+    """(years, monthly indices years x 12, official Dec/Dec index per year) from one sheet."""
+    rows = xlsx_reader.read_rows(content, sheet, HEADER_ROW, DEC_DEC_ROW)
+    header = rows[0]
+    years = np.array([int(v) for v in header[1:] if v != ""], dtype=int)
+    if len(years) > 1 and np.any(np.diff(years) != 1):
+        raise ValueError(f"Years on sheet {sheet} are not consecutive")
+    n = len(years)
+
+    month_rows = rows[FIRST_MONTH_ROW - HEADER_ROW:FIRST_MONTH_ROW - HEADER_ROW + 12]
+    labels = [str(r[0]).strip().lower() if r else "" for r in month_rows]
+    if labels != list(MONTHS):
+        raise ValueError(f"Unexpected month rows on sheet {sheet}: {labels}")
+
+    def cells(row):
+        values = [_value(v) for v in row[1:n + 1]]
+        return values + [np.nan] * (n - len(values))
+
+    monthly = np.array([cells(r) for r in month_rows], dtype=float).T
+    official = np.array(cells(rows[DEC_DEC_ROW - HEADER_ROW]), dtype=float)
+    return years, monthly, official
+
+
+def _cumprod(values, axis=None):
+    """Cumulative product that skips NaN (they stay NaN), like pandas' cumprod."""
+    missing = np.isnan(values)
+    out = np.cumprod(np.where(missing, 1.0, values), axis=axis)
+    out[missing] = np.nan
+    return out
+
+
+def compute(monthly):
+    """Month on month, year to date, year on year (years x 12) and Dec/Dec (per year), in percent."""
+    monthly = np.asarray(monthly, dtype=float)
+    ratio = monthly / 100
+    mom = monthly - 100
+    ytd = _cumprod(ratio, axis=1) * 100 - 100
+
+    chain = _cumprod(ratio.ravel()) * 100
+    yoy = np.full(chain.shape, np.nan)
+    with np.errstate(invalid="ignore"):
+        yoy[12:] = (chain[12:] / chain[:-12] - 1) * 100
+    yoy = yoy.reshape(monthly.shape)
+
+    # декабрь к декабрю: накопленное с начала года на последний месяц с данными
+    reported = ~np.isnan(monthly)
+    last = np.where(reported.any(axis=1), 11 - np.argmax(reported[:, ::-1], axis=1), 0)
+    dec_dec = ytd[np.arange(len(monthly)), last]
+    dec_dec[~reported.any(axis=1)] = np.nan
+    return {"mom": mom, "ytd": ytd, "yoy": yoy, "dec_dec": dec_dec, "last_month": last + 1}
+
+
+def monthly_frame(years, result):
+    """cpi_mom / cpi_yoy / cpi_ytd frame indexed by month, as load_cpi returns it."""
+    index = pd.period_range(f"{years[0]}-01", periods=len(years) * 12, freq="M")
+    frame = pd.DataFrame(
+        {name: result[key].ravel() for name, key in (("cpi_mom", "mom"), ("cpi_yoy", "yoy"), ("cpi_ytd", "ytd"))},
+        index=index,
+    )
+    frame.index.name = "month"
+    return frame
+
+
+def annual(years, monthly, official):
+    """{year: Dec/Dec inflation in percent}: the official index - 100 where the sheet has it,
+    otherwise the chained year to date; years without any monthly data are left out."""
+    result = compute(monthly)
+    value = np.where(np.isnan(official), result["dec_dec"], official - 100)
+    return {int(y): float(v) for y, v in zip(years, value) if v == v}
@@ -0,0 +1,102 @@
+"""Currency registry: data/currencies.json lists every CBR currency the updaters know about.
+
+Each entry has the ISO `code`, CBR valute `ids` (tried in order, the first one present wins),
+a Russian `name`, `enabled` (fetched into fx_daily.json) and `macro` (gets rate_<code> and
+rate_<code>_end fields in macro_monthly.json). A currency the CBR started quoting after 2000 also
+has `listed`, the day of its first quote: fx_daily.json keeps nulls before that day only.
+FX_CURRENCIES=all or FX_CURRENCIES=USD,EUR,... adds currencies for one run; columns already in
+fx_daily.json are kept. A newly enabled currency has no history yet: update_fx_daily.py backfills
+just that column on its next run.
+
+Usage: python scripts/currency_registry.py [--sync]  (--sync adds currencies from CBR XML_valFull, disabled)
+"""
+import argparse
+import json
+import os
+from datetime import date
+from pathlib import Path
+
+import cbr_xml
+import http_client
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+REGISTRY_FILE = DATA_DIR / "currencies.json"
+CBR_BASE_URL = os.getenv("CBR_BASE_URL", "https://www.cbr.ru").rstrip("/")
+
+
+def load(path=REGISTRY_FILE):
+    return json.loads(Path(path).read_text(encoding="utf-8"))["currencies"]
+
+
+def save(entries, path=REGISTRY_FILE):
+    text = json.dumps({"currencies": entries}, ensure_ascii=False, indent=2)
+    Path(path).write_text(text + "\n", encoding="utf-8")
+
+
+def selected(entries=None, override=None, keep=()):
+    """{code: ids} of the currencies to fetch, in registry order.
+
+    With an FX_CURRENCIES override, the `keep` codes (the columns already in fx_daily.json) stay
+    selected as well, so a one-run override never drops stored currencies.
+    """
+    entries = load() if entries is None else entries
+    override = os.getenv("FX_CURRENCIES", "") if override is None else override
+    override = override.strip()
+    if override.lower() == "all":
+        return {e["code"]: list(e["ids"]) for e in entries}
+    if override:
+        wanted = {code.strip().upper() for code in override.split(",") if code.strip()}
+        unknown = wanted - {e["code"] for e in entries}
+        if unknown:
+            raise ValueError(f"Unknown currencies in FX_CURRENCIES: {', '.join(sorted(unknown))}")
+        wanted |= set(keep)
+        return {e["code"]: list(e["ids"]) for e in entries if e["code"] in wanted}
+    return {e["code"]: list(e["ids"]) for e in entries if e.get("enabled")}
+
+
+def listed(entries=None):
+    """{code: date} of the first CBR quote for currencies listed after 2000 (the `listed` field)."""
+    entries = load() if entries is None else entries
+    return {e["code"]: date.fromisoformat(e["listed"]) for e in entries if e.get("listed")}
+
+
+def macro_codes(entries=None):
+    """Codes that get monthly fields in macro_monthly.json, in registry order."""
+    entries = load() if entries is None else entries
+    return [e["code"] for e in entries if e.get("macro")]
+
+
+def sync(entries, items):
+    """Merge parsed XML_valFull `items` into `entries`: new IDs are appended, new currencies added disabled."""
+    by_code = {e["code"]: e for e in entries}
+    added = []
+    for item in items:
+        entry = by_code.get(item["code"])
+        if entry is None:
+            entry = {"code": item["code"], "ids": [], "name": item["name"], "enabled": False, "macro": False}
+            by_code[item["code"]] = entry
+            entries.append(entry)
+            added.append(item["code"])
+        if item["id"] not in entry["ids"]:
+            entry["ids"].append(item["id"])
+    return added
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show or sync the currency registry")
+    parser.add_argument("--sync", action="store_true", help="Add currencies listed in CBR XML_valFull")
+    args = parser.parse_args()
+
+    entries = load()
+    if args.sync:
+        content = http_client.fetch_content(f"{CBR_BASE_URL}/scripts/XML_valFull.asp", source="cbr_fx")
+        added = sync(entries, cbr_xml.parse_val_full(content))
+        save(entries)
+        print(f"Added {len(added)} currencies: {', '.join(added) or 'none'}")
+    enabled = selected(entries)
+    print(f"{len(entries)} currencies, {len(enabled)} enabled: {', '.join(enabled)}")
+    print(f"macro_monthly fields for: {', '.join(macro_codes(entries))}")
+
+
+if __name__ == "__main__":
+    main()
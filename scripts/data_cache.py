@@ -0,0 +1,141 @@
+"""Parsed-data cache shared by the updaters: data JSON files -> pickled frames/payloads.
+
+Entries are keyed by the SHA-256 of the source bytes, so an edited file is simply a miss and
+nothing has to be invalidated explicitly. A lookup checks the in-process memo first, then
+`.cache/parsed/<kind>-v<FORMAT_VERSION>-<sha>.pkl`; only on a miss is the JSON parsed. The
+memo keeps pickled bytes, so every caller gets its own copy to mutate.
+Disable with FIN_CALC_PARSED_CACHE=0.
+"""
+import hashlib
+import json
+import os
+import pickle
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import fx_columnar
+import http_cache
+
+CACHE_DIR = http_cache.CACHE_DIR.parent / "parsed"
+# Поднять при изменении формата того, что возвращают парсеры
+FORMAT_VERSION = 1
+KEEP_PER_KIND = 3
+
+
+class ParsedCache:
+    def __init__(self, directory=CACHE_DIR, enabled=True):
+        self.directory = Path(directory)
+        self.enabled = enabled
+        self._memo = {}
+        self._lock = threading.Lock()
+        self.stats = {"memory": 0, "disk": 0, "parsed": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _read_disk(self, path):
+        try:
+            blob = path.read_bytes()
+            return blob, pickle.loads(blob)
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError, ValueError):
+            return None, None
+
+    def _write_disk(self, path, kind, blob):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(path.name + ".tmp")
+            tmp.write_bytes(blob)
+            os.replace(tmp, path)
+        except OSError:
+            return
+        entries = sorted(self.directory.glob(f"{kind}-v*.pkl"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in entries[KEEP_PER_KIND:]:
+            stale.unlink(missing_ok=True)
+
+    def load(self, path, kind, parser):
+        """Return `parser(raw_bytes)` for `path`, reusing a cached result for identical bytes."""
+        return self.load_bytes(Path(path).read_bytes(), kind, parser)
+
+    def load_bytes(self, raw, kind, parser):
+        """Return `parser(raw)`, reusing a cached result for identical bytes (e.g. a downloaded file)."""
+        if not self.enabled:
+            self._count("parsed")
+            return parser(raw)
+
+        key = f"{kind}-v{FORMAT_VERSION}-{hashlib.sha256(raw).hexdigest()}"
+        with self._lock:
+            blob = self._memo.get(key)
+        if blob is not None:
+            self._count("memory")
+            return pickle.loads(blob)
+
+        disk_path = self.directory / f"{key}.pkl"
+        if disk_path.exists():
+            blob, value = self._read_disk(disk_path)
+            if blob is not None:
+                with self._lock:
+                    self._memo[key] = blob
+                self._count("disk")
+                return value
+
+        value = parser(raw)
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._memo[key] = blob
+        self._write_disk(disk_path, kind, blob)
+        self._count("parsed")
+        return value
+
+    def summary(self):
+        s = self.stats
+        return f"Parsed cache: {s['memory']} memory hits, {s['disk']} disk hits, {s['parsed']} parsed"
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_cache():
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = ParsedCache(enabled=os.getenv("FIN_CALC_PARSED_CACHE", "1") != "0")
+        return _default
+
+
+def parse_fx_daily(raw):
+    """fx_daily.json bytes -> frame with `date` and one float column per currency, or None if empty."""
+    data = json.loads(raw)
+    rows = data.get("series", [])
+    if not rows:
+        return None
+    codes = list(data.get("meta", {}).get("currencies") or rows[0].get("rates", {}))
+    frame = {"date": pd.to_datetime(pd.Series([row.get("date") for row in rows], dtype=object))}
+    for code in codes:
+        frame[code] = np.array([row.get("rates", {}).get(code) for row in rows], dtype=float)
+    return pd.DataFrame(frame)
+
+
+def load_fx_daily(json_path, columnar_path=None, cache=None):
+    """Full fx_daily frame (see `parse_fx_daily`); on a cache miss the columnar file is used when current."""
+    json_path = Path(json_path)
+    if not json_path.exists():
+        return None
+
+    def parser(raw):
+        if columnar_path is not None:
+            df = fx_columnar.load(columnar_path, json_path)
+            if df is not None:
+                return df
+        return parse_fx_daily(raw)
+
+    return (cache or default_cache()).load(json_path, "fx_daily", parser)
+
+
+def load_macro(json_path, cache=None):
+    """Parsed macro_monthly.json payload (a fresh dict on every call)."""
+    return (cache or default_cache()).load(json_path, "macro_monthly", json.loads)
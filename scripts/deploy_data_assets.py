@@ -8,6 +8,8 @@ from dataclasses import dataclass
 from ftplib import FTP
 from pathlib import Path
 
+import build_data_artifacts
+
 
 DATA_REPO_ROOT = Path(__file__).resolve().parent.parent
 
@@ -18,13 +20,10 @@ class UploadItem:
     remote_rel: str
 
 
-UPLOAD_ITEMS = (
-    UploadItem(DATA_REPO_ROOT / "data" / "macro_monthly.json", "assets/macro_monthly.json"),
-    UploadItem(DATA_REPO_ROOT / "data" / "fx_daily.json", "assets/fx_daily.json"),
-    UploadItem(
-        DATA_REPO_ROOT / "data" / "inflation_ru_full_1991_2024.json",
-        "inflation_ru_full_1991_2024.json",
-    ),
+UPLOAD_ITEMS = tuple(
+    UploadItem(local_path, remote_rel)
+    for _name, artifact_rel in build_data_artifacts.ARTIFACTS
+    for remote_rel, local_path in build_data_artifacts.artifact_paths(artifact_rel)
 )
 
 
@@ -133,6 +132,7 @@ def upload_one(ftp: FTP, item: UploadItem, dry_run: bool) -> None:
 
 def main() -> int:
     args = parse_args()
+    print(build_data_artifacts.format_report(build_data_artifacts.build()))
     ensure_files()
 
     if args.dry_run:
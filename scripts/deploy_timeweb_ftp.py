@@ -28,6 +28,8 @@ from getpass import getpass
 from pathlib import Path
 from typing import Iterable, Iterator, List, Tuple
 
+import build_data_artifacts
+
 
 SITE_TOPLEVEL_SUFFIXES = {".html", ".json", ".xml"}
 EXCLUDE_NAMES = {".DS_Store"}
@@ -53,15 +55,15 @@ def _site_root() -> Path:
 
 
 def _sync_runtime_assets(site_root: Path, data_repo_root: Path) -> None:
-    pairs = [
-        (data_repo_root / "data" / "macro_monthly.json", site_root / "assets" / "macro_monthly.json"),
-        (data_repo_root / "data" / "fx_daily.json", site_root / "assets" / "fx_daily.json"),
-        (data_repo_root / "data" / "inflation_ru_full_1991_2024.json", site_root / "inflation_ru_full_1991_2024.json"),
-    ]
-    for src, dst in pairs:
-        if src.exists():
-            dst.parent.mkdir(parents=True, exist_ok=True)
-            shutil.copy2(src, dst)
+    # Minified JSON and its .gz/.br siblings, built by build_data_artifacts.py
+    dist_dir = data_repo_root / "dist"
+    build_data_artifacts.build(dist_dir, data_repo_root / "data")
+    for _name, artifact_rel in build_data_artifacts.ARTIFACTS:
+        for remote_rel, src in build_data_artifacts.artifact_paths(artifact_rel, dist_dir):
+            if src.exists():
+                dst = site_root / remote_rel
+                dst.parent.mkdir(parents=True, exist_ok=True)
+                shutil.copy2(src, dst)
 
 
 def _iter_full_site(local_root: Path) -> Iterator[UploadItem]:
@@ -108,16 +110,12 @@ def _minimal_items(local_root: Path) -> List[UploadItem]:
 
 
 def _data_items(data_repo_root: Path) -> List[UploadItem]:
-    mapping = [
-        (Path("assets/macro_monthly.json"), data_repo_root / "data" / "macro_monthly.json"),
-        (Path("assets/fx_daily.json"), data_repo_root / "data" / "fx_daily.json"),
-        (Path("inflation_ru_full_1991_2024.json"), data_repo_root / "data" / "inflation_ru_full_1991_2024.json"),
-    ]
     items: List[UploadItem] = []
-    for rel, p in mapping:
-        if not p.exists():
-            raise FileNotFoundError(f"Missing required file for data deploy: {p}")
-        items.append(UploadItem(rel=rel, abs_path=p))
+    for _name, artifact_rel in build_data_artifacts.ARTIFACTS:
+        for remote_rel, p in build_data_artifacts.artifact_paths(artifact_rel, data_repo_root / "dist"):
+            if not p.exists():
+                raise FileNotFoundError(f"Missing required file for data deploy: {p}")
+            items.append(UploadItem(rel=Path(remote_rel), abs_path=p))
     return items
 
 
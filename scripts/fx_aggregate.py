@@ -0,0 +1,94 @@
+"""Weekly / monthly / quarterly / yearly FX aggregates (mean, end, min, max, first) in one vectorized pass.
+
+Daily rows are contiguous calendar days, so every period is a contiguous run of rows: first and
+end are plain indexing and min and max are `reduceat` over the run starts. The mean is pandas'
+own `groupby(...).mean()` over the run ids, so the monthly means are exactly the values
+`compute_fx_monthly` always produced, whatever pandas version is installed.
+
+Usage: python scripts/fx_aggregate.py  (rebuild data/fx_aggregates.json from data/fx_daily.json)
+"""
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import data_cache
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+AGGREGATES_FILE = DATA_DIR / "fx_aggregates.json"
+
+FREQS = {"W": "W-SUN", "M": "M", "Q": "Q-DEC", "Y": "Y-DEC"}
+STATS = ("mean", "end", "min", "max", "first")
+
+
+def runs(periods):
+    """Start/end row of each run of equal periods, plus every row's run id."""
+    ordinals = periods.asi8
+    starts = np.flatnonzero(np.r_[True, ordinals[1:] != ordinals[:-1]])
+    ends = np.r_[starts[1:], len(ordinals)] - 1
+    lengths = ends - starts + 1
+    group_ids = np.repeat(np.arange(len(starts)), lengths)
+    return starts, ends, group_ids
+
+
+def aggregate(df_daily, codes, freqs=tuple(FREQS)):
+    """Aggregate a daily frame (DatetimeIndex, one column per code, no gaps) per frequency.
+
+    Returns {freq: DataFrame} indexed by Period with (stat, code) columns.
+    """
+    codes = list(codes)
+    daily = df_daily[codes].sort_index()
+    values = daily.to_numpy(dtype=float)
+    if not len(values):
+        raise ValueError("FX daily data is empty")
+    result = {}
+    for freq in freqs:
+        periods = daily.index.to_period(FREQS[freq])
+        starts, ends, group_ids = runs(periods)
+
+        stats = {
+            "mean": daily.groupby(group_ids).mean().to_numpy(),
+            "end": values[ends],
+            "min": np.minimum.reduceat(values, starts),
+            "max": np.maximum.reduceat(values, starts),
+            "first": values[starts],
+        }
+        columns = pd.MultiIndex.from_product([STATS, codes], names=["stat", "code"])
+        frame = np.concatenate([stats[s] for s in STATS], axis=1)
+        result[freq] = pd.DataFrame(frame, index=periods[starts], columns=columns)
+    return result
+
+
+def build_payload(aggregates, meta, digits=6):
+    """Columnar JSON payload: per frequency the period labels and, per code, one array per stat."""
+    payload = {"meta": {"base": meta.get("base", "RUB"), "end": meta.get("end"), "stats": list(STATS)}}
+    for freq, frame in aggregates.items():
+        codes = list(dict.fromkeys(frame.columns.get_level_values("code")))
+        payload[freq] = {
+            "periods": [str(p) for p in frame.index],
+            "rates": {
+                code: {
+                    stat: [None if v != v else round(v, digits) for v in frame[(stat, code)].tolist()]
+                    for stat in STATS
+                }
+                for code in codes
+            },
+        }
+    return payload
+
+
+def write(path, payload):
+    Path(path).write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+
+def main():
+    frame = data_cache.load_fx_daily(DATA_DIR / "fx_daily.json", DATA_DIR / "fx_daily_columnar.json")
+    meta = json.loads((DATA_DIR / "fx_daily.json").read_text(encoding="utf-8"))["meta"]
+    aggregates = aggregate(frame.set_index("date"), meta["currencies"])
+    write(AGGREGATES_FILE, build_payload(aggregates, meta))
+    print(f"Saved {AGGREGATES_FILE} ({', '.join(f'{f}: {len(a)}' for f, a in aggregates.items())})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Fixed-layout binary sidecar of fx_daily.json for memory-mapped lookups.
+
+Layout:
+    b"FXD1" | uint32 LE header length | JSON header, space-padded to an 8-byte boundary |
+    row-major little-endian float64 matrix, rows x len(currencies), NaN for missing rates.
+
+The header holds start, rows, currencies, dtype and `source_sha256` (hash of the fx_daily.json
+written in the same run). Rows are consecutive calendar days, so a date maps to row
+`(date - start).days` without reading anything but the header.
+
+Usage: python scripts/fx_binary.py  (rebuild data/fx_daily.bin from data/fx_daily.json)
+"""
+import json
+import os
+import struct
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import fx_columnar
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+JSON_FILE = DATA_DIR / "fx_daily.json"
+BINARY_FILE = DATA_DIR / "fx_daily.bin"
+
+MAGIC = b"FXD1"
+DTYPE = "<f8"
+_PREFIX = struct.Struct("<4sI")
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return pd.Timestamp(value).date()
+
+
+def write(path, series, meta, source_sha256):
+    """Write fx_daily `series` rows to `path` in the binary layout (atomically)."""
+    codes = list(meta["currencies"])
+    matrix = np.array(
+        [[np.nan if row["rates"].get(code) is None else row["rates"][code] for code in codes] for row in series],
+        dtype=DTYPE,
+    ).reshape(len(series), len(codes))
+    header = json.dumps({
+        "start": series[0]["date"] if series else None,
+        "rows": len(series),
+        "currencies": codes,
+        "dtype": DTYPE,
+        "source_sha256": source_sha256,
+    }).encode("utf-8")
+    header += b" " * (-(_PREFIX.size + len(header)) % 8)
+
+    path = Path(path)
+    tmp = path.with_suffix(".tmp")
+    with tmp.open("wb") as fh:
+        fh.write(_PREFIX.pack(MAGIC, len(header)))
+        fh.write(header)
+        fh.write(matrix.tobytes(order="C"))
+    os.replace(tmp, path)
+
+
+class FxBinary:
+    """Read-only view of a binary fx file; the rate matrix is memory-mapped, not loaded."""
+
+    def __init__(self, path=BINARY_FILE):
+        self.path = Path(path)
+        with self.path.open("rb") as fh:
+            magic, header_len = _PREFIX.unpack(fh.read(_PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} is not an fx binary file")
+            self.header = json.loads(fh.read(header_len))
+        self.currencies = self.header["currencies"]
+        self.rows = self.header["rows"]
+        self.start = _to_date(self.header["start"]) if self.header["start"] else None
+        self._columns = {code: i for i, code in enumerate(self.currencies)}
+        if self.rows:
+            self.matrix = np.memmap(
+                self.path,
+                dtype=self.header["dtype"],
+                mode="r",
+                offset=_PREFIX.size + header_len,
+                shape=(self.rows, len(self.currencies)),
+            )
+        else:
+            self.matrix = np.empty((0, len(self.currencies)), dtype=self.header["dtype"])
+
+    @property
+    def end(self):
+        return self.start + timedelta(days=self.rows - 1) if self.rows else None
+
+    def offset(self, day):
+        """Row index of `day`; raises KeyError outside the stored range."""
+        if not self.rows:
+            raise KeyError(day)
+        index = (_to_date(day) - self.start).days
+        if index < 0 or index >= self.rows:
+            raise KeyError(day)
+        return index
+
+    def rate(self, code, day):
+        """RUB rate of `code` on `day`, or None when the source had no value."""
+        value = self.matrix[self.offset(day), self._columns[code]]
+        return None if np.isnan(value) else float(value)
+
+    def slice(self, start=None, end=None, codes=None):
+        """Return (dates, matrix view) for [start, end], clipped to the stored range."""
+        if not self.rows:
+            return pd.DatetimeIndex([]), self.matrix
+        first = 0 if start is None else max(0, (_to_date(start) - self.start).days)
+        last = self.rows - 1 if end is None else min(self.rows - 1, (_to_date(end) - self.start).days)
+        count = max(0, last - first + 1)
+        dates = pd.date_range(self.start + timedelta(days=first), periods=count, freq="D")
+        values = self.matrix[first:first + count]
+        if codes is not None:
+            values = values[:, [self._columns[code] for code in codes]]
+        return dates, values
+
+    def frame(self, start=None, end=None, codes=None):
+        """fx_daily frame (`date` + one column per currency) for [start, end]; copies only that range."""
+        codes = list(self.currencies if codes is None else codes)
+        dates, values = self.slice(start, end)
+        frame = {"date": dates}
+        for code in codes:
+            frame[code] = values[:, self._columns[code]] if code in self._columns else np.full(len(dates), np.nan)
+        return pd.DataFrame(frame)
+
+    def matches(self, json_path=JSON_FILE, source_sha256=None):
+        """True when the file was built from the current `json_path` (or the one hashing to `source_sha256`)."""
+        if source_sha256 is None:
+            source_sha256 = fx_columnar.sha256_bytes(Path(json_path).read_bytes())
+        return self.header.get("source_sha256") == source_sha256
+
+
+def open_current(path=BINARY_FILE, json_path=JSON_FILE, source_sha256=None):
+    """FxBinary for `path` when it exists and was built from the current `json_path`, else None."""
+    try:
+        fx = FxBinary(path)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+    return fx if fx.matches(json_path, source_sha256) else None
+
+
+def main():
+    raw = JSON_FILE.read_bytes()
+    data = json.loads(raw)
+    write(BINARY_FILE, data.get("series", []), data["meta"], fx_columnar.sha256_bytes(raw))
+    print(f"Saved {BINARY_FILE} ({data['meta']['rows']} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Columnar variant of fx_daily.json: a start date, a row count and one rate array per currency.
+
+`normalize_daily_rates` guarantees one row per calendar day, so row i is `start + i days` and the
+dates do not need to be stored. `meta.source_sha256` is the hash of the fx_daily.json written in
+the same run; readers use the columnar file only while that hash still matches.
+
+Usage: python scripts/fx_columnar.py  (rebuild data/fx_daily_columnar.json from data/fx_daily.json)
+"""
+import hashlib
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+JSON_FILE = DATA_DIR / "fx_daily.json"
+COLUMNAR_FILE = DATA_DIR / "fx_daily_columnar.json"
+
+
+def sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def build_payload(series, meta, source_sha256):
+    """Build the columnar payload from fx_daily `series` rows and their `meta`."""
+    codes = list(meta["currencies"])
+    return {
+        "meta": {
+            "base": meta.get("base", "RUB"),
+            "source": meta.get("source"),
+            "currencies": codes,
+            "start": series[0]["date"] if series else None,
+            "end": meta.get("end"),
+            "rows": len(series),
+            "updated": meta.get("updated"),
+            "source_sha256": source_sha256,
+        },
+        "rates": {code: [row["rates"].get(code) for row in series] for code in codes},
+    }
+
+
+def write(path, payload):
+    Path(path).write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+
+def frame_from_payload(payload):
+    """Return the same frame `update_fx_daily._load_existing` builds from fx_daily.json."""
+    meta = payload["meta"]
+    rows = meta["rows"]
+    data = {"date": pd.date_range(meta["start"], periods=rows, freq="D")}
+    for code in meta["currencies"]:
+        values = payload["rates"][code]
+        if len(values) != rows:
+            raise ValueError(f"Columnar fx file: {code} has {len(values)} values, expected {rows}")
+        data[code] = np.array(values, dtype=float)
+    return pd.DataFrame(data)
+
+
+def load(path=COLUMNAR_FILE, json_path=JSON_FILE):
+    """Load the columnar file if it was built from the current `json_path`; otherwise return None."""
+    path = Path(path)
+    json_path = Path(json_path)
+    if not path.exists():
+        return None
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if json_path.exists() and payload["meta"].get("source_sha256") != sha256_bytes(json_path.read_bytes()):
+        return None
+    if not payload["meta"].get("rows"):
+        return None
+    return frame_from_payload(payload)
+
+
+def main():
+    raw = JSON_FILE.read_bytes()
+    data = json.loads(raw)
+    payload = build_payload(data.get("series", []), data["meta"], sha256_bytes(raw))
+    write(COLUMNAR_FILE, payload)
+    print(f"Saved {COLUMNAR_FILE} ({payload['meta']['rows']} rows)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""Delta feed for fx_daily.json: the last N days of rows plus versioning, so clients can skip full reloads.
+
+fx_daily_delta.json:
+    version       data version written into fx_daily.json meta; +1 on every publish
+    min_version   oldest base version whose rows before `start` are still current
+    sha256        hash of the full fx_daily.json this delta reproduces
+    base_version, base_sha256   the previously published full file
+    start, meta, series         first delta date, the new meta and the rows from `start` on
+
+fx_daily_versions.json keeps, per published version, its sha256 and `changed_from` — the
+first date whose row differs from the previous version (null when no row changed). A base
+version V is still good for a delta when every version after V changed only rows from `start`
+on; `min_version` is the oldest such V. The log is trimmed to the versions that can still matter.
+
+A client holding fx_daily.json with `meta.version` V applies the delta when
+`min_version <= V` and its last date is at least `start - 1 day`: keep rows before `start`,
+append `series`, take `meta`. Otherwise it downloads the full file. `apply_delta` is the
+reference implementation.
+
+Usage: python scripts/fx_delta.py  (rebuild data/fx_daily_delta.json from data/fx_daily.json)
+"""
+import hashlib
+import json
+import os
+from datetime import date, timedelta
+from pathlib import Path
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+JSON_FILE = DATA_DIR / "fx_daily.json"
+DELTA_FILE = DATA_DIR / "fx_daily_delta.json"
+VERSIONS_FILE = DATA_DIR / "fx_daily_versions.json"
+# Сколько последних дней отдаётся в fx_daily_delta.json
+DEFAULT_DAYS = int(os.getenv("FX_DELTA_DAYS", "31"))
+MAX_VERSIONS = 400
+
+
+def read(path=DELTA_FILE):
+    path = Path(path)
+    if not path.exists():
+        return None
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return None
+
+
+def read_versions(path=VERSIONS_FILE):
+    path = Path(path)
+    if not path.exists():
+        return []
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))["versions"]
+    except (ValueError, KeyError):
+        return []
+
+
+def write_versions(path, versions):
+    Path(path).write_text(json.dumps({"versions": versions}, indent=2) + "\n", encoding="utf-8")
+
+
+def next_version(versions, meta=None):
+    if versions:
+        return versions[-1]["version"] + 1
+    return (meta or {}).get("version", 0) + 1
+
+
+def first_change(previous_series, series):
+    """First date whose row differs between two versions of the series; None if none does.
+
+    Without `previous_series` every row counts as changed.
+    """
+    if previous_series is None:
+        return series[0]["date"] if series else None
+    for old, new in zip(previous_series, series):
+        if old != new:
+            return min(old["date"], new["date"])
+    if len(previous_series) == len(series):
+        return None
+    longer = series if len(series) > len(previous_series) else previous_series
+    return longer[min(len(previous_series), len(series))]["date"]
+
+
+def min_version(versions, version, start):
+    """Oldest base version for which the changes of all later versions start on or after `start`."""
+    expected = version
+    floor = version
+    for entry in reversed(versions):
+        if entry["version"] > version:
+            continue
+        if entry["version"] != expected:
+            break
+        changed = entry.get("changed_from")
+        if changed is not None and (start is None or changed < start):
+            return entry["version"]
+        floor = expected - 1
+        expected -= 1
+    return floor
+
+
+def record_version(versions, version, sha256, changed_from, start):
+    """Versions log with `version` appended, trimmed to the entries `min_version` can still need."""
+    versions = [v for v in versions if v["version"] < version]
+    versions.append({"version": version, "sha256": sha256, "changed_from": changed_from})
+    # старше последней версии, изменившей строки до `start`, ничего не нужно: окно только сдвигается вперёд
+    keep = 0
+    for i, entry in enumerate(versions):
+        changed = entry.get("changed_from")
+        if changed is not None and (start is None or changed < start):
+            keep = i
+    return versions[max(keep, len(versions) - MAX_VERSIONS):]
+
+
+def build_delta(meta, series, sha256, versions=(), days=DEFAULT_DAYS):
+    """Delta for the full file (`meta`, `series`, `sha256`) that was just written.
+
+    `versions` is the versions log; without an entry for this version and hash no older
+    client may apply the delta.
+    """
+    version = meta["version"]
+    first = max(0, len(series) - days)
+    start = series[first]["date"] if series else None
+
+    by_version = {v["version"]: v for v in versions}
+    current = by_version.get(version)
+    if current is not None and current["sha256"] == sha256:
+        lowest = min_version(versions, version, start)
+    else:
+        lowest = version
+    base = by_version.get(version - 1)
+
+    return {
+        "version": version,
+        "min_version": lowest,
+        "sha256": sha256,
+        "base_version": base["version"] if base else None,
+        "base_sha256": base["sha256"] if base else None,
+        "start": start,
+        "meta": meta,
+        "series": series[first:],
+    }
+
+
+def write(path, delta):
+    Path(path).write_text(json.dumps(delta, ensure_ascii=False, indent=2), encoding="utf-8")
+
+
+def apply_delta(base, delta):
+    """Return the fx_daily payload `delta` produces from `base`; ValueError if a full reload is needed."""
+    base_version = base.get("meta", {}).get("version")
+    if base_version is None or base_version < delta["min_version"]:
+        raise ValueError(f"Base version {base_version} is older than delta min_version {delta['min_version']}")
+    if base_version > delta["version"]:
+        raise ValueError(f"Base version {base_version} is newer than delta version {delta['version']}")
+    if base_version == delta["version"]:
+        return base
+
+    series = base.get("series", [])
+    start = delta["start"]
+    if start is not None:
+        day_before = (date.fromisoformat(start) - timedelta(days=1)).isoformat()
+        if not series or series[-1]["date"] < day_before:
+            last = series[-1]["date"] if series else None
+            raise ValueError(f"Base ends on {last}, delta starts on {start}")
+        series = [row for row in series if row["date"] < start]
+    return {"meta": delta["meta"], "series": series + delta["series"]}
+
+
+def main():
+    raw = JSON_FILE.read_bytes()
+    data = json.loads(raw)
+    meta = dict(data["meta"])
+    meta.setdefault("version", 0)
+    delta = build_delta(meta, data.get("series", []), hashlib.sha256(raw).hexdigest(), read_versions())
+    write(DELTA_FILE, delta)
+    print(
+        f"Saved {DELTA_FILE} (version {delta['version']}, min_version {delta['min_version']}, "
+        f"{len(delta['series'])} rows from {delta['start']})"
+    )
+
+
+if __name__ == "__main__":
+    main()
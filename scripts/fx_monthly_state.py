@@ -0,0 +1,194 @@
+"""Persisted monthly FX averages, so a run only recomputes the months that changed.
+
+.cache/fx_monthly_state.json keeps, per month, the mean of the daily rates (`mean`), the number
+of days (`count`), the last day (`last_day`), the rates on that day (`end`) and the sha256 of the
+filled daily rows they were computed from (`digest`), plus the sha256 and `meta.version` of the
+fx_daily.json it was built from.
+
+On the next run the versions log (data/fx_daily_versions.json) gives the first date changed in
+any version published since the state's one. Months before it are reused as stored; only the
+days from the start of its month on are loaded, filled (seeded with the previous month's `end`)
+and compared month by month with the stored digests. A month whose rows are unchanged is reused,
+any other one is recomputed from its daily rows with fx_aggregate (pandas' groupby mean), so the
+result equals a full `compute_fx_monthly`. When the log cannot vouch for the state (its version
+or hash is missing, or versions in between were trimmed) the whole history is checked the same way.
+"""
+import hashlib
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import fx_aggregate
+import http_cache
+
+STATE_FILE = http_cache.CACHE_DIR.parent / "fx_monthly_state.json"
+FORMAT_VERSION = 3
+
+
+def load(codes, path=STATE_FILE):
+    """Stored state for `codes`, or None if missing, unreadable or built for other currencies."""
+    path = Path(path)
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if state.get("format") != FORMAT_VERSION or state.get("codes") != list(codes):
+        return None
+    return state
+
+
+def save(state, path=STATE_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(state, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def fill_daily(df_daily, codes, start=None, seed=None):
+    """Calendar-daily, forward-filled frame from `start` (default: first row) to the last row.
+
+    `seed` — rates on the day before `start`, used when the first days have no rate.
+    """
+    daily = df_daily[list(codes)].sort_index()
+    first = pd.Timestamp(start) if start is not None else daily.index.min()
+    daily = daily.reindex(pd.date_range(first, daily.index.max(), freq="D"))
+    if seed is not None:
+        daily.iloc[0] = daily.iloc[0].fillna(pd.Series(seed, index=daily.columns))
+    daily = daily.ffill()
+    missing = daily.isna().any()
+    if missing.any():
+        missing_codes = ", ".join(missing.index[missing].tolist())
+        raise ValueError(f"FX daily data has no prior rate for: {missing_codes}")
+    return daily
+
+
+def digest(values):
+    """sha256 of a block of filled daily rows (float64, row-major)."""
+    return hashlib.sha256(np.ascontiguousarray(values, dtype=float).tobytes()).hexdigest()
+
+
+def summarize(filled, codes):
+    """{month: entry} for the filled daily rows; every month in `filled` must be complete so far."""
+    if filled.empty:
+        return {}
+    monthly = fx_aggregate.aggregate(filled, codes, freqs=("M",))["M"]
+    values = filled.to_numpy(dtype=float)
+    periods = filled.index.to_period("M")
+    starts, ends, _ = fx_aggregate.runs(periods)
+    return {
+        str(periods[start]): {
+            "last_day": filled.index[stop].date().isoformat(),
+            "count": int(stop - start + 1),
+            "mean": monthly["mean"].iloc[i].tolist(),
+            "end": values[stop].tolist(),
+            "digest": digest(values[start:stop + 1]),
+        }
+        for i, (start, stop) in enumerate(zip(starts.tolist(), ends.tolist()))
+    }
+
+
+def first_changed_month(state, source_sha256, version, versions):
+    """First month that may differ from the fx_daily the state was built from, per the versions log.
+
+    None when no row changed (only `meta`); raises LookupError when the log cannot tell.
+    """
+    by_version = {entry["version"]: entry for entry in versions}
+    built = state.get("version")
+    if built is None or version is None or built > version:
+        raise LookupError("state has no comparable version")
+    if by_version.get(built, {}).get("sha256") != state.get("source_sha256"):
+        raise LookupError(f"version {built} of the state is not in the log")
+    if by_version.get(version, {}).get("sha256") != source_sha256:
+        raise LookupError(f"version {version} of fx_daily.json is not in the log")
+    changed = []
+    for v in range(built + 1, version + 1):
+        if v not in by_version:
+            raise LookupError(f"version {v} is not in the log")
+        if by_version[v].get("changed_from") is not None:
+            changed.append(by_version[v]["changed_from"])
+    return pd.Period(min(changed), freq="M") if changed else None
+
+
+def update(state, load_daily, codes, source_sha256, version=None, versions=(), refresh_from=None):
+    """Bring `state` up to date with fx_daily; returns (state, months recomputed).
+
+    `load_daily(start)` returns the daily frame (date index, one column per code) from `start`
+    on, the whole history for None. `version` is fx_daily.json's `meta.version` and `versions`
+    its versions log; without them the whole history is loaded. `refresh_from` (a month) forces
+    those months to be redone too.
+    """
+    codes = list(codes)
+    refresh = pd.Period(refresh_from, freq="M") if refresh_from is not None else None
+    if state is not None and state.get("source_sha256") == source_sha256 and refresh is None:
+        return state, 0
+    if state is None:
+        state = {"format": FORMAT_VERSION, "codes": codes, "months": {}}
+    months = state.setdefault("months", {})
+
+    full = not months
+    first = None
+    if not full:
+        try:
+            first = first_changed_month(state, source_sha256, version, versions)
+        except LookupError:
+            full = True
+    if not full and refresh is not None:
+        first = refresh if first is None else min(first, refresh)
+    if not full and first is None:
+        state["source_sha256"] = source_sha256
+        state["version"] = version
+        return state, 0
+    # месяц перед первым изменённым даёт курсы на день до начала загрузки
+    seed = None if full else months.get(str(first - 1))
+    if seed is None or str(first) <= min(months):
+        first = None
+        filled = fill_daily(load_daily(None), codes)
+    else:
+        filled = fill_daily(load_daily(first.start_time), codes, start=first.start_time, seed=seed["end"])
+
+    values = filled.to_numpy(dtype=float)
+    periods = filled.index.to_period("M")
+    starts, ends, _ = fx_aggregate.runs(periods)
+    refresh_key = str(refresh) if refresh is not None else None
+
+    redo = np.zeros(len(values), dtype=bool)
+    for start, stop in zip(starts.tolist(), (ends + 1).tolist()):
+        key = str(periods[start])
+        entry = months.get(key)
+        if (
+            entry is None
+            or (refresh_key is not None and key >= refresh_key)
+            or entry.get("count") != stop - start
+            or entry.get("digest") != digest(values[start:stop])
+        ):
+            redo[start:stop] = True
+
+    current = {str(periods[start]) for start in starts.tolist()}
+    first_key = str(first) if first is not None else ""
+    for key in [m for m in months if m >= first_key and m not in current]:
+        del months[key]
+    recomputed = summarize(filled[redo], codes)
+    months.update(recomputed)
+
+    state["end"] = filled.index[-1].date().isoformat()
+    state["source_sha256"] = source_sha256
+    state["version"] = version
+    return state, len(recomputed)
+
+
+def to_frame(state, codes):
+    """Monthly frame as `compute_fx_monthly` returns it: rate_<code> (mean) and rate_<code>_end."""
+    keys = sorted(state["months"])
+    entries = [state["months"][k] for k in keys]
+    mean = np.array([e["mean"] for e in entries], dtype=float).reshape(len(keys), len(codes))
+    end = np.array([e["end"] for e in entries], dtype=float).reshape(len(keys), len(codes))
+
+    out = pd.DataFrame(index=pd.PeriodIndex(keys, freq="M"))
+    for i, code in enumerate(codes):
+        out[f"rate_{code.lower()}"] = mean[:, i]
+        out[f"rate_{code.lower()}_end"] = end[:, i]
+    return out
@@ -0,0 +1,120 @@
+"""Vectorized rate lookups, cross rates and conversion over fx_daily.
+
+Rows are consecutive calendar days, so a date resolves to a row by `date - start` in whole days.
+Each currency is a column view (of the memory-mapped fx_daily.bin when loaded from it, nothing is
+copied); RUB is an implicit column of ones. Every argument may be a scalar or an array (dates as ISO
+strings, `datetime64`, `date` or `Timestamp`), and the usual NumPy broadcasting applies.
+
+    fx = fx_query.load()
+    fx.rate("USD", ["2024-03-05", "2024-03-06"])
+    fx.cross("EUR", "USD", dates)              # USD per 1 EUR
+    fx.convert(amounts, "USD", codes, dates)   # amounts in USD -> each row's target currency
+"""
+from pathlib import Path
+
+import numpy as np
+
+import data_cache
+import fx_binary
+
+BASE = "RUB"
+
+
+class FxTable:
+    def __init__(self, start, currencies, columns, rows):
+        self.start = np.datetime64(start, "D")
+        self.currencies = list(currencies)
+        self.rows = rows
+        # последняя колонка — RUB (курс 1), без выделения памяти
+        self.columns = [*columns, np.broadcast_to(np.float64(1.0), (rows,))]
+        self._columns = {code: i for i, code in enumerate(self.currencies)}
+        self._columns[BASE] = len(self.currencies)
+        self._sorted_codes = np.array(sorted(self._columns))
+        self._sorted_columns = np.array([self._columns[c] for c in self._sorted_codes], dtype=np.intp)
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build from a normalized fx_daily frame (`date` column + one column per currency)."""
+        codes = [c for c in df.columns if c != "date"]
+        dates = df["date"].to_numpy(dtype="datetime64[D]")
+        expected = np.arange(dates[0], dates[0] + len(dates))
+        if not np.array_equal(dates, expected):
+            raise ValueError("fx frame must have exactly one row per calendar day")
+        return cls(dates[0], codes, [df[code].to_numpy(dtype=float) for code in codes], len(dates))
+
+    @classmethod
+    def from_binary(cls, fx):
+        """Build over an open `fx_binary.FxBinary`: every column is a strided view of its memmap."""
+        return cls(fx.start, fx.currencies, [fx.matrix[:, j] for j in range(len(fx.currencies))], fx.rows)
+
+    @property
+    def end(self):
+        return self.start + (self.rows - 1)
+
+    def row_index(self, dates):
+        """Row offsets for `dates`; ValueError if any date is outside the stored calendar."""
+        offsets = (np.asarray(dates, dtype="datetime64[D]") - self.start).astype(np.int64)
+        if offsets.size and (offsets.min() < 0 or offsets.max() >= self.rows):
+            raise ValueError(f"dates must be within {self.start}..{self.end}")
+        return offsets
+
+    def column_index(self, codes):
+        codes = np.asarray(codes)
+        if codes.ndim == 0:
+            try:
+                return np.intp(self._columns[str(codes)])
+            except KeyError:
+                raise KeyError(f"Unknown currency: {codes}") from None
+        # searchsorted по отсортированному списку кодов: O(n log k) без сортировки всего массива
+        known = self._sorted_codes
+        pos = np.searchsorted(known, codes).clip(0, len(known) - 1)
+        bad = known[pos] != codes
+        if bad.any():
+            raise KeyError(f"Unknown currency: {codes[bad].flat[0]}")
+        return self._sorted_columns[pos]
+
+    def take(self, rows, cols):
+        """Rates at (`rows`, `cols`) pairs, broadcast together; each column is read only at its own rows."""
+        if np.ndim(cols) == 0:
+            return self.columns[int(cols)][rows]
+        rows, cols = np.broadcast_arrays(rows, cols)
+        out = np.empty(rows.shape)
+        flat_rows, flat_cols, flat_out = rows.ravel(), cols.ravel(), out.reshape(-1)
+        # группировка по колонке: одна сортировка вместо маски на каждую валюту
+        order = np.argsort(flat_cols, kind="stable")
+        bounds = np.searchsorted(flat_cols[order], np.arange(len(self.columns) + 1))
+        for j, (lo, hi) in enumerate(zip(bounds[:-1], bounds[1:])):
+            if lo < hi:
+                picked = order[lo:hi]
+                flat_out[picked] = self.columns[j][flat_rows[picked]]
+        return out
+
+    def rate(self, code, dates):
+        """RUB per 1 unit of `code` on `dates`."""
+        return self.take(self.row_index(dates), self.column_index(code))
+
+    def cross(self, base, quote, dates):
+        """Units of `quote` per 1 unit of `base` on `dates`."""
+        rows = self.row_index(dates)
+        return self.take(rows, self.column_index(base)) / self.take(rows, self.column_index(quote))
+
+    def convert(self, amounts, from_codes, to_codes, dates):
+        """Convert `amounts` in `from_codes` into `to_codes` at the CBR rates of `dates`."""
+        rows = self.row_index(dates)
+        rub = np.asarray(amounts, dtype=float) * self.take(rows, self.column_index(from_codes))
+        return rub / self.take(rows, self.column_index(to_codes))
+
+
+def load(path=fx_binary.BINARY_FILE, json_path=fx_binary.JSON_FILE):
+    """FxTable over the memory-mapped fx_daily.bin while it was built from the current `json_path`.
+
+    A missing or stale .bin (its `source_sha256` differs from the JSON's hash) is not served:
+    the table is then built from fx_daily.json itself.
+    """
+    fx = fx_binary.open_current(Path(path), Path(json_path))
+    if fx is not None:
+        return FxTable.from_binary(fx)
+    df = data_cache.load_fx_daily(Path(json_path))
+    if df is None:
+        raise FileNotFoundError(f"Missing {json_path}")
+    return FxTable.from_frame(df)
@@ -0,0 +1,171 @@
+"""On-disk HTTP response cache with ETag/Last-Modified revalidation and size-bounded LRU eviction.
+
+Entries are keyed by URL. Within the source TTL a cached body is returned without any request;
+after it the cache revalidates with a conditional GET, so an unchanged source costs one 304.
+
+The CBR date-range queries end on today, so a URL with the requested range would never repeat.
+`windows` splits a range into calendar-aligned request windows instead: whole years, then whole
+months of the current year, then the current month up to the end date. Only the last one changes
+from day to day; the callers keep the rows of their own range. Windows that ended well in the
+past are fetched under the "*_closed" sources, which stay fresh for a month.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+CACHE_DIR = Path(os.getenv("FIN_CALC_CACHE_DIR", Path(__file__).resolve().parents[1] / ".cache")) / "http"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Сколько секунд ответ считается свежим без запроса к источнику.
+SOURCE_TTLS = {
+    "cbr_fx": 3600,
+    "cbr_fx_closed": 30 * 86400,
+    "cbr_key_rate": 3600,
+    "cbr_key_rate_closed": 30 * 86400,
+    "rosstat_cpi": 3600,
+}
+DEFAULT_TTL = 3600
+
+
+def windows(start, end):
+    """Calendar-aligned (first, last) request windows covering [start, end]: whole years before
+    `end`'s year, whole months of it before `end`'s month, then that month up to `end`."""
+    out = []
+    current = date(start.year, 1, 1) if start.year < end.year else date(start.year, start.month, 1)
+    while current <= end:
+        if current.year < end.year:
+            last = date(current.year, 12, 31)
+        elif current.month < end.month:
+            last = date(current.year, current.month + 1, 1) - timedelta(days=1)
+        else:
+            last = end
+        out.append((current, last))
+        current = last + timedelta(days=1)
+    return out
+
+
+def window_source(source, last, closed_after):
+    """`source` + "_closed" for a window that ended more than `closed_after` days ago."""
+    return f"{source}_closed" if last < date.today() - timedelta(days=closed_after) else source
+
+
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES, ttls=None):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttls = dict(SOURCE_TTLS if ttls is None else ttls)
+        self.stats = {"hits": 0, "revalidated": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.directory / f"{key}.body", self.directory / f"{key}.json"
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    @staticmethod
+    def _write_atomic(path, data):
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _load(self, url):
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+        if meta.get("url") != url or meta.get("size") != len(body):
+            return None, None
+        return meta, body
+
+    def _save_meta(self, url, meta):
+        _, meta_path = self._paths(url)
+        self._write_atomic(meta_path, json.dumps(meta).encode("utf-8"))
+
+    def fetch(self, url, source, fetcher):
+        """Return the body for `url`; `fetcher(headers)` performs the real GET and returns a response."""
+        meta, body = self._load(url)
+        now = time.time()
+        headers = {}
+        if meta is not None:
+            if now - meta.get("stored_at", 0) < self.ttls.get(source, DEFAULT_TTL):
+                meta["used_at"] = now
+                self._save_meta(url, meta)
+                self._count("hits")
+                return body
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        resp = fetcher(headers)
+        if resp.status_code == 304 and meta is not None:
+            meta["stored_at"] = meta["used_at"] = now
+            self._save_meta(url, meta)
+            self._count("revalidated")
+            return body
+
+        body = resp.content
+        self.directory.mkdir(parents=True, exist_ok=True)
+        body_path, _ = self._paths(url)
+        self._write_atomic(body_path, body)
+        self._save_meta(url, {
+            "url": url,
+            "source": source,
+            "etag": resp.headers.get("ETag"),
+            "last_modified": resp.headers.get("Last-Modified"),
+            "stored_at": now,
+            "used_at": now,
+            "size": len(body),
+        })
+        self._count("misses")
+        self.evict()
+        return body
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits into `max_bytes`."""
+        with self._lock:
+            entries = []
+            total = 0
+            for meta_path in self.directory.glob("*.json"):
+                try:
+                    meta = json.loads(meta_path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    continue
+                size = int(meta.get("size", 0))
+                total += size
+                entries.append((meta.get("used_at", 0), size, meta_path))
+            entries.sort()
+            for _, size, meta_path in entries:
+                if total <= self.max_bytes:
+                    break
+                meta_path.with_suffix(".body").unlink(missing_ok=True)
+                meta_path.unlink(missing_ok=True)
+                total -= size
+
+    def summary(self):
+        return (
+            f"HTTP cache: {self.stats['hits']} hits, {self.stats['revalidated']} revalidated (304), "
+            f"{self.stats['misses']} misses"
+        )
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Process-wide cache under CACHE_DIR, or None when disabled with FIN_CALC_HTTP_CACHE=0."""
+    global _default_cache
+    if os.getenv("FIN_CALC_HTTP_CACHE", "1") == "0":
+        return None
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
@@ -0,0 +1,176 @@
+"""Shared HTTP plumbing for the data updaters: pooled session, per-host caps, deadlines, circuit breaker."""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_TIMEOUT = 30
+USER_AGENT = "fin_calc-data-updater"
+
+
+def build_session(pool_size=10):
+    """Return a keep-alive session whose connection pool fits `pool_size` parallel requests."""
+    session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class HostLimiter:
+    """Cap the number of in-flight requests to a single host and, optionally, their start rate."""
+
+    def __init__(self, per_host, per_second=None):
+        self.per_host = max(1, int(per_host))
+        self.interval = 1.0 / per_second if per_second else 0.0
+        self._lock = threading.Lock()
+        self._semaphores = {}
+        self._next_start = {}
+
+    def _semaphore(self, host):
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self._semaphores[host]
+
+    def _throttle(self, host):
+        if not self.interval:
+            return
+        with self._lock:
+            start = max(time.monotonic(), self._next_start.get(host, 0.0))
+            self._next_start[host] = start + self.interval
+        delay = start - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self, url):
+        host = urlsplit(url).netloc
+        semaphore = self._semaphore(host)
+        semaphore.acquire()
+        try:
+            self._throttle(host)
+            yield
+        finally:
+            semaphore.release()
+
+
+class Deadline:
+    """Overall time budget shared by a group of requests; `None` means unlimited."""
+
+    def __init__(self, seconds=None):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    def remaining(self):
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.monotonic()
+
+    def check(self):
+        """Raise TimeoutError once the budget is spent; for loaders that do local work between requests."""
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise TimeoutError("Overall fetch deadline exceeded")
+
+    def timeout(self, default):
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        if remaining <= 0:
+            raise TimeoutError("Overall fetch deadline exceeded")
+        return min(default, remaining)
+
+
+def get(url, session=None, timeout=DEFAULT_TIMEOUT, limiter=None, deadline=None, **kwargs):
+    """GET `url` and raise on HTTP errors, honouring the optional host limiter and deadline."""
+    if deadline is not None:
+        timeout = deadline.timeout(timeout)
+    sender = session or requests
+    if limiter is None:
+        resp = sender.get(url, timeout=timeout, **kwargs)
+    else:
+        with limiter.slot(url):
+            if deadline is not None:
+                timeout = deadline.timeout(timeout)
+            resp = sender.get(url, timeout=timeout, **kwargs)
+    resp.raise_for_status()
+    return resp
+
+
+def fetch_content(url, session=None, timeout=DEFAULT_TIMEOUT, limiter=None, deadline=None, cache=None, source=None, **kwargs):
+    """Return the response body for `url`, going through the on-disk `cache` when one is given."""
+    if cache is None:
+        return get(url, session=session, timeout=timeout, limiter=limiter, deadline=deadline, **kwargs).content
+
+    base_headers = kwargs.pop("headers", None) or {}
+
+    def fetcher(headers):
+        return get(
+            url,
+            session=session,
+            timeout=timeout,
+            limiter=limiter,
+            deadline=deadline,
+            headers={**base_headers, **headers},
+            **kwargs,
+        )
+
+    return cache.fetch(url, source, fetcher)
+
+
+class CircuitBreaker:
+    """Persisted per-key failure counter that demotes keys which keep failing.
+
+    After `threshold` consecutive failures a key is "open" for `cooldown` seconds: `order()`
+    moves it behind the healthy keys, so later runs try the working alternative first. A single
+    success closes the circuit again.
+    """
+
+    def __init__(self, path=None, threshold=3, cooldown=7 * 24 * 3600):
+        self.path = Path(path) if path else None
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.state = {}
+        if self.path is not None and self.path.exists():
+            try:
+                self.state = json.loads(self.path.read_text(encoding="utf-8"))
+            except ValueError:
+                self.state = {}
+
+    def is_open(self, key):
+        entry = self.state.get(key)
+        if not entry or entry.get("failures", 0) < self.threshold:
+            return False
+        return time.time() - entry.get("opened_at", 0) < self.cooldown
+
+    def order(self, keys):
+        with self._lock:
+            return [k for k in keys if not self.is_open(k)] + [k for k in keys if self.is_open(k)]
+
+    def record_success(self, key):
+        with self._lock:
+            self.state.pop(key, None)
+
+    def record_failure(self, key):
+        with self._lock:
+            entry = self.state.setdefault(key, {"failures": 0})
+            entry["failures"] += 1
+            if entry["failures"] >= self.threshold:
+                entry["opened_at"] = time.time()
+
+    def save(self):
+        if self.path is None:
+            return
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.state, indent=2, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self.path)
@@ -0,0 +1,79 @@
+"""Persisted CBR key rate change log: data/key_rate_changes.json.
+
+    meta.checked_to   last day covered by a fetched CBR table
+    changes           [{"date", "rate"}], one entry per day the rate changed
+
+The CBR KeyRate table has a row per business day; only the rows where the rate differs from the
+previous one are kept. A run fetches the table from `checked_to - OVERLAP_DAYS` (from the start
+of history when the log is empty), drops logged changes inside that window and merges the
+fetched rows back, so revisions within the overlap are picked up and the download stays small.
+"""
+import json
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+LOG_FILE = DATA_DIR / "key_rate_changes.json"
+OVERLAP_DAYS = 14
+
+
+def empty():
+    return {"meta": {"source": "CBR KeyRate", "checked_to": None, "updated": None}, "changes": []}
+
+
+def read(path=LOG_FILE):
+    path = Path(path)
+    if not path.exists():
+        return empty()
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def write(path, log):
+    Path(path).write_text(json.dumps(log, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def window_start(log, start_date):
+    """First day to request from CBR for `log`."""
+    checked_to = log["meta"].get("checked_to")
+    if not checked_to or not log["changes"]:
+        return start_date
+    return max(start_date, date.fromisoformat(checked_to) - timedelta(days=OVERLAP_DAYS))
+
+
+def merge(log, fetched, start):
+    """New log with the fetched rows (frame with `date`, `rate`) replacing everything from `start` on."""
+    start = pd.Timestamp(start)
+    kept = [c for c in log["changes"] if pd.Timestamp(c["date"]) < start]
+    rows = fetched.sort_values("date")
+    rows = rows[rows["date"] >= start]
+
+    changes = list(kept)
+    last = changes[-1]["rate"] if changes else None
+    for day, rate in zip(rows["date"], rows["rate"].astype(float)):
+        if rate != last:
+            changes.append({"date": day.strftime("%Y-%m-%d"), "rate": rate})
+            last = rate
+
+    meta = dict(log["meta"])
+    if not rows.empty:
+        meta["checked_to"] = rows["date"].max().strftime("%Y-%m-%d")
+    meta["updated"] = datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    return {"meta": meta, "changes": changes}
+
+
+def to_frame(log):
+    """Changes as a frame with `date` (datetime64) and `rate` columns."""
+    return pd.DataFrame({
+        "date": pd.to_datetime([c["date"] for c in log["changes"]]),
+        "rate": [float(c["rate"]) for c in log["changes"]],
+    })
+
+
+def daily(log, start, end):
+    """Daily frame indexed by date with the `rate` in force on each day of [start, end]."""
+    df = to_frame(log).set_index("date")
+    full_idx = pd.date_range(start=start, end=end, freq="D")
+    df = df.reindex(df.index.union(full_idx)).ffill().reindex(full_idx)
+    return df
@@ -0,0 +1,130 @@
+"""Month-aligned updates of the macro_monthly `series` rows.
+
+The rows' months are parsed once into a PeriodIndex aligned with the row positions, and the
+fields involved are read into float matrices (None -> NaN). New months, FX refreshes and CPI fills are computed as aligned
+vectorized comparisons against the monthly sources, giving a changed-cell mask; only the rows
+in that mask are written back into their dicts, so untouched rows and the key order of every row
+stay exactly as they were and the JSON is the one the per-row loops produced.
+"""
+import numpy as np
+import pandas as pd
+
+CPI_FIELDS = ("cpi_mom", "cpi_yoy", "cpi_ytd")
+
+
+def rate_fields(codes):
+    fields = []
+    for code in codes:
+        fields.append(f"rate_{code.lower()}")
+        fields.append(f"rate_{code.lower()}_end")
+    return fields
+
+
+def ensure_fields(series, fields):
+    """setdefault(field, None) on every row, in `fields` order."""
+    for row in series:
+        for field in fields:
+            if field not in row:
+                row[field] = None
+
+
+def _parse_month(value):
+    try:
+        return pd.Period(value, freq="M")
+    except Exception:
+        return pd.NaT
+
+
+def month_index(series):
+    """PeriodIndex of the rows' `month` (NaT for rows without a valid one), in row order."""
+    labels = [row.get("month") or None for row in series]
+    try:
+        return pd.PeriodIndex(labels, freq="M")
+    except Exception:
+        return pd.PeriodIndex([_parse_month(v) if v else pd.NaT for v in labels], freq="M")
+
+
+def values(series, fields):
+    """Row x field float matrix of the current values; None and missing keys become NaN."""
+    out = np.empty((len(series), len(fields)))
+    for j, field in enumerate(fields):
+        out[:, j] = np.array([row.get(field) for row in series], dtype=float)
+    return out
+
+
+def _aligned(frame, months, fields):
+    """Values of `frame` at `months` for `fields`, NaN where the month or field is missing."""
+    return frame.reindex(index=months, columns=list(fields)).to_numpy(dtype=float)
+
+
+def _write(series, positions, fields, matrix):
+    for pos, row_values in zip(positions.tolist(), matrix.tolist()):
+        series[pos].update(zip(fields, row_values))
+
+
+def new_rows(months, fx_monthly, key_mean, key_end, cpi, codes, require_cpi):
+    """Rows for `months` that have a key rate, every FX rate and (with `require_cpi`) all CPI fields."""
+    if not len(months):
+        return []
+    fx_fields = rate_fields(codes)
+    key = np.column_stack([key_mean.reindex(months).to_numpy(dtype=float), key_end.reindex(months).to_numpy(dtype=float)])
+    fx = _aligned(fx_monthly, months, fx_fields)
+    cpi_values = _aligned(cpi, months, CPI_FIELDS) if cpi is not None else np.full((len(months), 3), np.nan)
+
+    keep = ~np.isnan(key).any(axis=1) & ~np.isnan(fx).any(axis=1)
+    if require_cpi:
+        keep &= ~np.isnan(cpi_values).any(axis=1)
+
+    rows = []
+    for i in np.flatnonzero(keep).tolist():
+        month = months[i]
+        row = {
+            "date": month.to_timestamp().strftime("%Y-%m-%d"),
+            "month": str(month),
+            "key_rate": float(key[i, 0]),
+            "key_rate_end": float(key[i, 1]),
+        }
+        row.update((field, None if v != v else v) for field, v in zip(CPI_FIELDS, cpi_values[i].tolist()))
+        row.update(zip(fx_fields, fx[i].tolist()))
+        rows.append(row)
+    return rows
+
+
+def refresh_rates(series, months, fx_monthly, codes, refresh_from, current_month):
+    """Overwrite the FX fields of rows in [refresh_from, current_month) that differ from `fx_monthly`;
+    returns the number of rows changed. Missing FX data for such a month is an error."""
+    invalid = months.isna() & np.array([bool(row.get("month")) for row in series], dtype=bool)
+    if invalid.any():
+        bad = series[int(np.flatnonzero(invalid)[0])]["month"]
+        raise ValueError(f"Invalid month in macro_monthly.json: {bad}")
+    fields = rate_fields(codes)
+    target = ~months.isna() & (months >= refresh_from) & (months < current_month) & months.isin(fx_monthly.index)
+    positions = np.flatnonzero(target)
+    if not len(positions):
+        return 0
+
+    fresh = _aligned(fx_monthly, months[positions], fields)
+    gaps = np.isnan(fresh)
+    if gaps.any():
+        i, j = np.argwhere(gaps)[0]
+        raise ValueError(f"Incomplete FX data for {months[positions[i]]}: {codes[j // 2]}")
+
+    # NaN (в т.ч. None) в строке никогда не равен свежему курсу — строка считается изменившейся
+    changed = (values([series[p] for p in positions.tolist()], fields) != fresh).any(axis=1)
+    _write(series, positions[changed], fields, fresh[changed])
+    return int(changed.sum())
+
+
+def fill_cpi(series, months, cpi, current_month):
+    """Fill all CPI fields of rows before `current_month` that miss any of them and have a complete
+    CPI month; returns the number of rows filled."""
+    target = ~months.isna() & (months < current_month) & months.isin(cpi.index)
+    positions = np.flatnonzero(target)
+    if not len(positions):
+        return 0
+
+    fresh = _aligned(cpi, months[positions], CPI_FIELDS)
+    current = values([series[p] for p in positions.tolist()], CPI_FIELDS)
+    changed = ~np.isnan(fresh).any(axis=1) & np.isnan(current).any(axis=1)
+    _write(series, positions[changed], CPI_FIELDS, fresh[changed])
+    return int(changed.sum())
@@ -1,31 +1,57 @@
 import argparse
 import json
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime, timedelta
 from pathlib import Path
-import xml.etree.ElementTree as ET
 
+import numpy as np
 import pandas as pd
-import requests
+
+import cbr_xml
+import columnar_store
+import currency_registry
+import data_cache
+import build_fx_derived
+import fx_columnar
+import fx_delta
+import fx_json
+import http_cache
+import http_client
 
 DATA_DIR = Path(__file__).resolve().parents[1] / "data"
 OUT_FILE = DATA_DIR / "fx_daily.json"
+COLUMNAR_FILE = DATA_DIR / "fx_daily_columnar.json"
+DELTA_FILE = DATA_DIR / "fx_daily_delta.json"
+VERSIONS_FILE = DATA_DIR / "fx_daily_versions.json"
 LAST_UPDATED_FILE = DATA_DIR / "last_updated.json"
 
 START_DATE = datetime(2000, 1, 1).date()
 DATE_FMT = "%d.%m.%Y"
-
-# Валюты по требованию
-CURRENCIES = {
-    "USD": ["R01235"],
-    "EUR": ["R01239"],
-    "CNY": ["R01375"],
-    "GBP": ["R01035"],
-    "CHF": ["R01775"],
-    "THB": ["R01675"],
-    "IDR": ["R01280"],
-    "TRY": ["R01700", "R01700J"],  # сначала R01700 как попросили, затем fallback
-    "INR": ["R01270"],
-}
+DAILY_DATE_FMT = "%d/%m/%Y"
+CBR_BASE_URL = os.getenv("CBR_BASE_URL", "https://www.cbr.ru").rstrip("/")
+# auto-режим: XML_daily (один запрос на день) только для коротких догрузок
+DAILY_MAX_GAP_DAYS = 31
+# ЦБ задним числом правит курсы: последние дни перезапрашиваются в любом режиме
+REFETCH_DAYS = 7
+# meta.source в fx_daily.json по фактически использованному источнику
+SOURCE_LABELS = {"daily": "CBR XML_daily", "dynamic": "CBR XML_dynamic", "backfill": "CBR XML_dynamic"}
+
+DEFAULT_WORKERS = int(os.getenv("FX_WORKERS", "4"))
+DEFAULT_PER_HOST = int(os.getenv("FX_PER_HOST", "4"))
+DEFAULT_DEADLINE = float(os.getenv("FX_DEADLINE", "600"))
+DEFAULT_BACKFILL_RATE = float(os.getenv("FX_BACKFILL_RATE", "2"))
+BACKFILL_DIR = http_cache.CACHE_DIR.parent / "fx_backfill"
+BREAKER_FILE = http_cache.CACHE_DIR.parent / "fx_circuit_breaker.json"
+# Через сколько секунд без ответа основного ID параллельно запрашивать запасной (0 = не хеджировать)
+DEFAULT_HEDGE_AFTER = float(os.getenv("FX_HEDGE_AFTER", "5"))
+
+# Валюты из data/currencies.json (enabled) или FX_CURRENCIES
+CURRENCIES = currency_registry.selected()
+# Дата первой котировки у валют, которые ЦБ начал котировать после START_DATE
+LISTED = currency_registry.listed()
 
 
 def parse_args():
@@ -35,74 +61,520 @@ def parse_args():
         action="store_true",
         help="Repair calendar gaps in the existing file without requesting fresh CBR data",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help="Number of currencies fetched concurrently (1 = serial)",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=DEFAULT_PER_HOST,
+        help="Maximum number of in-flight requests to one host",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=DEFAULT_DEADLINE,
+        help="Overall time budget for fetching all currencies, seconds (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--source",
+        choices=["auto", "daily", "dynamic", "backfill"],
+        default=os.getenv("FX_SOURCE", "auto"),
+        help=(
+            "daily: one XML_daily request per missing day for all currencies; "
+            "dynamic: one XML_dynamic request per currency; "
+            "backfill: resumable rebuild from START_DATE in year-sized chunks; "
+            f"auto: daily when the existing file is at most {DAILY_MAX_GAP_DAYS} days behind, "
+            "backfill when there is no file"
+        ),
+    )
+    parser.add_argument(
+        "--backfill-rate",
+        type=float,
+        default=DEFAULT_BACKFILL_RATE,
+        help="Backfill request rate limit per host, requests per second (0 = unlimited)",
+    )
+    parser.add_argument(
+        "--hedge-after",
+        type=float,
+        default=DEFAULT_HEDGE_AFTER,
+        help="Start the fallback currency ID in parallel if the primary has not answered in this many seconds (0 = off)",
+    )
     return parser.parse_args()
 
 
-def _fetch_currency_series(val_ids, start_date, end_date):
-    last_error = None
-    for val_id in val_ids:
+class NoRecordsError(ValueError):
+    """XML_dynamic answered without a single record for the requested window."""
+
+
+def _fetch_id_series(val_id, start_date, end_date, **http_kwargs):
+    # с кэшем запрашиваются окна по границам лет/месяцев: их URL не меняется от запуска к запуску
+    if http_kwargs.get("cache") is not None:
+        windows = http_cache.windows(start_date, end_date)
+    else:
+        windows = [(start_date, end_date)]
+    parts = []
+    for first, last in windows:
         url = (
-            "https://www.cbr.ru/scripts/XML_dynamic.asp"
-            f"?date_req1={start_date.strftime(DATE_FMT)}"
-            f"&date_req2={end_date.strftime(DATE_FMT)}"
+            f"{CBR_BASE_URL}/scripts/XML_dynamic.asp"
+            f"?date_req1={first.strftime(DATE_FMT)}"
+            f"&date_req2={last.strftime(DATE_FMT)}"
             f"&VAL_NM_RQ={val_id}"
         )
+        source = http_cache.window_source("cbr_fx", last, REFETCH_DAYS)
+        content = http_client.fetch_content(url, source=source, **http_kwargs)
+        dates, rates = cbr_xml.parse_dynamic(content)
+        parts.append(pd.Series(rates, index=dates))
+    rates = pd.concat(parts)
+    rates = rates[(rates.index >= pd.Timestamp(start_date)) & (rates.index <= pd.Timestamp(end_date))]
+    if not len(rates):
+        raise NoRecordsError(f"No records for {val_id}")
+
+    df = pd.DataFrame({"rate": rates.to_numpy()}, index=rates.index).sort_index()
+
+    full_idx = pd.date_range(start=start_date, end=end_date, freq="D")
+    df = df.reindex(full_idx)
+    df["rate"] = df["rate"].ffill()
+    return df["rate"].reset_index().rename(columns={"index": "date"})
+
+
+def _fetch_hedged(val_ids, start_date, end_date, hedge_after, breaker, http_kwargs):
+    """Start the next ID when the running ones have not answered within `hedge_after` seconds.
+
+    The first non-empty series wins. IDs still running at that point count as failures for the
+    breaker; their daemon threads are abandoned and end with the request timeout.
+    """
+    results = queue.Queue()
+    pending = list(val_ids)
+    running = set()
+
+    def attempt(val_id):
+        try:
+            results.put((val_id, _fetch_id_series(val_id, start_date, end_date, **http_kwargs), None))
+        except Exception as exc:
+            results.put((val_id, None, exc))
+
+    def launch():
+        val_id = pending.pop(0)
+        running.add(val_id)
+        threading.Thread(target=attempt, args=(val_id,), daemon=True).start()
+
+    last_error = None
+    errors = []
+    launch()
+    while running:
         try:
-            resp = requests.get(url, timeout=30)
-            resp.raise_for_status()
-            root = ET.fromstring(resp.content)
+            val_id, series, error = results.get(timeout=hedge_after if pending else None)
+        except queue.Empty:
+            launch()
+            continue
+        running.discard(val_id)
+        if error is None:
+            if breaker is not None:
+                breaker.record_success(val_id)
+                for slow_id in running:
+                    breaker.record_failure(slow_id)
+            return series
+        last_error = error
+        errors.append(error)
+        if breaker is not None:
+            breaker.record_failure(val_id)
+        if pending:
+            launch()
+
+    _raise_fetch_error(errors, last_error)
+
+
+def _raise_fetch_error(errors, last_error):
+    # все ID ответили пустым окном — это не сбой, а период без котировок
+    if errors and all(isinstance(e, NoRecordsError) for e in errors):
+        raise NoRecordsError(str(last_error))
+    raise RuntimeError(f"Failed to fetch currency series: {last_error}")
+
+
+def _fetch_currency_series(
+    val_ids,
+    start_date,
+    end_date,
+    session=None,
+    limiter=None,
+    deadline=None,
+    cache=None,
+    hedge_after=None,
+    breaker=None,
+):
+    if breaker is not None:
+        val_ids = breaker.order(val_ids)
+    http_kwargs = {"session": session, "limiter": limiter, "deadline": deadline, "cache": cache}
+    if hedge_after and len(val_ids) > 1:
+        return _fetch_hedged(val_ids, start_date, end_date, hedge_after, breaker, http_kwargs)
+
+    last_error = None
+    errors = []
+    for val_id in val_ids:
+        try:
+            series = _fetch_id_series(val_id, start_date, end_date, **http_kwargs)
         except Exception as e:
             last_error = e
+            errors.append(e)
+            if breaker is not None:
+                breaker.record_failure(val_id)
             continue
+        if breaker is not None:
+            breaker.record_success(val_id)
+        return series
+
+    _raise_fetch_error(errors, last_error)
+
+
+def _run_tasks(tasks, workers, budget):
+    """Run {key: callable} on a thread pool; returns {key: result} in the order of `tasks`."""
+    if workers <= 1:
+        return {key: task() for key, task in tasks.items()}
+
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {key: pool.submit(task) for key, task in tasks.items()}
+        results = {}
+        for key, future in futures.items():
+            try:
+                results[key] = future.result(timeout=budget.remaining())
+            except FutureTimeoutError as exc:
+                raise TimeoutError(f"Overall fetch deadline exceeded while waiting for {key}") from exc
+        return results
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def fetch_all_currencies(
+    start_date,
+    end_date,
+    currencies=None,
+    workers=1,
+    per_host=DEFAULT_PER_HOST,
+    deadline=None,
+    cache=None,
+    hedge_after=None,
+    breaker=None,
+):
+    """Fetch every currency over one pooled session; returns {code: frame} in `currencies` order."""
+    currencies = currencies or CURRENCIES
+    workers = max(1, int(workers))
+    session = http_client.build_session(pool_size=max(workers, per_host))
+    limiter = http_client.HostLimiter(per_host)
+    budget = http_client.Deadline(deadline)
+
+    def task(ids):
+        return lambda: _fetch_currency_series(
+            ids,
+            start_date,
+            end_date,
+            session=session,
+            limiter=limiter,
+            deadline=budget,
+            cache=cache,
+            hedge_after=hedge_after,
+            breaker=breaker,
+        )
+
+    try:
+        return _run_tasks({code: task(ids) for code, ids in currencies.items()}, workers, budget)
+    finally:
+        session.close()
 
-        records = []
-        for record in root.findall("Record"):
-            date_str = record.attrib.get("Date")
-            nominal = float(record.findtext("Nominal").replace(",", "."))
-            value = float(record.findtext("Value").replace(",", "."))
-            rate = value / nominal
-            date = datetime.strptime(date_str, DATE_FMT).date()
-            records.append({"date": date, "rate": rate})
-
-        if not records:
-            last_error = ValueError(f"No records for {val_id}")
-            continue
 
-        df = pd.DataFrame(records)
+def _fetch_daily_snapshot(day, currencies, session=None, limiter=None, deadline=None, cache=None):
+    """Return {code: rate} in force on `day` from CBR XML_daily; codes absent from the payload are skipped."""
+    url = f"{CBR_BASE_URL}/scripts/XML_daily.asp?date_req={day.strftime(DAILY_DATE_FMT)}"
+    content = http_client.fetch_content(
+        url, session=session, limiter=limiter, deadline=deadline, cache=cache, source="cbr_fx"
+    )
+    by_id = cbr_xml.parse_daily(content)
+
+    rates = {}
+    for code, ids in currencies.items():
+        for val_id in ids:
+            if val_id in by_id:
+                rates[code] = by_id[val_id]
+                break
+    return rates
+
+
+def fetch_daily_window(
+    start_date,
+    end_date,
+    currencies=None,
+    workers=1,
+    per_host=DEFAULT_PER_HOST,
+    deadline=None,
+    cache=None,
+    hedge_after=None,
+    breaker=None,
+):
+    """Fetch all currencies with one XML_daily request per day of [start_date, end_date].
+
+    Rows are keyed by the requested day, i.e. they hold the rate in force on that day, which is
+    what the forward-filled XML_dynamic path produces. Currencies none of whose IDs appear in the
+    daily payload fall back to XML_dynamic for the same window.
+    """
+    currencies = currencies or CURRENCIES
+    workers = max(1, int(workers))
+    session = http_client.build_session(pool_size=max(workers, per_host))
+    limiter = http_client.HostLimiter(per_host)
+    budget = http_client.Deadline(deadline)
+    days = [d.date() for d in pd.date_range(start_date, end_date, freq="D")]
+
+    def task(day):
+        return lambda: _fetch_daily_snapshot(
+            day, currencies, session=session, limiter=limiter, deadline=budget, cache=cache
+        )
+
+    try:
+        snapshots = _run_tasks({day: task(day) for day in days}, workers, budget)
+        df = pd.DataFrame(
+            [{"date": day, **rates} for day, rates in snapshots.items()],
+            columns=["date", *currencies],
+        )
         df["date"] = pd.to_datetime(df["date"])
-        df = df.sort_values("date").set_index("date")
 
-        full_idx = pd.date_range(start=start_date, end=end_date, freq="D")
-        df = df.reindex(full_idx)
-        df["rate"] = df["rate"].ffill()
-        return df["rate"].reset_index().rename(columns={"index": "date"})
+        missing = [code for code in currencies if df[code].isna().all()]
+        for code in missing:
+            # Same 7-day lookback as the dynamic path so the window starts with a seed rate.
+            series_df = _fetch_currency_series(
+                currencies[code],
+                start_date - timedelta(days=7),
+                end_date,
+                session=session,
+                limiter=limiter,
+                deadline=budget,
+                cache=cache,
+                hedge_after=hedge_after,
+                breaker=breaker,
+            )
+            df[code] = series_df["rate"].to_numpy()[-len(df):]
+        return df
+    finally:
+        session.close()
+
+
+def _year_chunks(start_date, end_date):
+    """Split [start_date, end_date] into calendar-year chunks."""
+    chunks = []
+    chunk_start = start_date
+    while chunk_start <= end_date:
+        chunk_end = min(chunk_start.replace(month=12, day=31), end_date)
+        chunks.append((chunk_start, chunk_end))
+        chunk_start = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def _checkpoint_path(checkpoint_dir, code, chunk_start, chunk_end):
+    return Path(checkpoint_dir) / f"{code}_{chunk_start.isoformat()}_{chunk_end.isoformat()}.json"
+
+
+def _write_checkpoint(path, series_df):
+    series_df = series_df.dropna(subset=["rate"])
+    payload = {
+        "dates": series_df["date"].dt.strftime("%Y-%m-%d").tolist(),
+        "rates": series_df["rate"].tolist(),
+    }
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(payload), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+_EMPTY_SERIES = pd.DataFrame({"date": pd.to_datetime([]), "rate": pd.Series([], dtype=float)})
+
+
+def _has_rows(path):
+    if not path.exists():
+        return False
+    return bool(json.loads(path.read_text(encoding="utf-8"))["dates"])
+
+
+def _read_checkpoint(path):
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return pd.DataFrame({"date": pd.to_datetime(payload["dates"]), "rate": payload["rates"]})
+
+
+def backfill_currencies(
+    start_date,
+    end_date,
+    currencies=None,
+    workers=DEFAULT_WORKERS,
+    per_host=DEFAULT_PER_HOST,
+    rate=DEFAULT_BACKFILL_RATE,
+    deadline=None,
+    checkpoint_dir=BACKFILL_DIR,
+    cache=None,
+    hedge_after=None,
+    breaker=None,
+):
+    """Fetch the history in year-sized chunks per currency, resuming from on-disk checkpoints.
+
+    Every finished (currency, year) chunk is written to `checkpoint_dir`, so an interrupted or
+    partially failed rebuild only refetches the missing chunks on the next run. The open chunk
+    ending at `end_date` is keyed by that date and is therefore refetched on later days. Returns
+    a wide frame (date + one column per currency) for `normalize_daily_rates`.
+
+    A currency the CBR started quoting later than `start_date` has empty chunks before its first
+    quote: those are checkpointed as empty and its column starts with nulls. An empty chunk after
+    the first quote (or a currency with no quote at all) is still an error.
+    """
+    currencies = currencies or CURRENCIES
+    checkpoint_dir = Path(checkpoint_dir)
+    checkpoint_dir.mkdir(parents=True, exist_ok=True)
+    chunks = _year_chunks(start_date, end_date)
+    session = http_client.build_session(pool_size=max(workers, per_host))
+    limiter = http_client.HostLimiter(per_host, per_second=rate)
+    budget = http_client.Deadline(deadline)
+
+    def fetch_chunk(code, chunk_start, chunk_end):
+        try:
+            series_df = _fetch_currency_series(
+                currencies[code],
+                chunk_start,
+                chunk_end,
+                session=session,
+                limiter=limiter,
+                deadline=budget,
+                cache=cache,
+                hedge_after=hedge_after,
+                breaker=breaker,
+            )
+        except NoRecordsError:
+            return False
+        _write_checkpoint(_checkpoint_path(checkpoint_dir, code, chunk_start, chunk_end), series_df)
+        return True
+
+    pending = [
+        (code, chunk_start, chunk_end)
+        for code in currencies
+        for chunk_start, chunk_end in chunks
+        if not _checkpoint_path(checkpoint_dir, code, chunk_start, chunk_end).exists()
+    ]
+    errors = []
+    empty = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, int(workers))) as pool:
+            futures = {pool.submit(fetch_chunk, *chunk): chunk for chunk in pending}
+            for future, (code, chunk_start, chunk_end) in futures.items():
+                try:
+                    if not future.result():
+                        empty.append((code, chunk_start, chunk_end))
+                except Exception as exc:
+                    errors.append(f"{code} {chunk_start}..{chunk_end}: {exc}")
+    finally:
+        session.close()
+
+    for code, chunk_start, chunk_end in empty:
+        # пустой чанк допустим, только если котировки валюты появляются в более позднем чанке
+        quoted_later = any(
+            s > chunk_start and _has_rows(_checkpoint_path(checkpoint_dir, code, s, e)) for s, e in chunks
+        )
+        if quoted_later and not any(
+            s < chunk_start and _has_rows(_checkpoint_path(checkpoint_dir, code, s, e)) for s, e in chunks
+        ):
+            _write_checkpoint(_checkpoint_path(checkpoint_dir, code, chunk_start, chunk_end), _EMPTY_SERIES)
+        else:
+            errors.append(f"{code} {chunk_start}..{chunk_end}: No records for {', '.join(currencies[code])}")
+    if errors:
+        raise RuntimeError(
+            f"Backfill incomplete, {len(errors)} of {len(pending)} chunks failed "
+            f"(completed chunks are checkpointed in {checkpoint_dir}; rerun to resume):\n" + "\n".join(errors)
+        )
 
-    raise RuntimeError(f"Failed to fetch currency series: {last_error}")
+    frames = {}
+    for code in currencies:
+        parts = [_read_checkpoint(_checkpoint_path(checkpoint_dir, code, s, e)) for s, e in chunks]
+        frames[code] = pd.concat(parts, ignore_index=True)
+
+    # Чекпоинты открытого чанка за прошлые дни больше не нужны.
+    planned = {_checkpoint_path(checkpoint_dir, code, s, e).name for code in currencies for s, e in chunks}
+    for code in currencies:
+        for s, _ in chunks:
+            for stale in checkpoint_dir.glob(f"{code}_{s.isoformat()}_*.json"):
+                if stale.name not in planned:
+                    stale.unlink(missing_ok=True)
+
+    return build_wide_frame(frames)
+
+
+def build_wide_frame(series_by_code):
+    """Align {code: frame with date/rate} into one frame: `date` + one column per code (outer join on date).
+
+    The union of dates is built once and every currency is scattered into one preallocated
+    matrix, instead of an outer merge per currency.
+    """
+    codes = list(series_by_code)
+    parts = []
+    for code in codes:
+        days = series_by_code[code]["date"].to_numpy()
+        rates = series_by_code[code]["rate"].to_numpy(dtype=float)
+        if len(days) > 1 and not (days[1:] > days[:-1]).all():
+            order = np.argsort(days, kind="stable")
+            days, rates = days[order], rates[order]
+            last = np.r_[days[1:] != days[:-1], True]  # при повторе даты берётся последняя запись
+            days, rates = days[last], rates[last]
+        parts.append((days, rates))
+    if not parts:
+        return pd.DataFrame(columns=["date"])
+    dates = np.unique(np.concatenate([days for days, _ in parts]))
+    matrix = np.full((len(dates), len(codes)), np.nan)
+    for j, (days, rates) in enumerate(parts):
+        matrix[np.searchsorted(dates, days), j] = rates
+    wide = pd.DataFrame(matrix, columns=codes)
+    wide.insert(0, "date", dates)
+    return wide
+
+
+def _resolve_source(source, existing_df, today, codes=None):
+    if source != "auto":
+        return source
+    if existing_df is None:
+        return "backfill"
+    gap = (today - existing_df["date"].max().date()).days
+    # XML_daily — запрос на день для всех валют, XML_dynamic — запрос на валюту
+    return "daily" if gap <= max(DAILY_MAX_GAP_DAYS, len(codes or CURRENCIES)) else "dynamic"
+
+
+def _fetch_start(source, existing_df):
+    """First day to request: the whole history for a backfill, else the last stored day minus the overlap."""
+    if existing_df is None or source == "backfill":
+        return START_DATE
+    last_date = existing_df["date"].max().date()
+    return max(START_DATE, last_date - timedelta(days=REFETCH_DAYS))
+
+
+def _with_stored(currencies, existing_df):
+    """Keep the currencies already in fx_daily.json when FX_CURRENCIES overrides the selection."""
+    if existing_df is None or not os.getenv("FX_CURRENCIES", "").strip():
+        return currencies
+    stored = [c for c in existing_df.columns if c != "date"]
+    return {**currency_registry.selected(keep=stored), **currencies}
 
 
 def _load_existing():
     if not OUT_FILE.exists():
         return None
-    data = json.loads(OUT_FILE.read_text(encoding="utf-8"))
-    rows = data.get("series", [])
-    if not rows:
-        return None
-
-    records = []
-    for row in rows:
-        rec = {"date": row.get("date")}
-        rates = row.get("rates", {})
-        rec.update(rates)
-        records.append(rec)
+    if columnar_store.enabled():
+        df = columnar_store.read_fx()
+        if df is not None:
+            return df if not df.empty else None
+    return data_cache.load_fx_daily(OUT_FILE, COLUMNAR_FILE)
 
-    df = pd.DataFrame(records)
-    df["date"] = pd.to_datetime(df["date"])
-    return df
 
+def normalize_daily_rates(df, codes=None, listed=None):
+    """Return one complete calendar row per day with prior CBR rates carried forward.
 
-def normalize_daily_rates(df, codes=None):
-    """Return one complete calendar row per day with prior CBR rates carried forward."""
+    Only a currency with a `listed` date in the registry may have nulls, and only before that
+    date; any other missing rate is an error.
+    """
     codes = list(codes or CURRENCIES.keys())
+    listed = LISTED if listed is None else listed
     if df is None or df.empty:
         raise ValueError("FX daily data is empty")
 
@@ -116,15 +588,22 @@ def normalize_daily_rates(df, codes=None):
     normalized = normalized.reindex(full_idx)
     normalized.index.name = "date"
 
-    for code in codes:
-        if code not in normalized.columns:
-            normalized[code] = pd.NA
-    normalized[codes] = normalized[codes].ffill()
+    # недостающие валюты — пустые колонки, все колонки добавляются разом
+    columns = list(dict.fromkeys([*normalized.columns, *codes]))
+    normalized = normalized.reindex(columns=columns)
+    normalized = pd.concat([normalized.drop(columns=codes), normalized[codes].ffill()], axis=1)[columns]
 
-    missing = normalized[codes].isna().any()
+    # до даты включения в котировки null допустим, после — нет
+    first_day = normalized.index[0]
+    checked_from = np.array([pd.Timestamp(listed.get(code, first_day)) for code in codes], dtype="datetime64[ns]")
+    checked = normalized.index.to_numpy()[:, None] >= checked_from[None, :]
+    missing = pd.Series((normalized[codes].isna().to_numpy() & checked).any(axis=0), index=codes)
     if missing.any():
         missing_codes = ", ".join(missing.index[missing].tolist())
-        raise ValueError(f"Missing seed rate before first calendar day for: {missing_codes}")
+        raise ValueError(
+            f"Missing seed rate before first calendar day for: {missing_codes} "
+            "(a currency first quoted later needs `listed` in data/currencies.json)"
+        )
 
     return normalized.reset_index()
 
@@ -145,60 +624,96 @@ def main():
     args = parse_args()
     DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+    cache = http_cache.default_cache()
+    breaker = http_client.CircuitBreaker(BREAKER_FILE)
+    fx_json.recover(OUT_FILE)
     existing_df = _load_existing()
+    currencies = _with_stored(CURRENCIES, existing_df)
+    new_codes = [c for c in currencies if existing_df is not None and c not in existing_df.columns]
     if args.repair_only:
         if existing_df is None:
             raise FileNotFoundError(f"Missing {OUT_FILE}; nothing to repair")
         df = existing_df
+        source_label = (fx_json.read_meta(OUT_FILE) or {}).get("source", SOURCE_LABELS["dynamic"])
     else:
         today = datetime.now().date()
 
-        if existing_df is None:
-            fetch_start = START_DATE
-        else:
-            last_date = existing_df["date"].max().date()
-            fetch_start = max(START_DATE, last_date - timedelta(days=7))
+        source = _resolve_source(args.source, existing_df, today, currencies)
+        source_label = SOURCE_LABELS[source]
+        if source == "daily" and existing_df is None:
+            raise ValueError("--source daily needs an existing fx_daily.json; use dynamic for a backfill")
 
-        all_rates = []
-        for code, ids in CURRENCIES.items():
-            series_df = _fetch_currency_series(ids, fetch_start, today)
-            series_df = series_df.rename(columns={"rate": code})
-            all_rates.append(series_df)
+        fetch_start = _fetch_start(source, existing_df)
 
-        df = all_rates[0]
-        for other in all_rates[1:]:
-            df = df.merge(other, on="date", how="outer")
+        fetch_kwargs = {
+            "workers": args.workers,
+            "per_host": args.per_host,
+            "deadline": args.deadline,
+            "cache": cache,
+            "hedge_after": args.hedge_after,
+            "breaker": breaker,
+        }
+        try:
+            if new_codes and source != "backfill":
+                # только что включённые валюты: история догружается лишь для их колонок
+                added = backfill_currencies(
+                    START_DATE,
+                    today,
+                    currencies={c: currencies[c] for c in new_codes},
+                    rate=args.backfill_rate,
+                    **fetch_kwargs,
+                )
+                existing_df = existing_df.merge(added, on="date", how="left")
+                print(f"Backfilled new currencies: {', '.join(new_codes)}")
+            if source == "backfill":
+                df = backfill_currencies(fetch_start, today, currencies, rate=args.backfill_rate, **fetch_kwargs)
+                existing_df = None
+            elif source == "daily":
+                df = fetch_daily_window(fetch_start, today, currencies, **fetch_kwargs)
+            else:
+                df = build_wide_frame(fetch_all_currencies(fetch_start, today, currencies, **fetch_kwargs))
+        finally:
+            breaker.save()
 
         if existing_df is not None:
             df = pd.concat([existing_df, df], ignore_index=True)
 
+    codes = list(currencies)
+    # с новыми колонками старые копии неполны: дельта требует полной загрузки
+    previous_rows = fx_json.rows_from_frame(existing_df, codes) if existing_df is not None and not new_codes else None
     df = df[df["date"].dt.date >= START_DATE]
 
-    codes = list(CURRENCIES.keys())
     df = normalize_daily_rates(df, codes)
-    output_rows = []
-    for _, row in df.iterrows():
-        rates = {}
-        for code in codes:
-            val = row.get(code)
-            rates[code] = round(float(val), 6) if pd.notna(val) else None
-        output_rows.append({
-            "date": row["date"].strftime("%Y-%m-%d"),
-            "rates": rates
-        })
+    output_rows = fx_json.rows_from_frame(df, codes)
+    versions = fx_delta.read_versions(VERSIONS_FILE)
+    if not versions or not OUT_FILE.exists() or (
+        versions[-1]["sha256"] != fx_columnar.sha256_bytes(OUT_FILE.read_bytes())
+    ):
+        # журнал версий описывает не тот файл, что лежит на диске: считаем изменёнными все строки
+        previous_rows = None
 
     meta = {
         "base": "RUB",
-        "source": "CBR XML_dynamic",
+        "source": source_label,
         "currencies": codes,
         "start": START_DATE.strftime("%Y-%m-%d"),
         "end": output_rows[-1]["date"] if output_rows else None,
         "updated": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
         "rows": len(output_rows),
+        "version": fx_delta.next_version(versions, fx_delta.read(DELTA_FILE)),
     }
 
-    out = {"meta": meta, "series": output_rows}
-    OUT_FILE.write_text(json.dumps(out, ensure_ascii=False, indent=2), encoding="utf-8")
+    text_sha256 = fx_json.write_tail(OUT_FILE, meta, output_rows)
+    if columnar_store.enabled():
+        # Parquet пишется из тех же строк и помнит хэш JSON: при расхождении читатели берут JSON
+        columnar_store.write_fx(meta, output_rows, source_sha256=text_sha256)
+    delta_start = output_rows[max(0, len(output_rows) - fx_delta.DEFAULT_DAYS)]["date"] if output_rows else None
+    versions = fx_delta.record_version(
+        versions, meta["version"], text_sha256, fx_delta.first_change(previous_rows, output_rows), delta_start
+    )
+    fx_delta.write_versions(VERSIONS_FILE, versions)
+    # колоночный файл, .bin, дельта и агрегаты не коммитятся: они пересобираются из fx_daily.json
+    build_fx_derived.write_all(output_rows, meta, text_sha256, versions, DATA_DIR)
     _update_last_updated({
         "fx_daily": {
             "updated_at": meta["updated"],
@@ -207,6 +722,9 @@ def main():
         }
     })
     print(f"Saved {OUT_FILE} ({len(output_rows)} rows)")
+    if cache is not None:
+        print(cache.summary())
+    print(data_cache.default_cache().summary())
 
 
 if __name__ == "__main__":
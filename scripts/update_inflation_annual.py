@@ -0,0 +1,137 @@
+"""Update data/inflation_ru_full_1991_2024.json (annual Dec/Dec inflation) from Rosstat ipc_mes.xlsx.
+
+Only the series with a sheet in the workbook are written (total, food, nonfood, services, see
+cpi_engine.SHEETS); the other groups stay as they are. `meta.through` is the latest month the
+file's values cover: a year before it is complete, the year of it is complete only through that
+month. A year is written when the workbook covers more of it than the file does, so new years are
+appended and a partial year is replaced once the workbook has the full year. The year of the
+workbook's latest month is written only up to December unless `--partial` is given, and a stored
+value is never replaced from a workbook that covers less of its year. `--regenerate` also rewrites
+the years both cover equally.
+
+Usage: python scripts/update_inflation_annual.py [--regenerate] [--partial]
+"""
+import argparse
+import json
+from pathlib import Path
+
+import cpi_engine
+import http_cache
+import update_macro_monthly
+
+DATA_DIR = Path(__file__).resolve().parents[1] / "data"
+ANNUAL_FILE = DATA_DIR / "inflation_ru_full_1991_2024.json"
+DIGITS = 2
+
+
+def read(path=ANNUAL_FILE):
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def write(path, data):
+    Path(path).write_text(json.dumps(data, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def annual_from_workbook(content):
+    """({series id: {year: inflation}}, "YYYY-MM" of the latest month on the total sheet)."""
+    result = {}
+    through = None
+    for series_id, sheet in cpi_engine.SHEETS.items():
+        years, monthly, official = cpi_engine.read_sheet(content, sheet)
+        result[series_id] = cpi_engine.annual(years, monthly, official)
+        if series_id == "total":
+            computed = cpi_engine.compute(monthly)
+            reported = [i for i, y in enumerate(years) if y in result[series_id]]
+            if reported:
+                last = reported[-1]
+                through = f"{years[last]}-{int(computed['last_month'][last]):02d}"
+    return result, through
+
+
+def months_covered(year, through):
+    """How many months of `year` data through "YYYY-MM" covers; 12 without `through` (a full year)."""
+    if not through:
+        return 12
+    last_year, last_month = (int(part) for part in through.split("-"))
+    if year < last_year:
+        return 12
+    return last_month if year == last_year else 0
+
+
+def update(data, annual, through=None, regenerate=False, partial=False):
+    """Apply `annual` to `data` in place; returns {series id: [years written]}.
+
+    Nothing is written when the file already has a later `meta.through` than the workbook (with
+    `regenerate` only the years the workbook covers as fully as the file are rewritten).
+    """
+    stored = data["meta"].get("through")
+    if stored and through and through < stored and not regenerate:
+        return {}
+
+    changed = {}
+    series_by_id = {s["id"]: s for s in data["series"]}
+    for series_id, values in annual.items():
+        series = series_by_id.get(series_id)
+        if series is None:
+            continue
+        pct = series["inflationPct"]
+        written = []
+        for year, value in sorted(values.items()):
+            key = str(year)
+            covered = months_covered(year, through)
+            if covered < 12 and not partial:
+                continue
+            if key in pct:
+                have = months_covered(year, stored)
+                # меньшее число месяцев не заменяет записанное, равное — только с --regenerate
+                if covered < have or (covered == have and not regenerate):
+                    continue
+            value = round(value, DIGITS)
+            if pct.get(key) != value:
+                pct[key] = value
+                written.append(year)
+        # годы в файле по порядку
+        series["inflationPct"] = dict(sorted(pct.items(), key=lambda item: int(item[0])))
+        if written:
+            changed[series_id] = written
+
+    years = set(data["years"])
+    for written in changed.values():
+        years.update(written)
+    data["years"] = sorted(years)
+    if through and (not stored or through > stored):
+        data["meta"]["through"] = through
+    return changed
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Update inflation_ru_full_1991_2024.json from Rosstat ipc_mes.xlsx")
+    parser.add_argument(
+        "--regenerate",
+        action="store_true",
+        help="Rewrite every year of the workbook series, not only the new and partial ones",
+    )
+    parser.add_argument(
+        "--partial",
+        action="store_true",
+        help="Also write the year of the workbook's latest month before it reaches December",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    content = update_macro_monthly.load_cpi_bytes(cache=http_cache.default_cache())
+    annual, through = annual_from_workbook(content)
+    data = read()
+    changed = update(data, annual, through, regenerate=args.regenerate, partial=args.partial)
+    if not changed:
+        print(f"{ANNUAL_FILE.name}: no changes (workbook through {through})")
+        return
+    write(ANNUAL_FILE, data)
+    summary = ", ".join(f"{sid}: {', '.join(map(str, years))}" for sid, years in changed.items())
+    print(f"Updated {ANNUAL_FILE.name} through {through} ({summary})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,32 @@
 import argparse
+import hashlib
 import json
 import os
 import subprocess
 import shutil
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 
 import pandas as pd
 import requests
 import urllib3
-from io import BytesIO
-from bs4 import BeautifulSoup
+
+import cbr_html
+import columnar_store
+import cpi_engine
+import currency_registry
+import data_cache
+import fx_aggregate
+import fx_binary
+import fx_delta
+import fx_json
+import fx_monthly_state
+import http_cache
+import http_client
+import key_rate_log
+import macro_merge
 
 DATA_REPO_ROOT = Path(__file__).resolve().parent.parent
 DATA_DIR = DATA_REPO_ROOT / "data"
@@ -18,101 +34,151 @@ MACRO_FILE = DATA_DIR / "macro_monthly.json"
 SITE_ROOT = DATA_REPO_ROOT.parent if (DATA_REPO_ROOT.parent / "assets").exists() else None
 MACRO_ASSET_FILE = SITE_ROOT / "assets" / "macro_monthly.json" if SITE_ROOT else None
 FX_DAILY_FILE = DATA_DIR / "fx_daily.json"
+FX_COLUMNAR_FILE = DATA_DIR / "fx_daily_columnar.json"
+FX_BINARY_FILE = DATA_DIR / "fx_daily.bin"
+FX_VERSIONS_FILE = DATA_DIR / "fx_daily_versions.json"
+KEY_RATE_FILE = DATA_DIR / "key_rate_changes.json"
 LAST_UPDATED_FILE = DATA_DIR / "last_updated.json"
 
 START_DATE = datetime(2000, 1, 1)
 
-FX_CODES = ["USD", "EUR", "CNY", "GBP", "CHF", "THB", "IDR", "TRY", "INR"]
+# rate_<code> / rate_<code>_end для валют с "macro": true в data/currencies.json
+FX_CODES = currency_registry.macro_codes()
 
 ROSSTAT_CPI_URL = "https://github.com/solovmm/rosstat/raw/refs/heads/main/ipc_mes.xlsx"
 
-MONTH_TO_NUM = {
-    "январь": 1,
-    "февраль": 2,
-    "март": 3,
-    "апрель": 4,
-    "май": 5,
-    "июнь": 6,
-    "июль": 7,
-    "август": 8,
-    "сентябрь": 9,
-    "октябрь": 10,
-    "ноябрь": 11,
-    "декабрь": 12,
-}
-
-
-def load_fx_daily():
+# секунды на источник: запросы внутри получают такой же Deadline, дольше main источник не ждёт
+SOURCE_TIMEOUTS = {"fx": 600, "key_rate": 120, "cpi": 300}
+
+
+def load_fx_daily(start=None, end=None, source_sha256=None):
+    """Daily FX frame indexed by date, optionally only [start, end].
+
+    A range is read from fx_daily.bin while it was built from the current fx_daily.json
+    (`source_sha256` — its hash, when the caller already has it), else cut from the full frame.
+    """
     if not FX_DAILY_FILE.exists():
         raise FileNotFoundError(f"Missing {FX_DAILY_FILE}. Run update_fx_daily.py first.")
 
-    data = json.loads(FX_DAILY_FILE.read_text(encoding="utf-8"))
-    rows = data.get("series", [])
-    records = []
-    for row in rows:
-        rec = {"date": row.get("date")}
-        rates = row.get("rates", {})
-        for code in FX_CODES:
-            rec[code] = rates.get(code)
-        records.append(rec)
-
-    df = pd.DataFrame(records)
-    df["date"] = pd.to_datetime(df["date"])
+    frame = None
+    if columnar_store.enabled():
+        frame = columnar_store.read_fx(start, end, FX_CODES)
+    if frame is None and (start is not None or end is not None):
+        binary = fx_binary.open_current(FX_BINARY_FILE, FX_DAILY_FILE, source_sha256)
+        if binary is not None:
+            frame = binary.frame(start, end, FX_CODES)
+    if frame is None:
+        frame = data_cache.load_fx_daily(FX_DAILY_FILE, FX_COLUMNAR_FILE)
+    if frame is None:
+        raise ValueError(f"{FX_DAILY_FILE} has no rows")
+    df = pd.DataFrame({"date": frame["date"]})
+    for code in FX_CODES:
+        df[code] = frame[code] if code in frame.columns else None
+
     df = df.sort_values("date").set_index("date")
+    if start is not None or end is not None:
+        df = df.loc[start:end]
     return df
 
 
 def compute_fx_monthly(df_daily):
-    df_daily = df_daily[FX_CODES].copy()
-    df_daily = df_daily.sort_index().asfreq("D").ffill()
-    missing = df_daily[FX_CODES].isna().any()
-    if missing.any():
-        missing_codes = ", ".join(missing.index[missing].tolist())
-        raise ValueError(f"FX daily data has no prior rate for: {missing_codes}")
-    month_index = df_daily.index.to_period("M")
-    monthly_mean = df_daily.groupby(month_index).mean()
-    monthly_end = df_daily.groupby(month_index).last()
-
-    out = pd.DataFrame(index=monthly_mean.index)
+    df_daily = fx_monthly_state.fill_daily(df_daily, FX_CODES)
+    monthly = fx_aggregate.aggregate(df_daily, FX_CODES, freqs=("M",))["M"]
+
+    out = pd.DataFrame(index=monthly.index)
     for code in FX_CODES:
-        out[f"rate_{code.lower()}"] = monthly_mean[code]
-        out[f"rate_{code.lower()}_end"] = monthly_end[code]
+        out[f"rate_{code.lower()}"] = monthly[("mean", code)]
+        out[f"rate_{code.lower()}_end"] = monthly[("end", code)]
     return out
 
 
-def fetch_key_rate_changes():
-    url = (
-        "https://www.cbr.ru/hd_base/KeyRate/?UniDbQuery.Posted=True"
-        f"&UniDbQuery.From={START_DATE.strftime('%d.%m.%Y')}"
-        f"&UniDbQuery.To={datetime.now().strftime('%d.%m.%Y')}"
+def load_fx_monthly(refresh_from=None, full_recompute=False, deadline=None):
+    """Monthly FX averages/ends from the persisted running state; only changed months are recomputed.
+
+    With `full_recompute` the whole history is aggregated as well and must match the state.
+    `deadline` (http_client.Deadline) is checked between the steps; the state is not saved once it
+    has run out.
+    """
+    deadline = deadline or http_client.Deadline()
+    deadline.check()
+    source_sha256 = hashlib.sha256(FX_DAILY_FILE.read_bytes()).hexdigest()
+    version = (fx_json.read_meta(FX_DAILY_FILE) or {}).get("version")
+    state = fx_monthly_state.load(FX_CODES)
+    state, touched = fx_monthly_state.update(
+        state,
+        lambda start: load_fx_daily(start, source_sha256=source_sha256),
+        FX_CODES,
+        source_sha256,
+        version=version,
+        versions=fx_delta.read_versions(FX_VERSIONS_FILE),
+        refresh_from=refresh_from,
     )
-    resp = requests.get(url, timeout=30)
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.content, "html.parser")
-    table = None
-    for t in soup.find_all("table"):
-        if "Дата" in t.get_text() and "Ставка" in t.get_text():
-            table = t
-            break
-    if table is None:
-        raise ValueError("Key rate table not found on CBR page")
-
-    data = []
-    for row in table.find_all("tr")[1:]:
-        cols = row.find_all("td")
-        if len(cols) < 2:
-            continue
-        date = datetime.strptime(cols[0].get_text(strip=True), "%d.%m.%Y")
-        rate = float(cols[1].get_text(strip=True).replace(",", "."))
-        data.append({"date": date, "rate": rate})
-
-    df = pd.DataFrame(data).sort_values("date")
-    df = df.set_index("date")
-
-    full_idx = pd.date_range(start=START_DATE, end=datetime.now(), freq="D")
-    df = df.reindex(full_idx)
-    df["rate"] = df["rate"].ffill()
-    return df
+    fx_monthly = fx_monthly_state.to_frame(state, FX_CODES)
+    if full_recompute:
+        deadline.check()
+        full = compute_fx_monthly(load_fx_daily())
+        if not full.equals(fx_monthly):
+            raise ValueError(f"FX monthly state differs from a full recompute; delete {fx_monthly_state.STATE_FILE}")
+        print("FX monthly state matches a full recompute")
+    # брошенный по таймауту загрузчик не должен переписать состояние после основного потока
+    deadline.check()
+    fx_monthly_state.save(state)
+    print(f"FX monthly: {touched} of {len(fx_monthly)} months recomputed")
+    return fx_monthly
+
+
+def parse_key_rate_table(content):
+    """CBR KeyRate HTML page -> frame with `date` and `rate`, one row per table row."""
+    return pd.DataFrame(list(cbr_html.iter_key_rates(content)), columns=["date", "rate"])
+
+
+def key_rate_windows(start, today):
+    """KeyRate request windows for [start, today] (see http_cache.windows). Past years are one
+    window, so a rebuild does not ask for years before the key rate existed; a current month
+    shorter than the overlap is joined to the previous one, so the last window always has
+    working days on it."""
+    windows = http_cache.windows(start, today)
+    years = [w for w in windows if w[1].year < today.year]
+    windows = ([(years[0][0], years[-1][1])] if years else []) + windows[len(years):]
+    if len(windows) > 1 and (windows[-1][1] - windows[-1][0]).days < key_rate_log.OVERLAP_DAYS:
+        windows[-2:] = [(windows[-2][0], windows[-1][1])]
+    return windows
+
+
+def download_key_rate_changes(cache=None, deadline=None):
+    """KeyRate rows for the window after the stored change log: (log, window start, rows); nothing is written."""
+    log = key_rate_log.read(KEY_RATE_FILE)
+    start = key_rate_log.window_start(log, START_DATE.date())
+    today = datetime.now().date()
+    # окна по границам лет/месяцев, чтобы URL закрытых периодов совпадал между запусками
+    windows = key_rate_windows(start, today) if cache is not None else [(start, today)]
+    frames = []
+    for first, last in windows:
+        url = (
+            "https://www.cbr.ru/hd_base/KeyRate/?UniDbQuery.Posted=True"
+            f"&UniDbQuery.From={first.strftime('%d.%m.%Y')}"
+            f"&UniDbQuery.To={last.strftime('%d.%m.%Y')}"
+        )
+        source = http_cache.window_source("cbr_key_rate", last, key_rate_log.OVERLAP_DAYS)
+        frames.append(parse_key_rate_table(http_client.fetch_content(url, cache=cache, source=source, deadline=deadline)))
+    rows = pd.concat(frames, ignore_index=True)
+    return log, start, rows[rows["date"] >= pd.Timestamp(start)].reset_index(drop=True)
+
+
+def store_key_rate_changes(log, start, fetched):
+    """Merge downloaded rows into the change log, save it and return the daily key rate since START_DATE."""
+    log = key_rate_log.merge(log, fetched, start)
+    key_rate_log.write(KEY_RATE_FILE, log)
+    print(f"Key rate: fetched from {start}, {len(log['changes'])} changes in log")
+
+    if columnar_store.enabled():
+        columnar_store.write_key_rates(key_rate_log.to_frame(log))
+    return key_rate_log.daily(log, START_DATE, datetime.now())
+
+
+def fetch_key_rate_changes(cache=None):
+    """Daily key rate since START_DATE; only the window after the stored change log is downloaded."""
+    return store_key_rate_changes(*download_key_rate_changes(cache=cache))
 
 
 def compute_key_rate_monthly(df_daily):
@@ -123,26 +189,28 @@ def compute_key_rate_monthly(df_daily):
     return monthly_mean, monthly_end
 
 
-def _download_cpi_bytes():
+def _download_cpi_bytes(cache=None, deadline=None):
     url_ext = Path(ROSSTAT_CPI_URL).suffix.lower()
     try:
-        resp = requests.get(ROSSTAT_CPI_URL, timeout=30)
-        resp.raise_for_status()
-        return resp.content, url_ext
+        return http_client.fetch_content(ROSSTAT_CPI_URL, cache=cache, source="rosstat_cpi", deadline=deadline), url_ext
     except requests.RequestException:
         pass
 
     try:
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-        resp = requests.get(ROSSTAT_CPI_URL, timeout=30, verify=False)
-        resp.raise_for_status()
-        return resp.content, url_ext
+        content = http_client.fetch_content(
+            ROSSTAT_CPI_URL, cache=cache, source="rosstat_cpi", deadline=deadline, verify=False
+        )
+        return content, url_ext
     except requests.RequestException:
         pass
 
+    command = ["curl", "-L", "-f", ROSSTAT_CPI_URL]
+    if deadline is not None:
+        command[1:1] = ["--max-time", str(max(1, int(deadline.timeout(http_client.DEFAULT_TIMEOUT * 10))))]
     try:
         result = subprocess.run(
-            ["curl", "-L", "-f", ROSSTAT_CPI_URL],
+            command,
             check=True,
             capture_output=True,
         )
@@ -151,13 +219,8 @@ def _download_cpi_bytes():
         raise RuntimeError("Failed to download CPI file from Rosstat") from exc
 
 
-def _read_cpi_excel(content, ext):
-    if ext != ".xlsx":
-        raise RuntimeError("CPI file must be .xlsx")
-    return pd.read_excel(BytesIO(content), sheet_name="01", header=3, nrows=13, engine="openpyxl")
-
-
-def load_cpi():
+def load_cpi_bytes(cache=None, deadline=None):
+    """Rosstat ipc_mes.xlsx bytes: ROSSTAT_CPI_LOCAL if it exists, otherwise downloaded."""
     local_override = os.getenv("ROSSTAT_CPI_LOCAL")
     local_path = Path(local_override) if local_override else None
 
@@ -167,47 +230,79 @@ def load_cpi():
         content = local_path.read_bytes()
         ext = local_path.suffix.lower()
     else:
-        content, ext = _download_cpi_bytes()
+        content, ext = _download_cpi_bytes(cache=cache, deadline=deadline)
+    if ext != ".xlsx":
+        raise RuntimeError("CPI file must be .xlsx")
+    return content
 
-    df = _read_cpi_excel(content, ext)
-    df = df.rename(columns={"Unnamed: 0": "month"})
-    df["month"] = df["month"].map(MONTH_TO_NUM)
-    df = df.dropna(subset=["month"])
 
-    long_df = df.melt(id_vars=["month"], var_name="year", value_name="cpi_index")
-    long_df = long_df.dropna(subset=["year"])
-    long_df["year"] = long_df["year"].astype(int)
-    long_df["month"] = long_df["month"].astype(int)
-    long_df["cpi_index"] = pd.to_numeric(long_df["cpi_index"], errors="coerce")
+def load_cpi(cache=None, parsed_cache=None, deadline=None):
+    """Monthly CPI (cpi_mom, cpi_yoy, cpi_ytd); parsing is skipped when the xlsx bytes were seen before."""
+    content = load_cpi_bytes(cache=cache, deadline=deadline)
+    return (parsed_cache or data_cache.default_cache()).load_bytes(content, "cpi", parse_cpi)
 
-    long_df["date"] = pd.to_datetime(
-        long_df["year"].astype(str) + "-" + long_df["month"].astype(str).str.zfill(2) + "-01"
-    )
-    long_df = long_df.sort_values("date")
 
-    long_df["cpi_mom"] = long_df["cpi_index"] - 100
+def parse_cpi(content):
+    """Rosstat ipc_mes.xlsx bytes -> monthly cpi_mom / cpi_yoy / cpi_ytd frame indexed by month."""
+    years, monthly, _ = cpi_engine.read_sheet(content, cpi_engine.SHEETS["total"])
+    return cpi_engine.monthly_frame(years, cpi_engine.compute(monthly))
 
-    long_df["cpi_ytd"] = (
-        long_df.groupby("year")["cpi_index"]
-        .apply(lambda s: (s / 100).cumprod() * 100 - 100)
-        .reset_index(level=0, drop=True)
-    )
 
-    long_df["chain_index"] = (long_df["cpi_index"] / 100).cumprod() * 100
-    long_df["cpi_yoy"] = long_df["chain_index"].pct_change(12, fill_method=None) * 100
+def load_macro_base():
+    if not MACRO_FILE.exists():
+        raise FileNotFoundError(f"Missing {MACRO_FILE}")
+    if columnar_store.enabled():
+        macro = columnar_store.read_macro()
+        if macro is not None:
+            return macro
+    return data_cache.load_macro(MACRO_FILE)
+
 
-    long_df = long_df.set_index("date")
-    long_df["month"] = long_df.index.to_period("M")
+def _timed(loader, deadline):
+    started = time.perf_counter()
+    try:
+        return loader(deadline), None, time.perf_counter() - started
+    except Exception as exc:
+        return None, exc, time.perf_counter() - started
+
+
+def load_sources(loaders, timeouts=SOURCE_TIMEOUTS):
+    """Run independent source loaders concurrently; returns {name: (value, error, seconds)}.
+
+    `loaders` maps a source name to a callable taking an http_client.Deadline. A failing source
+    does not stop the others; one still running after its timeout gets a TimeoutError result.
+    Loaders run in daemon threads, so an abandoned one does not hold the process open at exit.
+    """
+    done = {}
+    threads = {}
+    for name, loader in loaders.items():
+        deadline = http_client.Deadline(timeouts.get(name))
+        thread = threading.Thread(
+            target=lambda name=name, loader=loader, deadline=deadline: done.__setitem__(name, _timed(loader, deadline)),
+            name=f"source-{name}",
+            daemon=True,
+        )
+        thread.start()
+        threads[name] = (thread, deadline)
 
-    cpi = long_df.groupby("month").last()[["cpi_mom", "cpi_yoy", "cpi_ytd"]]
-    return cpi
+    results = {}
+    for name, (thread, deadline) in threads.items():
+        remaining = deadline.remaining()
+        thread.join(None if remaining is None else max(0.0, remaining))
+        if name in done:
+            results[name] = done[name]
+        else:
+            error = TimeoutError(f"{name} did not finish within {timeouts[name]} s")
+            results[name] = (None, error, float(timeouts[name]))
+    return results
 
 
-def load_macro_base():
-    if not MACRO_FILE.exists():
-        raise FileNotFoundError(f"Missing {MACRO_FILE}")
-    data = json.loads(MACRO_FILE.read_text(encoding="utf-8"))
-    return data
+def report_sources(results, wall):
+    parts = []
+    for name, (_, error, seconds) in results.items():
+        status = "" if error is None else f" failed: {type(error).__name__}: {error}"
+        parts.append(f"{name} {seconds:.2f}s{status}")
+    print(f"Sources: {', '.join(parts) or 'none'} (wall {wall:.2f}s)")
 
 
 def parse_args():
@@ -223,6 +318,11 @@ def parse_args():
         metavar="YYYY-MM",
         help="Recalculate existing FX average/end fields from this month; other macro fields are preserved",
     )
+    parser.add_argument(
+        "--fx-full-recompute",
+        action="store_true",
+        help="Also aggregate the whole FX history and check it against the incremental monthly state",
+    )
     return parser.parse_args()
 
 
@@ -250,6 +350,16 @@ def main():
     mode = args.mode
     do_rates = mode in {"full", "rates"}
     do_cpi = mode in {"full", "cpi"}
+    cache = http_cache.default_cache()
+
+    refresh_from = None
+    if args.refresh_rates_from:
+        if not do_rates:
+            raise ValueError("--refresh-rates-from requires --mode rates or --mode full")
+        try:
+            refresh_from = pd.Period(args.refresh_rates_from, freq="M")
+        except Exception as exc:
+            raise ValueError("--refresh-rates-from must use YYYY-MM format") from exc
 
     macro = load_macro_base()
     series = macro.get("series", [])
@@ -260,149 +370,61 @@ def main():
     last_month = pd.Period(last_month_str, freq="M")
     current_month = pd.Period(datetime.now(), freq="M")
 
+    # источники независимы и грузятся параллельно; ключевая ставка нужна только для новых
+    # месяцев, поэтому качается заранее, если они возможны, а журнал пишется уже после курсов
+    loaders = {}
+    if do_rates:
+        loaders["fx"] = lambda deadline: load_fx_monthly(refresh_from, args.fx_full_recompute, deadline)
+        if last_month + 1 < current_month:
+            loaders["key_rate"] = lambda deadline: download_key_rate_changes(cache=cache, deadline=deadline)
+    if do_cpi:
+        loaders["cpi"] = lambda deadline: load_cpi(cache=cache, deadline=deadline)
+    started = time.perf_counter()
+    sources = load_sources(loaders)
+    report_sources(sources, time.perf_counter() - started)
+
+    def source(name):
+        value, error, _ = sources[name]
+        if error is not None:
+            raise error
+        return value
+
     fx_monthly = None
     key_mean = None
     key_end = None
-    target_months = []
+    target_months = pd.PeriodIndex([], freq="M")
     if do_rates:
-        fx_daily = load_fx_daily()
-        fx_monthly = compute_fx_monthly(fx_daily)
-        target_months = [m for m in fx_monthly.index if last_month < m < current_month]
-        target_months.sort()
-        if target_months:
-            key_daily = fetch_key_rate_changes()
+        fx_monthly = source("fx")
+        months = fx_monthly.index
+        target_months = months[(months > last_month) & (months < current_month)].sort_values()
+        if len(target_months):
+            key_daily = store_key_rate_changes(*source("key_rate"))
             key_mean, key_end = compute_key_rate_monthly(key_daily)
 
-    cpi = None
-    if do_cpi:
-        cpi = load_cpi()
-
-    rate_fields = []
-    for code in FX_CODES:
-        rate_fields.append(f"rate_{code.lower()}")
-        rate_fields.append(f"rate_{code.lower()}_end")
+    cpi = source("cpi") if do_cpi else None
 
     if do_rates:
         # ensure all rows have new fields
-        for row in series:
-            for field in rate_fields:
-                row.setdefault(field, None)
-            row.setdefault("key_rate", None)
-            row.setdefault("key_rate_end", None)
-            row.setdefault("cpi_mom", None)
-            row.setdefault("cpi_yoy", None)
-            row.setdefault("cpi_ytd", None)
+        macro_merge.ensure_fields(
+            series, macro_merge.rate_fields(FX_CODES) + ["key_rate", "key_rate_end", *macro_merge.CPI_FIELDS]
+        )
 
     new_rows = []
     if do_rates:
-        for month in target_months:
-            if month not in fx_monthly.index:
-                continue
-            if month not in key_mean.index or month not in key_end.index:
-                continue
-
-            fx_row = fx_monthly.loc[month]
-            key_val = key_mean.loc[month]
-            key_val_end = key_end.loc[month]
-
-            if any(pd.isna(v) for v in [key_val, key_val_end]):
-                continue
-
-            cpi_row = cpi.loc[month] if do_cpi and month in cpi.index else None
-            if mode == "full":
-                required = [
-                    key_val,
-                    key_val_end,
-                    cpi_row.get("cpi_mom") if cpi_row is not None else None,
-                    cpi_row.get("cpi_yoy") if cpi_row is not None else None,
-                    cpi_row.get("cpi_ytd") if cpi_row is not None else None,
-                ]
-                if any(pd.isna(v) for v in required):
-                    continue
-
-            row = {
-                "date": month.to_timestamp().strftime("%Y-%m-%d"),
-                "month": str(month),
-                "key_rate": float(key_val),
-                "key_rate_end": float(key_val_end),
-                "cpi_mom": float(cpi_row["cpi_mom"]) if cpi_row is not None and not pd.isna(cpi_row["cpi_mom"]) else None,
-                "cpi_yoy": float(cpi_row["cpi_yoy"]) if cpi_row is not None and not pd.isna(cpi_row["cpi_yoy"]) else None,
-                "cpi_ytd": float(cpi_row["cpi_ytd"]) if cpi_row is not None and not pd.isna(cpi_row["cpi_ytd"]) else None,
-            }
-
-            missing_fx = False
-            for code in FX_CODES:
-                avg_val = fx_row.get(f"rate_{code.lower()}")
-                end_val = fx_row.get(f"rate_{code.lower()}_end")
-                if pd.isna(avg_val) or pd.isna(end_val):
-                    missing_fx = True
-                    break
-                row[f"rate_{code.lower()}"] = float(avg_val)
-                row[f"rate_{code.lower()}_end"] = float(end_val)
-
-            if missing_fx:
-                continue
-
-            new_rows.append(row)
+        new_rows = macro_merge.new_rows(
+            target_months, fx_monthly, key_mean, key_end, cpi, FX_CODES, require_cpi=mode == "full"
+        )
 
+    months = macro_merge.month_index(series)
     refreshed_rate_rows = 0
-    if args.refresh_rates_from:
-        if not do_rates:
-            raise ValueError("--refresh-rates-from requires --mode rates or --mode full")
-        try:
-            refresh_from = pd.Period(args.refresh_rates_from, freq="M")
-        except Exception as exc:
-            raise ValueError("--refresh-rates-from must use YYYY-MM format") from exc
-
-        for row in series:
-            month_str = row.get("month")
-            if not month_str:
-                continue
-            month = pd.Period(month_str, freq="M")
-            if month < refresh_from or month >= current_month or month not in fx_monthly.index:
-                continue
-
-            fx_row = fx_monthly.loc[month]
-            values = {}
-            for code in FX_CODES:
-                avg_field = f"rate_{code.lower()}"
-                end_field = f"rate_{code.lower()}_end"
-                avg_val = fx_row.get(avg_field)
-                end_val = fx_row.get(end_field)
-                if pd.isna(avg_val) or pd.isna(end_val):
-                    raise ValueError(f"Incomplete FX data for {month}: {code}")
-                values[avg_field] = float(avg_val)
-                values[end_field] = float(end_val)
-
-            if any(row.get(field) != value for field, value in values.items()):
-                row.update(values)
-                refreshed_rate_rows += 1
+    if refresh_from is not None:
+        refreshed_rate_rows = macro_merge.refresh_rates(
+            series, months, fx_monthly, FX_CODES, refresh_from, current_month
+        )
 
     updated_cpi_rows = 0
     if do_cpi and cpi is not None:
-        for row in series:
-            month_str = row.get("month")
-            if not month_str:
-                continue
-            try:
-                month = pd.Period(month_str, freq="M")
-            except Exception:
-                continue
-            if month >= current_month:
-                continue
-            if month not in cpi.index:
-                continue
-            cpi_row = cpi.loc[month]
-            required = [cpi_row.get("cpi_mom"), cpi_row.get("cpi_yoy"), cpi_row.get("cpi_ytd")]
-            if any(pd.isna(v) for v in required):
-                continue
-            has_missing = any(pd.isna(row.get(k)) for k in ["cpi_mom", "cpi_yoy", "cpi_ytd"])
-            if not has_missing:
-                continue
-            row["cpi_mom"] = float(cpi_row["cpi_mom"])
-            row["cpi_yoy"] = float(cpi_row["cpi_yoy"])
-            row["cpi_ytd"] = float(cpi_row["cpi_ytd"])
-            updated_cpi_rows += 1
+        updated_cpi_rows = macro_merge.fill_cpi(series, months, cpi, current_month)
 
     if not new_rows and updated_cpi_rows == 0 and refreshed_rate_rows == 0:
         if not MACRO_ASSET_FILE.exists() or MACRO_ASSET_FILE.read_bytes() != MACRO_FILE.read_bytes():
@@ -415,6 +437,9 @@ def main():
             }
         })
         print("No changes to macro_monthly.json.")
+        if cache is not None:
+            print(cache.summary())
+        print(data_cache.default_cache().summary())
         return
 
     if new_rows:
@@ -427,7 +452,10 @@ def main():
     macro["meta"]["rows"] = len(series)
     macro["meta"].setdefault("source", "CBR + Rosstat")
 
-    MACRO_FILE.write_text(json.dumps(macro, ensure_ascii=False, indent=2), encoding="utf-8")
+    text = json.dumps(macro, ensure_ascii=False, indent=2).encode("utf-8")
+    MACRO_FILE.write_bytes(text)
+    if columnar_store.enabled():
+        columnar_store.write_macro(macro, source_sha256=hashlib.sha256(text).hexdigest())
     sync_macro_asset()
     update_last_updated({
         "macro_monthly": {
@@ -441,6 +469,9 @@ def main():
         f"FX refreshed for {refreshed_rate_rows} rows. "
         f"CPI updated for {updated_cpi_rows} rows. Total rows: {len(series)}"
     )
+    if cache is not None:
+        print(cache.summary())
+    print(data_cache.default_cache().summary())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,128 @@
+"""Streaming reader for a block of rows of one xlsx sheet.
+
+The workbook is read straight from the zip: the sheet is located through workbook.xml and its
+relationships, shared strings are collected with `iterparse`, and the sheet XML is streamed row
+by row until `max_row` — styles, other sheets and the rest of the sheet are never parsed. Cells
+are converted as `pd.read_excel(engine="openpyxl")` converts them (whole floats become ints,
+errors become empty), so `read_frame` returns the frame `read_excel(sheet_name, header=..., nrows=...)`
+returns. Date-formatted cells are not recognised (that needs the styles) and come back as serials.
+"""
+import posixpath
+import re
+import zipfile
+from io import BytesIO
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pandas as pd
+
+NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+CELL_REF = re.compile(r"([A-Z]+)(\d+)")
+
+
+def _sheet_path(archive, sheet):
+    workbook = ET.fromstring(archive.read("xl/workbook.xml"))
+    rel_id = None
+    for node in workbook.iter(f"{NS}sheet"):
+        if node.get("name") == sheet:
+            rel_id = node.get(f"{REL_NS}id")
+            break
+    if rel_id is None:
+        raise KeyError(f"Worksheet {sheet} does not exist.")
+    rels = ET.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{PKG_REL_NS}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            return target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+    raise KeyError(f"Worksheet {sheet} has no relationship {rel_id}")
+
+
+def _shared_strings(archive):
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    for _, elem in ET.iterparse(archive.open("xl/sharedStrings.xml"), events=("end",)):
+        if elem.tag == f"{NS}si":
+            # либо один <t>, либо форматированные куски <r><t>; фонетика <rPh> не входит в текст
+            text = elem.findtext(f"{NS}t")
+            if text is None:
+                text = "".join(run.findtext(f"{NS}t") or "" for run in elem.findall(f"{NS}r"))
+            strings.append(text)
+            elem.clear()
+    return strings
+
+
+def _column_index(letters):
+    index = 0
+    for ch in letters:
+        index = index * 26 + ord(ch) - 64
+    return index - 1
+
+
+def _number(text):
+    if "." in text or "E" in text or "e" in text:
+        value = float(text)
+        return int(value) if value.is_integer() else value
+    return int(text)
+
+
+def _cell_value(elem, strings):
+    kind = elem.get("t", "n")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in elem.iter(f"{NS}t"))
+    text = elem.findtext(f"{NS}v")
+    if text is None:
+        return ""
+    if kind == "s":
+        return strings[int(text)]
+    if kind in ("str", "d"):
+        return text
+    if kind == "b":
+        return text == "1"
+    if kind == "e":
+        return ""
+    return _number(text)
+
+
+def read_rows(content, sheet, min_row, max_row):
+    """Cell values of rows `min_row`..`max_row` (1-based, inclusive) with trailing empty cells dropped."""
+    with zipfile.ZipFile(BytesIO(content)) as archive:
+        path = _sheet_path(archive, sheet)
+        strings = _shared_strings(archive)
+        rows = {}
+        next_row = 1
+        for _, elem in ET.iterparse(archive.open(path), events=("end",)):
+            if elem.tag != f"{NS}row":
+                continue
+            number = int(elem.get("r") or next_row)
+            next_row = number + 1
+            if number > max_row:
+                break
+            if number >= min_row:
+                values = []
+                for cell in elem.iter(f"{NS}c"):
+                    ref = CELL_REF.match(cell.get("r") or "")
+                    column = _column_index(ref.group(1)) if ref else len(values)
+                    values.extend([""] * (column - len(values)))
+                    values.append(_cell_value(cell, strings))
+                while values and values[-1] == "":
+                    values.pop()
+                rows[number] = values
+            elem.clear()
+    return [rows.get(n, []) for n in range(min_row, max_row + 1)]
+
+
+def read_frame(content, sheet, header_row, nrows):
+    """Frame of `nrows` rows under the header on `header_row` (1-based), like read_excel(header=header_row - 1)."""
+    rows = read_rows(content, sheet, header_row, header_row + nrows)
+    # как read_excel: пустые строки в конце отбрасываются, внутри остаются строками из NaN
+    while len(rows) > 1 and not rows[-1]:
+        rows.pop()
+    header, data = rows[0], rows[1:]
+    width = max(len(r) for r in rows)
+    header = header + [""] * (width - len(header))
+    columns = [name if name != "" else f"Unnamed: {i}" for i, name in enumerate(header)]
+    data = [[np.nan if v == "" else v for v in r] + [np.nan] * (width - len(r)) for r in data]
+    return pd.DataFrame(data, columns=columns)
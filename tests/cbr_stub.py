@@ -0,0 +1,134 @@
+"""Local stand-in for the CBR XML endpoints used by the FX updater tests."""
+import hashlib
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DATE_FMT = "%d.%m.%Y"
+
+
+def _fmt_number(value):
+    return f"{value:.4f}".replace(".", ",")
+
+
+def dynamic_xml(val_id, start, end, records):
+    lines = [
+        '<?xml version="1.0" encoding="windows-1251"?>',
+        f'<ValCurs ID="{val_id}" DateRange1="{start.strftime(DATE_FMT)}" '
+        f'DateRange2="{end.strftime(DATE_FMT)}" name="Foreign Currency Market Dynamic">',
+    ]
+    for date, nominal, value in records:
+        lines.append(
+            f'<Record Date="{date.strftime(DATE_FMT)}" Id="{val_id}">'
+            f"<Nominal>{nominal}</Nominal><Value>{_fmt_number(value)}</Value>"
+            f"<VunitRate>{_fmt_number(value / nominal)}</VunitRate></Record>"
+        )
+    lines.append("</ValCurs>")
+    return "\n".join(lines).encode("windows-1251")
+
+
+def daily_xml(day, records):
+    """XML_daily payload with the rate in force on `day` for every ID that has one."""
+    valutes = []
+    rate_dates = []
+    for val_id, rows in records.items():
+        known = [r for r in rows if r[0] <= day]
+        if not known:
+            continue
+        date, nominal, value = max(known, key=lambda r: r[0])
+        rate_dates.append(date)
+        valutes.append(
+            f'<Valute ID="{val_id}"><Nominal>{nominal}</Nominal><Value>{_fmt_number(value)}</Value>'
+            f"<VunitRate>{_fmt_number(value / nominal)}</VunitRate></Valute>"
+        )
+    curs_date = max(rate_dates) if rate_dates else day
+    lines = [
+        '<?xml version="1.0" encoding="windows-1251"?>',
+        f'<ValCurs Date="{curs_date.strftime(DATE_FMT)}" name="Foreign Currency Market">',
+        *valutes,
+        "</ValCurs>",
+    ]
+    return "\n".join(lines).encode("windows-1251")
+
+
+class CbrStub:
+    """Serve XML_dynamic/XML_daily from in-memory records: {val_id: [(date, nominal, value), ...]}.
+
+    `daily_ids` restricts which IDs appear in XML_daily, mimicking IDs that are only
+    available through XML_dynamic. Responses carry an ETag and answer If-None-Match with 304;
+    `statuses` records the status of every request.
+    """
+
+    def __init__(self, records, delays=None, failing_ids=(), daily_ids=None):
+        self.records = records
+        self.daily_ids = daily_ids
+        self.delays = delays or {}
+        self.failing_ids = set(failing_ids)
+        self.requests = []
+        self.statuses = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                with stub._lock:
+                    stub.requests.append((parts.path, query))
+                status, body = stub.respond(parts.path, query)
+                etag = f'"{hashlib.sha1(body).hexdigest()[:16]}"'
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    status, body = 304, b""
+                with stub._lock:
+                    stub.statuses.append(status)
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "application/xml; charset=windows-1251")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+    def respond(self, path, query):
+        if path.endswith("/XML_dynamic.asp"):
+            val_id = query.get("VAL_NM_RQ")
+            delay = self.delays.get(val_id)
+            if delay:
+                threading.Event().wait(delay)
+            if val_id in self.failing_ids:
+                return 500, b"error"
+            start = datetime.strptime(query["date_req1"], DATE_FMT).date()
+            end = datetime.strptime(query["date_req2"], DATE_FMT).date()
+            rows = [r for r in self.records.get(val_id, []) if start <= r[0] <= end]
+            return 200, dynamic_xml(val_id, start, end, rows)
+        if path.endswith("/XML_daily.asp"):
+            day = datetime.strptime(query["date_req"], "%d/%m/%Y").date()
+            records = self.records
+            if self.daily_ids is not None:
+                records = {k: v for k, v in records.items() if k in self.daily_ids}
+            return 200, daily_xml(day, records)
+        return 404, b"not found"
@@ -0,0 +1,50 @@
+import gzip
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import brotli
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import build_data_artifacts
+
+
+class BuildDataArtifactsTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.out = Path(tmp.name) / "dist"
+        self.data = Path(tmp.name) / "data"
+        self.data.mkdir()
+        for i, (name, _remote) in enumerate(build_data_artifacts.ARTIFACTS):
+            payload = {"meta": {"name": name, "note": "курсы"}, "series": [{"i": i, "v": j / 7} for j in range(200)]}
+            (self.data / name).write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    def test_compressed_siblings_round_trip_to_minified_json(self):
+        build_data_artifacts.build(self.out, self.data)
+
+        for name, remote_rel in build_data_artifacts.ARTIFACTS:
+            minified = (self.out / remote_rel).read_bytes()
+            original = json.loads((self.data / name).read_text(encoding="utf-8"))
+            self.assertEqual(json.loads(minified), original)
+            self.assertEqual(gzip.decompress((self.out / (remote_rel + ".gz")).read_bytes()), minified)
+            self.assertEqual(brotli.decompress((self.out / (remote_rel + ".br")).read_bytes()), minified)
+
+    def test_rebuild_is_deterministic_and_skips_unchanged_files(self):
+        first = build_data_artifacts.build(self.out, self.data)
+        snapshot = {p: (p.read_bytes(), p.stat().st_mtime_ns) for p in self.out.rglob("*") if p.is_file()}
+
+        second = build_data_artifacts.build(self.out, self.data)
+
+        self.assertTrue(all(r["changed"] for r in first))
+        self.assertFalse(any(r["changed"] for r in second))
+        self.assertEqual(snapshot, {p: (p.read_bytes(), p.stat().st_mtime_ns) for p in self.out.rglob("*") if p.is_file()})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import build_fx_derived
+import fx_binary
+import fx_columnar
+import fx_delta
+
+
+class BuildFxDerivedTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.data = Path(tmp.name)
+        for name in ("fx_daily.json", "fx_daily_versions.json"):
+            shutil.copy(REPO_ROOT / "data" / name, self.data / name)
+
+    def test_derived_files_describe_the_committed_json(self):
+        build_fx_derived.build(self.data)
+        json_path = self.data / "fx_daily.json"
+        sha = fx_columnar.sha256_bytes(json_path.read_bytes())
+        data = json.loads(json_path.read_text(encoding="utf-8"))
+
+        self.assertIsNotNone(fx_columnar.load(self.data / "fx_daily_columnar.json", json_path))
+        self.assertTrue(fx_binary.FxBinary(self.data / "fx_daily.bin").matches(json_path))
+        delta = fx_delta.read(self.data / "fx_daily_delta.json")
+        self.assertEqual(delta["sha256"], sha)
+        self.assertEqual(delta["series"][-1], data["series"][-1])
+        aggregates = json.loads((self.data / "fx_aggregates.json").read_text(encoding="utf-8"))
+        self.assertEqual(aggregates["meta"]["end"], data["meta"]["end"])
+        self.assertEqual(set(aggregates) - {"meta"}, {"W", "M", "Q", "Y"})
+
+    def test_rebuild_is_byte_identical(self):
+        build_fx_derived.build(self.data)
+        first = {name: (self.data / name).read_bytes() for name in build_fx_derived.DERIVED_FILES}
+
+        build_fx_derived.build(self.data)
+
+        self.assertEqual(first, {name: (self.data / name).read_bytes() for name in build_fx_derived.DERIVED_FILES})
+
+
+if __name__ == "__main__":
+    unittest.main()
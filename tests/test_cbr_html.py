@@ -0,0 +1,74 @@
+import json
+import sys
+import unittest
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import cbr_html
+
+FIXTURE = Path(__file__).resolve().parent / "fixtures" / "cbr_key_rate.html"
+
+
+def _legacy_parse(content):
+    soup = BeautifulSoup(content, "html.parser")
+    table = None
+    for t in soup.find_all("table"):
+        if "Дата" in t.get_text() and "Ставка" in t.get_text():
+            table = t
+            break
+    if table is None:
+        raise ValueError("Key rate table not found on CBR page")
+    rows = []
+    for row in table.find_all("tr")[1:]:
+        cols = row.find_all("td")
+        if len(cols) < 2:
+            continue
+        date = datetime.strptime(cols[0].get_text(strip=True), "%d.%m.%Y")
+        rows.append((date, float(cols[1].get_text(strip=True).replace(",", "."))))
+    return rows
+
+
+class KeyRateHtmlTests(unittest.TestCase):
+    def setUp(self):
+        self.content = FIXTURE.read_bytes()
+
+    def test_recorded_page_matches_beautifulsoup_parse(self):
+        rows = list(cbr_html.iter_key_rates(self.content))
+
+        self.assertEqual(rows, _legacy_parse(self.content))
+        self.assertEqual(len(rows), 991)
+        self.assertEqual(rows[0], (datetime(2025, 12, 30), 16.0))
+
+    def test_recorded_page_agrees_with_macro_monthly(self):
+        # помесячные средние из macro_monthly.json считались по живой странице
+        rows = pd.DataFrame(list(cbr_html.iter_key_rates(self.content)), columns=["date", "rate"])
+        means = rows.groupby(rows["date"].dt.strftime("%Y-%m"))["rate"].mean()
+        series = json.loads((REPO_ROOT / "data" / "macro_monthly.json").read_text(encoding="utf-8"))["series"]
+        expected = {row["month"]: row["key_rate"] for row in series if row["month"] in means.index}
+
+        self.assertEqual(len(expected), len(means))
+        for month, value in expected.items():
+            self.assertAlmostEqual(means[month], value, places=9, msg=month)
+
+    def test_output_does_not_depend_on_chunk_boundaries(self):
+        expected = _legacy_parse(self.content)
+        for chunk_size in (1, 7, 4096):
+            self.assertEqual(list(cbr_html.iter_key_rates(self.content, chunk_size=chunk_size)), expected)
+
+    def test_headers_split_across_text_events_and_missing_table(self):
+        page = "<table><tr><td>x</td></tr></table><table><tr><th>Да<b>та</b></th><th>Став&#1082;а</th></tr><tr><td> 01.02.2024 </td><td>16,00</td></tr></table>"
+        self.assertEqual(list(cbr_html.iter_key_rates(page)), _legacy_parse(page))
+
+        with self.assertRaises(ValueError):
+            list(cbr_html.iter_key_rates("<html><table><tr><td>Курс</td></tr></table></html>"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import random
+import sys
+import unittest
+import xml.etree.ElementTree as ET
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import cbr_xml
+from cbr_stub import daily_xml, dynamic_xml
+
+
+def _legacy_parse(content):
+    records = []
+    for record in ET.fromstring(content).findall("Record"):
+        nominal = float(record.findtext("Nominal").replace(",", "."))
+        value = float(record.findtext("Value").replace(",", "."))
+        records.append((datetime.strptime(record.attrib["Date"], "%d.%m.%Y"), value / nominal))
+    return records
+
+
+class CbrXmlParserTests(unittest.TestCase):
+    def test_dynamic_parser_matches_record_by_record_parse(self):
+        rng = random.Random(7)
+        start = date(2000, 1, 1)
+        rows = [
+            (start + timedelta(days=i), rng.choice([1, 10, 100, 10000]), rng.randint(1, 9_999_999) / 10_000)
+            for i in range(3000)
+        ]
+        content = dynamic_xml("R01235", start, rows[-1][0], rows)
+
+        dates, rates = cbr_xml.parse_dynamic(content)
+        legacy = _legacy_parse(content)
+
+        self.assertEqual(dates.tolist(), [pd.Timestamp(d) for d, _ in legacy])
+        self.assertEqual(rates.tolist(), [rate for _, rate in legacy])
+
+    def test_dynamic_parser_handles_empty_payload(self):
+        content = dynamic_xml("R01700", date(2026, 2, 1), date(2026, 2, 10), [])
+
+        dates, rates = cbr_xml.parse_dynamic(content)
+
+        self.assertEqual(len(dates), 0)
+        self.assertEqual(len(rates), 0)
+
+    def test_daily_parser_returns_rate_per_unit_by_id(self):
+        day = date(2026, 2, 10)
+        content = daily_xml(day, {"R01235": [(day, 1, 80.5)], "R01675": [(day, 10, 25.1234)]})
+
+        rates = cbr_xml.parse_daily(content)
+
+        self.assertEqual(rates, {"R01235": 80.5, "R01675": 25.1234 / 10})
+
+
+if __name__ == "__main__":
+    unittest.main()
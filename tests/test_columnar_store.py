@@ -0,0 +1,79 @@
+import hashlib
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import columnar_store
+
+
+@unittest.skipUnless(columnar_store.available(), "pyarrow is not installed")
+class ColumnarStoreTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.store = self.root / "store"
+        self.fx_raw = (REPO_ROOT / "data" / "fx_daily.json").read_bytes()
+        self.macro_raw = (REPO_ROOT / "data" / "macro_monthly.json").read_bytes()
+        self.fx_json = self.root / "fx_daily.json"
+        self.fx_json.write_bytes(self.fx_raw)
+        fx = json.loads(self.fx_raw)
+        columnar_store.write_fx(fx["meta"], fx["series"], self.store, hashlib.sha256(self.fx_raw).hexdigest())
+        columnar_store.write_macro(json.loads(self.macro_raw), self.store, hashlib.sha256(self.macro_raw).hexdigest())
+
+    def test_json_exports_are_byte_identical(self):
+        self.fx_json.unlink()
+        columnar_store.export_fx_json(self.fx_json, self.store)
+        columnar_store.export_macro_json(self.root / "macro_monthly.json", self.store)
+
+        self.assertEqual((self.root / "fx_daily.json").read_bytes(), self.fx_raw)
+        self.assertEqual((self.root / "macro_monthly.json").read_bytes(), self.macro_raw)
+
+    def test_fx_read_projects_columns_and_filters_dates(self):
+        df = columnar_store.read_fx("2024-03-01", "2024-03-31", ["USD", "EUR"], self.store, self.fx_json)
+
+        self.assertEqual(list(df.columns), ["date", "USD", "EUR"])
+        self.assertEqual(len(df), 31)
+        self.assertEqual(df["date"].iloc[0], pd.Timestamp("2024-03-01"))
+        self.assertGreater(columnar_store.pq.ParquetFile(self.store / "fx_daily.parquet").num_row_groups, 20)
+
+    def test_macro_read_keeps_row_key_order(self):
+        payload = columnar_store.read_macro(["key_rate"], "2026-01", self.store, REPO_ROOT / "data" / "macro_monthly.json")
+
+        self.assertTrue(all(row["month"] >= "2026-01" for row in payload["series"]))
+        self.assertEqual(list(payload["series"][0]), ["month", "key_rate"])
+
+    def test_store_is_skipped_when_json_changed(self):
+        self.assertIsNotNone(columnar_store.read_fx(store_dir=self.store, json_path=self.fx_json))
+
+        self.fx_json.write_bytes(self.fx_raw + b"\n")
+
+        self.assertIsNone(columnar_store.read_fx(store_dir=self.store, json_path=self.fx_json))
+        macro_json = self.root / "macro_monthly.json"
+        macro_json.write_bytes(self.macro_raw.replace(b'"rows"', b'"rows" ', 1))
+        self.assertIsNone(columnar_store.read_macro(store_dir=self.store, json_path=macro_json))
+
+    def test_store_without_source_hash_is_not_trusted(self):
+        fx = json.loads(self.fx_raw)
+        columnar_store.write_fx(fx["meta"], fx["series"], self.store)
+
+        self.assertIsNone(columnar_store.read_fx(store_dir=self.store, json_path=self.fx_json))
+
+    def test_key_rate_changes_round_trip(self):
+        changes = pd.DataFrame({"date": pd.to_datetime(["2024-07-29", "2024-10-28"]), "rate": [18.0, 21.0]})
+
+        columnar_store.write_key_rates(changes, self.store)
+
+        pd.testing.assert_frame_equal(columnar_store.read_key_rates(self.store), changes)
+
+
+if __name__ == "__main__":
+    unittest.main()
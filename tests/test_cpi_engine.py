@@ -0,0 +1,216 @@
+import copy
+import sys
+import unittest
+from io import BytesIO
+from pathlib import Path
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import cpi_engine
+import update_inflation_annual
+import update_macro_monthly
+
+ROSSTAT_FILE = REPO_ROOT / "data" / "rosstat_ipc_mes.xlsx"
+
+
+def _legacy_cpi(years, monthly):
+    """The groupby/cumprod computation load_cpi used before the engine."""
+    long_df = pd.DataFrame({
+        "year": np.repeat(years, 12),
+        "month": np.tile(np.arange(1, 13), len(years)),
+        "cpi_index": np.asarray(monthly, dtype=float).ravel(),
+    })
+    long_df["date"] = pd.to_datetime(
+        long_df["year"].astype(str) + "-" + long_df["month"].astype(str).str.zfill(2) + "-01"
+    )
+    long_df = long_df.sort_values("date")
+    long_df["cpi_mom"] = long_df["cpi_index"] - 100
+    long_df["cpi_ytd"] = (
+        long_df.groupby("year")["cpi_index"]
+        .apply(lambda s: (s / 100).cumprod() * 100 - 100)
+        .reset_index(level=0, drop=True)
+    )
+    long_df["chain_index"] = (long_df["cpi_index"] / 100).cumprod() * 100
+    long_df["cpi_yoy"] = long_df["chain_index"].pct_change(12, fill_method=None) * 100
+    long_df = long_df.set_index("date")
+    long_df["month"] = long_df.index.to_period("M")
+    return long_df.groupby("month").last()[["cpi_mom", "cpi_yoy", "cpi_ytd"]]
+
+
+def _workbook():
+    wb = openpyxl.Workbook()
+    wb.active.title = "Содержание"
+    for sheet, shift in (("01", 0.0), ("02", 0.1), ("03", -0.1), ("04", 0.2)):
+        ws = wb.create_sheet(sheet)
+        ws["A1"] = "Индексы потребительских цен"
+        ws.append([])
+        ws.append([])
+        ws.append([None, 2023, 2024, 2025])
+        ws.append(["к концу предыдущего месяца"])
+        for i, month in enumerate(cpi_engine.MONTHS):
+            ws.append([month, 100.5 + shift, 100.7 + shift, 100.9 + shift if i < 5 else None])
+        ws.append(["к декабрю предыдущего года"])
+        ws.append(["декабрь", 106.2 + shift, 108.8 + shift, "104,562)"])
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+class CpiEngineTests(unittest.TestCase):
+    def test_matches_legacy_computation(self):
+        rng = np.random.default_rng(7)
+        years = np.arange(2019, 2026)
+        monthly = np.round(100 + rng.normal(0.5, 0.4, (len(years), 12)), 2)
+        monthly[-1, 7:] = np.nan
+
+        result = cpi_engine.compute(monthly)
+        pd.testing.assert_frame_equal(cpi_engine.monthly_frame(years, result), _legacy_cpi(years, monthly))
+        self.assertEqual(result["last_month"].tolist(), [12] * 6 + [7])
+        np.testing.assert_allclose(result["dec_dec"], result["ytd"][np.arange(len(years)), result["last_month"] - 1])
+
+    def test_read_sheet_parses_footnoted_partial_year(self):
+        years, monthly, official = cpi_engine.read_sheet(_workbook(), "01")
+
+        self.assertEqual(years.tolist(), [2023, 2024, 2025])
+        self.assertEqual(monthly.shape, (3, 12))
+        self.assertTrue(np.isnan(monthly[2, 5:]).all())
+        np.testing.assert_allclose(official, [106.2, 108.8, 104.56])
+        annual = cpi_engine.annual(years, monthly, official)
+        self.assertAlmostEqual(annual[2025], 4.56)
+
+    def test_unexpected_layout_raises(self):
+        wb = openpyxl.load_workbook(BytesIO(_workbook()))
+        wb["02"]["A7"] = "март"
+        out = BytesIO()
+        wb.save(out)
+        with self.assertRaises(ValueError):
+            cpi_engine.read_sheet(out.getvalue(), "02")
+
+    @unittest.skipUnless(ROSSTAT_FILE.exists(), "no local Rosstat workbook")
+    def test_rosstat_monthly_cpi_unchanged(self):
+        content = ROSSTAT_FILE.read_bytes()
+        frame = pd.read_excel(BytesIO(content), sheet_name="01", header=3, nrows=13, engine="openpyxl")
+        frame = frame[frame["Unnamed: 0"].isin(cpi_engine.MONTHS)]
+        years = np.array([int(c) for c in frame.columns[1:]])
+        monthly = frame.iloc[:, 1:].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=float).T
+
+        pd.testing.assert_frame_equal(update_macro_monthly.parse_cpi(content), _legacy_cpi(years, monthly))
+
+    @unittest.skipUnless(ROSSTAT_FILE.exists(), "no local Rosstat workbook")
+    def test_rosstat_annual_matches_existing_figures(self):
+        annual, through = update_inflation_annual.annual_from_workbook(ROSSTAT_FILE.read_bytes())
+        existing = {s["id"]: s["inflationPct"] for s in update_inflation_annual.read()["series"]}
+
+        self.assertRegex(through, r"^\d{4}-\d{2}$")
+        for series_id, values in annual.items():
+            for year in range(1991, 2025):
+                # в файле часть лет округлена до десятых
+                self.assertAlmostEqual(values[year], existing[series_id][str(year)], delta=0.05 + 1e-9, msg=(series_id, year))
+
+        content = ROSSTAT_FILE.read_bytes()
+        for series_id, sheet in cpi_engine.SHEETS.items():
+            years, monthly, _ = cpi_engine.read_sheet(content, sheet)
+            chained = cpi_engine.compute(monthly)["dec_dec"]
+            for year, value in zip(years, chained):
+                if year <= 2024:
+                    # цепочка из округлённых месячных индексов расходится с официальной на доли процента
+                    self.assertAlmostEqual(value, existing[series_id][str(year)], delta=0.25, msg=(series_id, year))
+
+
+class UpdateAnnualTests(unittest.TestCase):
+    def _data(self):
+        return {
+            "meta": {"title": "ИПЦ"},
+            "years": [2023, 2024],
+            "series": [
+                {"id": "total", "inflationPct": {"2023": 6.2, "2024": 1.5}},
+                {"id": "alcohol", "inflationPct": {"2023": 3.0, "2024": 4.0}},
+            ],
+        }
+
+    def test_appends_complete_years_only(self):
+        data = self._data()
+        annual = {"total": {2023: 6.21, 2024: 8.8, 2025: 4.5612}}
+
+        self.assertEqual(update_inflation_annual.update(data, annual, "2025-05"), {})
+        self.assertEqual(data["series"][0]["inflationPct"], {"2023": 6.2, "2024": 1.5})
+        self.assertEqual(data["years"], [2023, 2024])
+
+        annual = {"total": {2024: 8.8, 2025: 5.591, 2026: 0.7}}
+        changed = update_inflation_annual.update(data, annual, "2026-01")
+
+        self.assertEqual(changed, {"total": [2025]})
+        self.assertEqual(data["series"][0]["inflationPct"], {"2023": 6.2, "2024": 1.5, "2025": 5.59})
+        self.assertEqual(data["series"][1]["inflationPct"], {"2023": 3.0, "2024": 4.0})
+        self.assertEqual(data["years"], [2023, 2024, 2025])
+        self.assertEqual(data["meta"]["through"], "2026-01")
+
+        again = copy.deepcopy(data)
+        self.assertEqual(update_inflation_annual.update(again, annual, "2026-01"), {})
+        self.assertEqual(again, data)
+
+    def test_partial_year_is_replaced_once_complete(self):
+        data = self._data()
+        data["meta"]["through"] = "2024-12"
+
+        changed = update_inflation_annual.update(data, {"total": {2025: 3.561}}, "2025-05", partial=True)
+        self.assertEqual(changed, {"total": [2025]})
+        self.assertEqual(data["series"][0]["inflationPct"]["2025"], 3.56)
+
+        self.assertEqual(update_inflation_annual.update(data, {"total": {2025: 4.1}}, "2025-08"), {})
+        changed = update_inflation_annual.update(data, {"total": {2025: 5.59}}, "2025-12")
+        self.assertEqual(changed, {"total": [2025]})
+        self.assertEqual(data["series"][0]["inflationPct"]["2025"], 5.59)
+        self.assertEqual(data["meta"]["through"], "2025-12")
+
+    def test_regenerate_rewrites_all_years(self):
+        data = self._data()
+        changed = update_inflation_annual.update(data, {"total": {2023: 6.21, 2024: 1.5}}, "2024-12", regenerate=True)
+
+        self.assertEqual(changed, {"total": [2023]})
+        self.assertEqual(data["series"][0]["inflationPct"]["2023"], 6.21)
+
+    def test_older_workbook_is_ignored(self):
+        data = self._data()
+        data["meta"]["through"] = "2025-08"
+        before = copy.deepcopy(data)
+
+        self.assertEqual(update_inflation_annual.update(data, {"total": {2025: 3.56}}, "2025-05"), {})
+        self.assertEqual(data, before)
+
+        # даже с --regenerate --partial книга с меньшим числом месяцев значение не заменяет
+        data["series"][0]["inflationPct"]["2025"] = 4.1
+        before = copy.deepcopy(data)
+        changed = update_inflation_annual.update(data, {"total": {2024: 1.5, 2025: 3.56}}, "2025-05", regenerate=True, partial=True)
+        self.assertEqual(changed, {})
+        self.assertEqual(data, before)
+
+    @unittest.skipUnless(ROSSTAT_FILE.exists(), "no local Rosstat workbook")
+    def test_committed_workbook_keeps_full_year_values(self):
+        annual, through = update_inflation_annual.annual_from_workbook(ROSSTAT_FILE.read_bytes())
+        data = update_inflation_annual.read()
+        before = copy.deepcopy(data)
+
+        self.assertEqual(update_inflation_annual.update(copy.deepcopy(data), annual, through), {})
+        update_inflation_annual.update(data, annual, through, regenerate=True, partial=True)
+        for series, old in zip(data["series"], before["series"]):
+            self.assertEqual(series["inflationPct"]["2025"], old["inflationPct"]["2025"], msg=series["id"])
+        self.assertEqual(data["meta"]["through"], before["meta"]["through"])
+
+    def test_workbook_series_update_file(self):
+        annual, through = update_inflation_annual.annual_from_workbook(_workbook())
+        data = self._data()
+        update_inflation_annual.update(data, annual, through, partial=True)
+
+        self.assertEqual(through, "2025-05")
+        self.assertEqual(data["series"][0]["inflationPct"], {"2023": 6.2, "2024": 1.5, "2025": 4.56})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,68 @@
+import sys
+import unittest
+from datetime import date
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import cbr_xml
+import currency_registry
+import update_macro_monthly
+
+
+VAL_FULL = """<?xml version="1.0" encoding="windows-1251"?>
+<Valuta name="Foreign Currency Market Lib">
+<Item ID="R01235"><Name>Доллар США</Name><EngName>US Dollar</EngName><Nominal>1</Nominal>
+<ParentCode>R01235    </ParentCode><ISO_Num_Code>840</ISO_Num_Code><ISO_Char_Code>USD</ISO_Char_Code></Item>
+<Item ID="R01236"><Name>Доллар США (старый)</Name><EngName>US Dollar</EngName><Nominal>1</Nominal>
+<ParentCode>R01235    </ParentCode><ISO_Num_Code></ISO_Num_Code><ISO_Char_Code></ISO_Char_Code></Item>
+<Item ID="R01080"><Name>Бахрейнский динар</Name><EngName>Bahraini Dinar</EngName><Nominal>1</Nominal>
+<ParentCode>R01080    </ParentCode><ISO_Num_Code>48</ISO_Num_Code><ISO_Char_Code>BHD</ISO_Char_Code></Item>
+</Valuta>""".encode("cp1251")
+
+
+class CurrencyRegistryTests(unittest.TestCase):
+    def setUp(self):
+        self.entries = currency_registry.load()
+
+    def test_registry_keeps_the_published_currencies_first(self):
+        enabled = currency_registry.selected(self.entries, override="")
+
+        self.assertEqual(list(enabled), ["USD", "EUR", "CNY", "GBP", "CHF", "THB", "IDR", "TRY", "INR"])
+        self.assertEqual(enabled["TRY"], ["R01700", "R01700J"])
+        self.assertEqual(update_macro_monthly.FX_CODES, list(enabled))
+        self.assertEqual(len({e["code"] for e in self.entries}), len(self.entries))
+
+    def test_override_selects_all_or_listed_currencies(self):
+        self.assertEqual(len(currency_registry.selected(self.entries, override="all")), len(self.entries))
+        self.assertEqual(list(currency_registry.selected(self.entries, override="jpy, usd")), ["USD", "JPY"])
+        with self.assertRaises(ValueError):
+            currency_registry.selected(self.entries, override="USD,XXX")
+
+    def test_override_keeps_stored_currencies(self):
+        selected = currency_registry.selected(self.entries, override="JPY", keep=["USD", "EUR"])
+
+        self.assertEqual(list(selected), ["USD", "EUR", "JPY"])
+        self.assertEqual(list(currency_registry.selected(self.entries, override="", keep=["JPY"]))[-1], "INR")
+
+    def test_listing_dates_are_after_2000(self):
+        listed = currency_registry.listed(self.entries)
+
+        self.assertEqual(listed["BYN"], date(2016, 7, 1))
+        self.assertNotIn("USD", listed)
+        self.assertTrue(all(day > date(2000, 1, 1) for day in listed.values()))
+
+    def test_sync_adds_new_currencies_disabled(self):
+        entries = [{"code": "USD", "ids": ["R01235"], "name": "Доллар США", "enabled": True, "macro": True}]
+
+        added = currency_registry.sync(entries, cbr_xml.parse_val_full(VAL_FULL))
+
+        self.assertEqual(added, ["BHD"])
+        self.assertEqual(entries[0]["ids"], ["R01235"])
+        self.assertEqual(entries[1], {"code": "BHD", "ids": ["R01080"], "name": "Бахрейнский динар", "enabled": False, "macro": False})
+
+
+if __name__ == "__main__":
+    unittest.main()
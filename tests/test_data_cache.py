@@ -0,0 +1,65 @@
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import data_cache
+
+
+class ParsedCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.json_path = self.root / "fx_daily.json"
+        shutil.copy(REPO_ROOT / "data" / "fx_daily.json", self.json_path)
+
+    def _cache(self):
+        return data_cache.ParsedCache(self.root / "parsed")
+
+    def test_second_process_reads_pickle_instead_of_json(self):
+        expected = data_cache.load_fx_daily(self.json_path, cache=self._cache())
+
+        cache = self._cache()
+        with mock.patch.object(data_cache, "parse_fx_daily", side_effect=AssertionError("parsed again")):
+            frame = data_cache.load_fx_daily(self.json_path, cache=cache)
+            again = data_cache.load_fx_daily(self.json_path, cache=cache)
+
+        pd.testing.assert_frame_equal(frame, expected)
+        pd.testing.assert_frame_equal(again, expected)
+        self.assertEqual(cache.stats, {"memory": 1, "disk": 1, "parsed": 0})
+
+    def test_changed_file_is_reparsed(self):
+        cache = self._cache()
+        first = data_cache.load_fx_daily(self.json_path, cache=cache)
+        data = json.loads(self.json_path.read_text(encoding="utf-8"))
+        data["series"] = data["series"][:10]
+        self.json_path.write_text(json.dumps(data), encoding="utf-8")
+
+        second = data_cache.load_fx_daily(self.json_path, cache=cache)
+
+        self.assertEqual(len(second), 10)
+        self.assertGreater(len(first), 10)
+        self.assertEqual(cache.stats["parsed"], 2)
+
+    def test_callers_get_independent_copies(self):
+        macro = self.root / "macro.json"
+        macro.write_text(json.dumps({"series": [{"month": "2024-01"}]}), encoding="utf-8")
+        cache = self._cache()
+
+        data_cache.load_macro(macro, cache=cache)["series"].append({"month": "2024-02"})
+
+        self.assertEqual(data_cache.load_macro(macro, cache=cache)["series"], [{"month": "2024-01"}])
+
+
+if __name__ == "__main__":
+    unittest.main()
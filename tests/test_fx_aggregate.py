@@ -0,0 +1,53 @@
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import fx_aggregate
+
+
+class FxAggregateTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        index = pd.date_range("2019-12-25", "2024-02-10", freq="D")
+        values = np.cumsum(rng.normal(0, 0.37, (len(index), 3)), axis=0) + [70.0, 0.0041, 1.1]
+        values[100:104, 1] = np.nan
+        self.daily = pd.DataFrame(values, index=index, columns=["USD", "IDR", "TRY"])
+
+    def test_every_frequency_matches_pandas_groupby(self):
+        result = fx_aggregate.aggregate(self.daily, ["USD", "IDR", "TRY"])
+
+        for freq, rule in fx_aggregate.FREQS.items():
+            grouped = self.daily.groupby(self.daily.index.to_period(rule))
+            expected = {
+                "mean": grouped.mean(),
+                "min": grouped.min(),
+                "max": grouped.max(),
+                "first": grouped.nth(0).set_axis(grouped.mean().index),
+                "end": grouped.nth(-1).set_axis(grouped.mean().index),
+            }
+            frame = result[freq]
+            self.assertTrue(frame.index.equals(expected["mean"].index), freq)
+            for stat, table in expected.items():
+                for code in ("USD", "TRY"):
+                    np.testing.assert_array_equal(frame[(stat, code)].to_numpy(), table[code].to_numpy(), f"{freq} {stat}")
+            np.testing.assert_array_equal(frame[("mean", "IDR")].to_numpy(), expected["mean"]["IDR"].to_numpy())
+
+    def test_payload_is_columnar_per_frequency(self):
+        result = fx_aggregate.aggregate(self.daily[["USD"]], ["USD"], freqs=("Y",))
+
+        payload = fx_aggregate.build_payload(result, {"end": "2024-02-10"})
+
+        self.assertEqual(payload["Y"]["periods"], ["2019", "2020", "2021", "2022", "2023", "2024"])
+        self.assertEqual(set(payload["Y"]["rates"]["USD"]), set(fx_aggregate.STATS))
+        self.assertEqual(len(payload["Y"]["rates"]["USD"]["mean"]), 6)
+
+
+if __name__ == "__main__":
+    unittest.main()
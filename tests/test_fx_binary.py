@@ -0,0 +1,87 @@
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import data_cache
+import fx_binary
+import fx_columnar
+
+
+class FxBinaryTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "fx_daily.bin"
+        self.series = [
+            {"date": "2024-02-28", "rates": {"USD": 91.5, "EUR": 99.1}},
+            {"date": "2024-02-29", "rates": {"USD": 91.6, "EUR": None}},
+            {"date": "2024-03-01", "rates": {"USD": 91.7, "EUR": 99.3}},
+        ]
+        fx_binary.write(self.path, self.series, {"currencies": ["USD", "EUR"]}, "abc")
+
+    def test_matrix_starts_on_aligned_offset(self):
+        raw = self.path.read_bytes()
+        header_len = int.from_bytes(raw[4:8], "little")
+
+        self.assertEqual(raw[:4], fx_binary.MAGIC)
+        self.assertEqual((8 + header_len) % 8, 0)
+        self.assertEqual(len(raw) - 8 - header_len, 3 * 2 * 8)
+
+    def test_rate_lookup_by_day_offset(self):
+        fx = fx_binary.FxBinary(self.path)
+
+        self.assertEqual(fx.rate("USD", "2024-03-01"), 91.7)
+        self.assertEqual(fx.rate("EUR", pd.Timestamp("2024-02-28")), 99.1)
+        self.assertIsNone(fx.rate("EUR", "2024-02-29"))
+        with self.assertRaises(KeyError):
+            fx.rate("USD", "2024-03-02")
+
+    def test_slice_is_clipped_to_stored_range(self):
+        fx = fx_binary.FxBinary(self.path)
+
+        dates, values = fx.slice("2024-02-01", "2024-02-29", codes=["USD"])
+
+        self.assertEqual([d.strftime("%Y-%m-%d") for d in dates], ["2024-02-28", "2024-02-29"])
+        np.testing.assert_array_equal(values, [[91.5], [91.6]])
+
+    def test_built_from_repository_json(self):
+        raw = (REPO_ROOT / "data" / "fx_daily.json").read_bytes()
+        data = json.loads(raw)
+        fx_binary.write(self.path, data["series"], data["meta"], fx_columnar.sha256_bytes(raw))
+        fx = fx_binary.FxBinary(self.path)
+        last = data["series"][-1]
+
+        self.assertTrue(fx.matches(REPO_ROOT / "data" / "fx_daily.json"))
+        self.assertEqual(fx.rate("USD", last["date"]), last["rates"]["USD"])
+
+    def test_range_frame_and_current_check(self):
+        json_path = self.path.with_name("fx_daily.json")
+        raw = (REPO_ROOT / "data" / "fx_daily.json").read_bytes()
+        json_path.write_bytes(raw)
+        data = json.loads(raw)
+        fx_binary.write(self.path, data["series"], data["meta"], fx_columnar.sha256_bytes(raw))
+
+        fx = fx_binary.open_current(self.path, json_path)
+        frame = fx.frame("2024-02-20", "2024-03-05", ["USD", "XXX"])
+        full = data_cache.parse_fx_daily(raw)
+        expected = full[(full["date"] >= "2024-02-20") & (full["date"] <= "2024-03-05")].reset_index(drop=True)
+        pd.testing.assert_series_equal(frame["USD"], expected["USD"])
+        self.assertEqual(frame["date"].tolist(), expected["date"].tolist())
+        self.assertTrue(frame["XXX"].isna().all())
+
+        json_path.write_bytes(raw + b"\n")
+        self.assertIsNone(fx_binary.open_current(self.path, json_path))
+        self.assertIsNone(fx_binary.open_current(self.path.with_name("missing.bin"), json_path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
+import os
 import sys
 import unittest
 import json
+from unittest import mock
 from pathlib import Path
 
 import pandas as pd
@@ -21,9 +23,11 @@ class DailyFxCalendarTests(unittest.TestCase):
         expected_dates = pd.date_range(dates.min(), dates.max(), freq="D")
 
         self.assertEqual(dates.tolist(), expected_dates.tolist())
+        listed = {code: update_fx_daily.LISTED.get(code, dates[0].date()).isoformat() for code in payload["meta"]["currencies"]}
         for row in rows:
-            for code in update_fx_daily.CURRENCIES:
-                self.assertIsNotNone(row["rates"].get(code), f"{row['date']} {code}")
+            for code, first_day in listed.items():
+                if row["date"] >= first_day:
+                    self.assertIsNotNone(row["rates"].get(code), f"{row['date']} {code}")
 
     def test_incremental_window_does_not_erase_carried_weekend_rate(self):
         existing = pd.DataFrame(
@@ -60,6 +64,16 @@ class DailyFxCalendarTests(unittest.TestCase):
         ])
         self.assertEqual(repaired["USD"].tolist(), [80.0, 80.0, 80.0, 82.0])
 
+    def test_currency_override_keeps_stored_columns(self):
+        existing = pd.DataFrame({"date": pd.to_datetime(["2026-02-01"]), "USD": [80.0], "EUR": [90.0]})
+
+        with mock.patch.dict(os.environ, {"FX_CURRENCIES": "JPY"}):
+            currencies = update_fx_daily._with_stored({"JPY": ["R01820"]}, existing)
+        self.assertEqual(list(currencies), ["USD", "EUR", "JPY"])
+
+        with mock.patch.dict(os.environ, {"FX_CURRENCIES": ""}):
+            self.assertEqual(update_fx_daily._with_stored({"USD": ["R01235"]}, existing), {"USD": ["R01235"]})
+
 
 class MonthlyFxCalendarTests(unittest.TestCase):
     def test_monthly_average_uses_every_calendar_day_for_all_currencies(self):
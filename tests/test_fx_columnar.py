@@ -0,0 +1,73 @@
+import json
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import data_cache
+import fx_columnar
+import update_fx_daily
+import update_macro_monthly
+
+
+class ColumnarFxTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        # без кэша разобранных данных, иначе второй вызов не доходит до JSON
+        uncached = mock.patch.object(data_cache, "default_cache", return_value=data_cache.ParsedCache(enabled=False))
+        uncached.start()
+        self.addCleanup(uncached.stop)
+        self.json_path = Path(tmp.name) / "fx_daily.json"
+        self.columnar_path = Path(tmp.name) / "fx_daily_columnar.json"
+        shutil.copy(REPO_ROOT / "data" / "fx_daily.json", self.json_path)
+        raw = self.json_path.read_bytes()
+        data = json.loads(raw)
+        fx_columnar.write(
+            self.columnar_path,
+            fx_columnar.build_payload(data["series"], data["meta"], fx_columnar.sha256_bytes(raw)),
+        )
+
+    def _patched(self, module, json_attr, columnar_attr):
+        return mock.patch.multiple(module, **{json_attr: self.json_path, columnar_attr: self.columnar_path})
+
+    def test_columnar_loader_round_trips_to_json_frame(self):
+        with self._patched(update_fx_daily, "OUT_FILE", "COLUMNAR_FILE"):
+            from_columnar = update_fx_daily._load_existing()
+            self.columnar_path.unlink()
+            from_json = update_fx_daily._load_existing()
+
+        pd.testing.assert_frame_equal(from_columnar, from_json)
+
+    def test_macro_loader_round_trips_to_json_frame(self):
+        with self._patched(update_macro_monthly, "FX_DAILY_FILE", "FX_COLUMNAR_FILE"):
+            from_columnar = update_macro_monthly.load_fx_daily()
+            self.columnar_path.unlink()
+            from_json = update_macro_monthly.load_fx_daily()
+
+        pd.testing.assert_frame_equal(from_columnar, from_json)
+
+    def test_columnar_file_is_ignored_when_json_changed(self):
+        self.json_path.write_bytes(self.json_path.read_bytes() + b"\n")
+
+        self.assertIsNone(fx_columnar.load(self.columnar_path, self.json_path))
+
+    def test_dates_are_implied_by_offset(self):
+        payload = json.loads(self.columnar_path.read_text(encoding="utf-8"))
+        frame = fx_columnar.frame_from_payload(payload)
+
+        self.assertEqual(frame["date"].iloc[0].strftime("%Y-%m-%d"), payload["meta"]["start"])
+        self.assertEqual(frame["date"].iloc[-1].strftime("%Y-%m-%d"), payload["meta"]["end"])
+        self.assertNotIn("date", payload["rates"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import hashlib
+import json
+import sys
+import unittest
+from pathlib import Path
+
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import fx_delta
+
+
+def _publish(series, previous=None, previous_series=None, days=10):
+    """Publish `series` after the version described by `previous` (the delta and its versions log)."""
+    versions = previous["versions"] if previous else []
+    meta = {
+        "base": "RUB",
+        "currencies": ["USD"],
+        "end": series[-1]["date"],
+        "rows": len(series),
+        "version": fx_delta.next_version(versions),
+    }
+    payload = {"meta": meta, "series": series}
+    text = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+    sha = hashlib.sha256(text).hexdigest()
+    start = series[max(0, len(series) - days)]["date"]
+    changed = fx_delta.first_change(previous_series if previous else None, series)
+    versions = fx_delta.record_version(versions, meta["version"], sha, changed, start)
+    delta = fx_delta.build_delta(meta, series, sha, versions, days)
+    delta["versions"] = versions
+    return payload, text, delta
+
+
+def _series(start, count, offset=0.0):
+    dates = pd.date_range(start, periods=count, freq="D").strftime("%Y-%m-%d")
+    return [{"date": d, "rates": {"USD": round(90 + i / 7 + offset, 6)}} for i, d in enumerate(dates)]
+
+
+class FxDeltaTests(unittest.TestCase):
+    def setUp(self):
+        self.v1_series = _series("2026-01-01", 60)
+        self.v1, _, self.d1 = _publish(self.v1_series)
+
+    def test_applying_delta_reproduces_full_file(self):
+        v2_series = _series("2026-01-01", 63)
+        v2_series[-5]["rates"]["USD"] = 1.5
+        v2, v2_text, d2 = _publish(v2_series, self.d1, self.v1_series)
+
+        result = fx_delta.apply_delta(self.v1, d2)
+
+        self.assertEqual(json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8"), v2_text)
+        self.assertEqual(d2["min_version"], 1)
+        self.assertEqual(d2["base_sha256"], self.d1["sha256"])
+        self.assertEqual(len(d2["series"]), 10)
+
+    def test_chained_versions_keep_old_clients_valid(self):
+        v2_series = _series("2026-01-01", 62)
+        v2, _, d2 = _publish(v2_series, self.d1, self.v1_series)
+        v3_series = _series("2026-01-01", 64)
+        _, v3_text, d3 = _publish(v3_series, d2, v2_series)
+
+        for base in (self.v1, v2):
+            result = fx_delta.apply_delta(base, d3)
+            self.assertEqual(json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8"), v3_text)
+
+    def test_revision_before_window_forces_full_reload(self):
+        v2_series = _series("2026-01-01", 61)
+        v2_series[3]["rates"]["USD"] = 1.0
+        _, _, d2 = _publish(v2_series, self.d1, self.v1_series)
+
+        self.assertEqual(d2["min_version"], 2)
+        with self.assertRaises(ValueError):
+            fx_delta.apply_delta(self.v1, d2)
+
+    def test_base_older_than_window_forces_full_reload(self):
+        stale = {"meta": dict(self.v1["meta"]), "series": self.v1_series[:30]}
+        v2_series = _series("2026-01-01", 61)
+        _, _, d2 = _publish(v2_series, self.d1, self.v1_series)
+
+        with self.assertRaises(ValueError):
+            fx_delta.apply_delta(stale, d2)
+
+
+    def test_revision_then_append_rejects_base_before_revision(self):
+        def rows(values):
+            return [{"date": f"2026-01-0{i + 1}", "rates": {"USD": v}} for i, v in enumerate(values)]
+
+        v1_series = rows([1, 2, 3, 4, 5])
+        v1, _, d1 = _publish(v1_series, days=2)
+        v2_series = rows([1, 2, 3, 40, 5])
+        v2, _, d2 = _publish(v2_series, d1, v1_series, days=2)
+        v3_series = rows([1, 2, 3, 40, 5, 6])
+        _, v3_text, d3 = _publish(v3_series, d2, v2_series, days=2)
+
+        self.assertEqual(d2["min_version"], 1)
+        self.assertEqual(d3["min_version"], 2)
+        with self.assertRaises(ValueError):
+            fx_delta.apply_delta(v1, d3)
+        result = fx_delta.apply_delta(v2, d3)
+        self.assertEqual(json.dumps(result, ensure_ascii=False, indent=2).encode("utf-8"), v3_text)
+
+    def test_versions_log_is_trimmed(self):
+        versions = []
+        for version in range(1, 6):
+            versions = fx_delta.record_version(versions, version, f"sha{version}", f"2026-01-0{version}", "2026-01-04")
+
+        self.assertEqual([v["version"] for v in versions], [3, 4, 5])
+        self.assertEqual(fx_delta.min_version(versions, 5, "2026-01-04"), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
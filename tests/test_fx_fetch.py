@@ -0,0 +1,303 @@
+import sys
+import tempfile
+import time
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import http_cache
+import http_client
+import update_fx_daily
+from cbr_stub import CbrStub
+
+
+START = date(2026, 2, 1)
+END = date(2026, 2, 10)
+
+
+def _sample_records(start=START, end=END):
+    records = {}
+    for offset, (code, ids) in enumerate(update_fx_daily.CURRENCIES.items()):
+        nominal = 10 if code in {"THB", "TRY"} else 1
+        rows = []
+        day = start
+        while day <= end:
+            # CBR publishes no rate on Sundays and Mondays.
+            if day.weekday() not in (0, 6):
+                rows.append((day, nominal, 50.0 + offset + (day - start).days / 10))
+            day += timedelta(days=1)
+        records[ids[-1]] = rows
+    return records
+
+
+class ConcurrentFetchTests(unittest.TestCase):
+    def test_concurrent_fetch_matches_serial_path(self):
+        with CbrStub(_sample_records()) as stub, mock.patch.object(update_fx_daily, "CBR_BASE_URL", stub.base_url):
+            serial = update_fx_daily.fetch_all_currencies(START, END, workers=1)
+            concurrent = update_fx_daily.fetch_all_currencies(START, END, workers=4, per_host=2)
+
+        self.assertEqual(list(serial), list(update_fx_daily.CURRENCIES))
+        self.assertEqual(list(concurrent), list(serial))
+        for code in serial:
+            pd.testing.assert_frame_equal(concurrent[code], serial[code])
+
+    def test_fallback_id_is_used_when_primary_has_no_records(self):
+        with CbrStub(_sample_records()) as stub, mock.patch.object(update_fx_daily, "CBR_BASE_URL", stub.base_url):
+            fetched = update_fx_daily.fetch_all_currencies(START, END, workers=3)
+
+        try_ids = [query["VAL_NM_RQ"] for _, query in stub.requests if query["VAL_NM_RQ"].startswith("R01700")]
+        self.assertEqual(sorted(try_ids), ["R01700", "R01700J"])
+        self.assertAlmostEqual(fetched["TRY"]["rate"].iloc[-1], (50.0 + 7 + 0.9) / 10)
+
+    def test_deadline_aborts_slow_fetch(self):
+        with CbrStub(_sample_records(), delays={"R01235": 2.0}) as stub, mock.patch.object(
+            update_fx_daily, "CBR_BASE_URL", stub.base_url
+        ):
+            with self.assertRaises((TimeoutError, RuntimeError)):
+                update_fx_daily.fetch_all_currencies(START, END, workers=4, deadline=0.5)
+
+
+class CachedFetchTests(unittest.TestCase):
+    def _fetch(self, stub, cache, end):
+        with mock.patch.object(update_fx_daily, "CBR_BASE_URL", stub.base_url):
+            return update_fx_daily._fetch_currency_series(["R01235"], date(2024, 11, 20), end, cache=cache)
+
+    def test_next_day_only_fetches_the_current_month(self):
+        records = _sample_records(date(2024, 1, 1), date(2025, 3, 11))
+        with tempfile.TemporaryDirectory() as tmp, CbrStub(records) as stub:
+            cache = http_cache.ResponseCache(directory=tmp)
+            self._fetch(stub, cache, date(2025, 3, 10))
+            stub.statuses.clear()
+            second = self._fetch(stub, cache, date(2025, 3, 11))
+            # закрытые окна свежи месяц, день спустя их не запрашивают вовсе
+            self.assertEqual(stub.statuses, [200])
+            self.assertEqual(cache.stats["hits"], 3)
+
+            # после TTL каждое окно, включая текущий месяц, стоит один 304
+            stale = http_cache.ResponseCache(directory=tmp, ttls={"cbr_fx": 0, "cbr_fx_closed": 0})
+            stub.statuses.clear()
+            self._fetch(stub, stale, date(2025, 3, 11))
+            self.assertEqual(stub.statuses, [304, 304, 304, 304])
+
+            expected = self._fetch(stub, None, date(2025, 3, 11))
+
+        pd.testing.assert_frame_equal(second, expected)
+        self.assertEqual(second["date"].iloc[0], pd.Timestamp("2024-11-20"))
+
+
+class HedgedFetchTests(unittest.TestCase):
+    def _records_with_slow_primary(self):
+        records = _sample_records()
+        records["R01700"] = [(day, nominal, value * 1000) for day, nominal, value in records["R01700J"]]
+        return records
+
+    def test_fallback_is_started_when_primary_exceeds_latency_budget(self):
+        with CbrStub(self._records_with_slow_primary(), delays={"R01700": 3.0}) as stub, mock.patch.object(
+            update_fx_daily, "CBR_BASE_URL", stub.base_url
+        ):
+            started = time.monotonic()
+            series = update_fx_daily._fetch_currency_series(["R01700", "R01700J"], START, END, hedge_after=0.2)
+            elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 2.0)
+        self.assertAlmostEqual(series["rate"].iloc[-1], (50.0 + 7 + 0.9) / 10)
+
+    def test_fast_primary_wins_without_hedging(self):
+        with CbrStub(self._records_with_slow_primary()) as stub, mock.patch.object(
+            update_fx_daily, "CBR_BASE_URL", stub.base_url
+        ):
+            series = update_fx_daily._fetch_currency_series(["R01700", "R01700J"], START, END, hedge_after=1.0)
+
+        self.assertEqual([query["VAL_NM_RQ"] for _, query in stub.requests], ["R01700"])
+        self.assertAlmostEqual(series["rate"].iloc[-1], (50.0 + 7 + 0.9) * 100)
+
+    def test_circuit_breaker_persists_and_demotes_failing_id(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "breaker.json"
+            breaker = http_client.CircuitBreaker(path, threshold=2)
+            with CbrStub(_sample_records(), failing_ids={"R01700"}) as stub, mock.patch.object(
+                update_fx_daily, "CBR_BASE_URL", stub.base_url
+            ):
+                for _ in range(2):
+                    update_fx_daily._fetch_currency_series(["R01700", "R01700J"], START, END, breaker=breaker)
+            breaker.save()
+
+            reloaded = http_client.CircuitBreaker(path, threshold=2)
+            with CbrStub(_sample_records(), failing_ids={"R01700"}) as stub, mock.patch.object(
+                update_fx_daily, "CBR_BASE_URL", stub.base_url
+            ):
+                update_fx_daily._fetch_currency_series(["R01700", "R01700J"], START, END, breaker=reloaded)
+
+        self.assertEqual(reloaded.order(["R01700", "R01700J"]), ["R01700J", "R01700"])
+        self.assertEqual([query["VAL_NM_RQ"] for _, query in stub.requests], ["R01700J"])
+
+
+class DailyIncrementalTests(unittest.TestCase):
+    def test_daily_window_matches_forward_filled_dynamic_series(self):
+        window_start = date(2026, 2, 5)
+        with CbrStub(_sample_records()) as stub, mock.patch.object(update_fx_daily, "CBR_BASE_URL", stub.base_url):
+            daily = update_fx_daily.fetch_daily_window(window_start, END, workers=3)
+            daily_requests = list(stub.requests)
+            dynamic = update_fx_daily.fetch_all_currencies(window_start, END, workers=1)
+
+        self.assertEqual({path for path, _ in daily_requests}, {"/scripts/XML_daily.asp"})
+        self.assertEqual(len(daily_requests), (END - window_start).days + 1)
+        self.assertEqual(daily["date"].tolist(), dynamic["USD"]["date"].tolist())
+        for code, series_df in dynamic.items():
+            self.assertEqual(daily[code].tolist(), series_df["rate"].tolist(), code)
+
+    def test_try_uses_fallback_id_from_daily_payload(self):
+        with CbrStub(_sample_records()) as stub, mock.patch.object(update_fx_daily, "CBR_BASE_URL", stub.base_url):
+            daily = update_fx_daily.fetch_daily_window(date(2026, 2, 8), END, workers=1)
+
+        self.assertTrue(all(path.endswith("XML_daily.asp") for path, _ in stub.requests))
+        self.assertEqual(len(stub.requests), 3)
+        self.assertFalse(daily["TRY"].isna().any())
+
+    def test_currency_missing_from_daily_payload_falls_back_to_dynamic(self):
+        records = _sample_records()
+        daily_ids = set(records) - {"R01280"}
+        with CbrStub(records, daily_ids=daily_ids) as stub, mock.patch.object(
+            update_fx_daily, "CBR_BASE_URL", stub.base_url
+        ):
+            daily = update_fx_daily.fetch_daily_window(date(2026, 2, 8), END, workers=1)
+
+        dynamic_ids = [query["VAL_NM_RQ"] for path, query in stub.requests if path.endswith("XML_dynamic.asp")]
+        self.assertEqual(dynamic_ids, ["R01280"])
+        self.assertFalse(daily["IDR"].isna().any())
+
+    def test_auto_source_prefers_daily_for_short_gaps(self):
+        existing = pd.DataFrame({"date": pd.to_datetime(["2026-02-01"]), "USD": [80.0]})
+        self.assertEqual(update_fx_daily._resolve_source("auto", existing, date(2026, 2, 10)), "daily")
+        self.assertEqual(update_fx_daily._resolve_source("auto", existing, date(2026, 6, 10)), "dynamic")
+        self.assertEqual(update_fx_daily._resolve_source("auto", None, date(2026, 2, 10)), "backfill")
+
+    def test_every_incremental_source_refetches_the_last_week(self):
+        existing = pd.DataFrame({"date": pd.to_datetime(["2026-01-31", "2026-02-01"]), "USD": [80.0, 81.0]})
+
+        for source in ("daily", "dynamic"):
+            self.assertEqual(update_fx_daily._fetch_start(source, existing), date(2026, 1, 25))
+        self.assertEqual(update_fx_daily._fetch_start("backfill", existing), update_fx_daily.START_DATE)
+        self.assertEqual(update_fx_daily._fetch_start("daily", None), update_fx_daily.START_DATE)
+        self.assertEqual(update_fx_daily.SOURCE_LABELS["daily"], "CBR XML_daily")
+
+
+class WideFrameTests(unittest.TestCase):
+    def test_wide_frame_matches_chained_outer_merge(self):
+        series = {
+            "USD": pd.DataFrame({"date": pd.to_datetime(["2026-02-03", "2026-02-04", "2026-02-06"]), "rate": [80.0, 81.0, 82.0]}),
+            "EUR": pd.DataFrame({"date": pd.to_datetime(["2026-02-04", "2026-02-05"]), "rate": [90.0, 91.0]}),
+            "CNY": pd.DataFrame({"date": pd.to_datetime(["2026-02-07", "2026-02-03"]), "rate": [11.5, 11.0]}),
+        }
+        merged = series["USD"].rename(columns={"rate": "USD"})
+        for code in ("EUR", "CNY"):
+            merged = merged.merge(series[code].rename(columns={"rate": code}), on="date", how="outer")
+
+        wide = update_fx_daily.build_wide_frame(series)
+
+        pd.testing.assert_frame_equal(wide, merged.sort_values("date").reset_index(drop=True))
+
+
+class ChunkedBackfillTests(unittest.TestCase):
+    BACKFILL_START = date(2023, 11, 1)
+    BACKFILL_END = date(2026, 2, 10)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.records = _sample_records(self.BACKFILL_START, self.BACKFILL_END)
+        self.codes = list(update_fx_daily.CURRENCIES)
+
+    def _backfill(self, stub, **kwargs):
+        with mock.patch.object(update_fx_daily, "CBR_BASE_URL", stub.base_url):
+            return update_fx_daily.backfill_currencies(
+                self.BACKFILL_START, self.BACKFILL_END, workers=4, rate=0, checkpoint_dir=self.tmp.name, **kwargs
+            )
+
+    def test_year_chunks_cover_range_without_overlap(self):
+        chunks = update_fx_daily._year_chunks(date(2024, 6, 15), date(2026, 2, 10))
+
+        self.assertEqual(chunks, [
+            (date(2024, 6, 15), date(2024, 12, 31)),
+            (date(2025, 1, 1), date(2025, 12, 31)),
+            (date(2026, 1, 1), date(2026, 2, 10)),
+        ])
+
+    def test_stitched_chunks_match_single_request_history(self):
+        with CbrStub(self.records) as stub:
+            chunked = self._backfill(stub)
+            with mock.patch.object(update_fx_daily, "CBR_BASE_URL", stub.base_url):
+                fetched = update_fx_daily.fetch_all_currencies(self.BACKFILL_START, self.BACKFILL_END, workers=1)
+
+        whole = fetched[self.codes[0]].rename(columns={"rate": self.codes[0]})
+        for code in self.codes[1:]:
+            whole = whole.merge(fetched[code].rename(columns={"rate": code}), on="date", how="outer")
+
+        via_chunks = update_fx_daily.normalize_daily_rates(chunked, self.codes)[["date", *self.codes]]
+        via_whole = update_fx_daily.normalize_daily_rates(whole.dropna(), self.codes)[["date", *self.codes]]
+        # Date resolution depends on how the frame was built; the serialized dates do not.
+        for frame in (via_chunks, via_whole):
+            frame["date"] = frame["date"].astype("datetime64[ns]")
+        pd.testing.assert_frame_equal(via_chunks, via_whole)
+
+    def test_interrupted_backfill_resumes_from_checkpoints(self):
+        with CbrStub(self.records, failing_ids={"R01235"}) as stub:
+            with self.assertRaises(RuntimeError):
+                self._backfill(stub)
+        checkpoints = list(Path(self.tmp.name).glob("*.json"))
+        self.assertEqual(len(checkpoints), (len(self.codes) - 1) * 4)
+
+        with CbrStub(self.records) as stub:
+            df = self._backfill(stub)
+
+        self.assertEqual({query["VAL_NM_RQ"] for _, query in stub.requests}, {"R01235"})
+        self.assertEqual(len(stub.requests), 4)
+        self.assertFalse(update_fx_daily.normalize_daily_rates(df, self.codes)[self.codes].isna().any().any())
+
+    def test_currency_listed_mid_range_starts_with_nulls(self):
+        currencies = {"USD": ["R01235"], "AED": ["R01230"]}
+        records = {
+            "R01235": self.records["R01235"],
+            "R01230": _sample_records(date(2025, 3, 10), self.BACKFILL_END)["R01235"],
+        }
+        first_quote = pd.Timestamp(records["R01230"][0][0])
+        with CbrStub(records) as stub:
+            df = self._backfill(stub, currencies=currencies)
+
+        with self.assertRaisesRegex(ValueError, "Missing seed rate before first calendar day for: AED"):
+            update_fx_daily.normalize_daily_rates(df, list(currencies), listed={})
+        with self.assertRaisesRegex(ValueError, "AED"):
+            # null после даты включения в котировки — ошибка
+            update_fx_daily.normalize_daily_rates(df, list(currencies), listed={"AED": date(2025, 3, 1)})
+        normalized = update_fx_daily.normalize_daily_rates(df, list(currencies), listed={"AED": first_quote.date()})
+        quoted = normalized["date"] >= first_quote
+        self.assertTrue(normalized.loc[~quoted, "AED"].isna().all())
+        self.assertFalse(normalized.loc[quoted, "AED"].isna().any())
+        self.assertFalse(normalized["USD"].isna().any())
+        rows = update_fx_daily.fx_json.rows_from_frame(normalized, list(currencies))
+        self.assertIsNone(rows[0]["rates"]["AED"])
+
+        # пустые чанки до первой котировки сохранены: повторный запуск ничего не запрашивает
+        with CbrStub(records) as stub:
+            again = self._backfill(stub, currencies=currencies)
+        self.assertEqual(stub.requests, [])
+        pd.testing.assert_frame_equal(again, df)
+
+    def test_gap_after_first_quote_is_still_an_error(self):
+        currencies = {"AED": ["R01230"]}
+        records = {"R01230": _sample_records(date(2024, 3, 1), date(2024, 5, 1))["R01235"]}
+
+        with CbrStub(records) as stub:
+            with self.assertRaisesRegex(RuntimeError, "AED 2025-01-01..2025-12-31: No records"):
+                self._backfill(stub, currencies=currencies)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,140 @@
+import hashlib
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import fx_json
+
+
+def legacy_rows(df, codes):
+    output_rows = []
+    for _, row in df.iterrows():
+        rates = {}
+        for code in codes:
+            val = row.get(code)
+            rates[code] = round(float(val), 6) if pd.notna(val) else None
+        output_rows.append({"date": row["date"].strftime("%Y-%m-%d"), "rates": rates})
+    return output_rows
+
+
+class FxJsonTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "fx_daily.json"
+        self.meta = {"base": "RUB", "currencies": ["USD", "EUR", "IDR"], "rows": 6, "updated": "2026-01-01T00:00:00Z"}
+
+    def _frame(self):
+        rng = np.random.default_rng(7)
+        df = pd.DataFrame({
+            "date": pd.date_range("2024-01-01", periods=6, freq="D"),
+            "USD": [0.1 + 0.2, 1.0000005, 2.675, 90.12345649999, 1e-7, 123456.7891234],
+            "EUR": rng.uniform(50, 150, 6),
+            "IDR": [0.0056781234, np.nan, 0.00567, 5.5e-3, 0.0, 1e-6 / 3],
+        })
+        return df
+
+    def test_rows_match_per_cell_loop(self):
+        df = self._frame()
+        codes = self.meta["currencies"]
+
+        self.assertEqual(fx_json.rows_from_frame(df, codes), legacy_rows(df, codes))
+
+    def test_dump_is_byte_identical_to_json_dumps(self):
+        rows = legacy_rows(self._frame(), self.meta["currencies"])
+        expected = json.dumps({"meta": self.meta, "series": rows}, ensure_ascii=False, indent=2).encode("utf-8")
+
+        digest = fx_json.dump(self.path, self.meta, rows)
+
+        self.assertEqual(self.path.read_bytes(), expected)
+        self.assertEqual(digest, hashlib.sha256(expected).hexdigest())
+
+    def test_empty_and_irregular_series(self):
+        for series in ([], [{"date": "2024-01-01", "rates": {"EUR": 1.5, "USD": None}}, {"date": "2024-01-02", "rates": {}}]):
+            fx_json.dump(self.path, self.meta, series)
+            expected = json.dumps({"meta": self.meta, "series": series}, ensure_ascii=False, indent=2)
+            self.assertEqual(self.path.read_text(encoding="utf-8"), expected)
+
+    def test_meta_is_read_from_the_header(self):
+        rows = legacy_rows(self._frame(), self.meta["currencies"])
+        fx_json.dump(self.path, self.meta, rows)
+
+        self.assertEqual(fx_json.read_meta(self.path, chunk=16), self.meta)
+
+
+class TailPatchTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "fx_daily.json"
+        data = json.loads((REPO_ROOT / "data" / "fx_daily.json").read_text(encoding="utf-8"))
+        self.meta, self.series = data["meta"], data["series"][-400:]
+        fx_json.write_tail(self.path, self.meta, self.series)
+
+    def _expected(self, meta, series):
+        return json.dumps({"meta": meta, "series": series}, ensure_ascii=False, indent=2).encode("utf-8")
+
+    def _changed(self):
+        series = [dict(row, rates=dict(row["rates"])) for row in self.series]
+        series[-5]["rates"]["USD"] = 1.234567
+        next_day = (pd.Timestamp(series[-1]["date"]) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+        series.append({"date": next_day, "rates": dict(series[-1]["rates"])})
+        meta = dict(self.meta, updated="2099-01-01T00:00:00Z", rows=self.meta["rows"] + 1, end=next_day)
+        return meta, series
+
+    def test_tail_patch_is_byte_identical_and_keeps_prefix(self):
+        meta, series = self._changed()
+        inode = self.path.stat().st_ino
+
+        digest = fx_json.write_tail(self.path, meta, series)
+
+        expected = self._expected(meta, series)
+        self.assertEqual(self.path.read_bytes(), expected)
+        self.assertEqual(digest, hashlib.sha256(expected).hexdigest())
+        self.assertEqual(self.path.stat().st_ino, inode)
+
+    def test_rows_are_compared_by_bytes(self):
+        meta, series = self._changed()
+        series = series[:-10]
+        # та же длина строки, другие байты: патч начинается с неё, а не с конца файла
+        usd = repr(series[3]["rates"]["USD"])
+        series[3]["rates"]["USD"] = float(usd[:-1] + ("2" if usd[-1] == "1" else "1"))
+
+        digest = fx_json.write_tail(self.path, meta, series)
+
+        expected = self._expected(meta, series)
+        self.assertEqual(self.path.read_bytes(), expected)
+        self.assertEqual(digest, hashlib.sha256(expected).hexdigest())
+
+    def test_interrupted_patch_is_rolled_forward(self):
+        meta, series = self._changed()
+        with mock.patch.object(fx_json, "recover", side_effect=[False, KeyboardInterrupt]):
+            with self.assertRaises(KeyboardInterrupt):
+                fx_json.write_tail(self.path, meta, series)
+        self.assertEqual(self.path.read_bytes(), self._expected(self.meta, self.series))
+
+        self.assertTrue(fx_json.recover(self.path))
+        self.assertEqual(self.path.read_bytes(), self._expected(meta, series))
+
+    def test_torn_journal_is_discarded(self):
+        before = self.path.read_bytes()
+        journal = self.path.with_suffix(".json.journal")
+        journal.write_bytes(b"FXJ1" + b"\0" * 10)
+
+        self.assertFalse(fx_json.recover(self.path))
+        self.assertFalse(journal.exists())
+        self.assertEqual(self.path.read_bytes(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import fx_monthly_state
+import update_macro_monthly
+
+
+CODES = update_macro_monthly.FX_CODES
+
+
+class FxMonthlyStateTests(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        index = pd.date_range("2023-11-01", "2024-03-20", freq="D")
+        values = np.cumsum(rng.normal(0, 0.29, (len(index), len(CODES))), axis=0) + 90.0
+        self.daily = pd.DataFrame(values, index=index, columns=CODES)
+        self.daily.iloc[40:43] = np.nan
+
+    def _load(self, start):
+        return self.daily
+
+    def _state_until(self, end):
+        daily = self.daily.loc[:end]
+        state, _ = fx_monthly_state.update(None, lambda start: daily, CODES, "old")
+        return state
+
+    def _check(self, state, expected_touched, refresh_from=None):
+        state, touched = fx_monthly_state.update(state, self._load, CODES, "new", refresh_from=refresh_from)
+
+        self.assertEqual(touched, expected_touched)
+        expected = update_macro_monthly.compute_fx_monthly(self.daily)
+        self.assertTrue(fx_monthly_state.to_frame(state, CODES).equals(expected))
+        return state
+
+    def test_revised_tail_recomputes_only_touched_months(self):
+        state = self._state_until("2024-02-25")
+        self.daily.loc["2024-02-20":, "USD"] += 1.5
+
+        self._check(state, 2)
+
+    def test_appended_days_recompute_only_the_last_month(self):
+        state = self._state_until("2024-03-09")
+        before = dict(state["months"]["2024-03"])
+
+        state = self._check(state, 1)
+        self.assertEqual(state["months"]["2024-03"]["count"], before["count"] + 11)
+
+    def test_revision_before_an_append_is_detected(self):
+        # пересмотр старого курса в одном запуске и дописанный день в следующем: состояние
+        # сверяется со своими строками, а не с min_version дельты
+        state = self._state_until("2024-03-18")
+        self.daily.loc["2023-12-05", "EUR"] += 0.7
+        revised = self.daily.loc[:"2024-03-19"]
+        state, touched = fx_monthly_state.update(state, lambda start: revised, CODES, "revised")
+        self.assertEqual(touched, 2)
+
+        state = self._check(state, 1)
+        self.assertEqual(state["end"], "2024-03-20")
+
+    def test_refresh_from_forces_months(self):
+        state = self._state_until("2024-03-20")
+
+        self._check(state, 3, refresh_from="2024-01")
+
+    def test_old_state_format_rebuilds_everything(self):
+        state = self._state_until("2024-01-15")
+        for entry in state["months"].values():
+            del entry["digest"]
+
+        self._check(state, 5)
+
+    def _versioned(self, end, changes):
+        """State built from version 1 (rows through `end`), then `changes` {version: changed_from}
+        published; returns (state, log of the days each load started from, versions)."""
+        versions = [{"version": 1, "sha256": "v1", "changed_from": "2023-11-01"}]
+        versions += [{"version": v, "sha256": f"v{v}", "changed_from": c} for v, c in sorted(changes.items())]
+        daily = self.daily.loc[:end]
+        state, _ = fx_monthly_state.update(None, lambda start: daily, CODES, "v1", version=1, versions=versions[:1])
+        loads = []
+
+        def load(start):
+            loads.append(start)
+            return self.daily if start is None else self.daily.loc[start:]
+
+        return state, load, loads, versions
+
+    def _check_versioned(self, state, load, versions, expected_touched):
+        version = versions[-1]["version"]
+        state, touched = fx_monthly_state.update(state, load, CODES, f"v{version}", version=version, versions=versions)
+
+        self.assertEqual(touched, expected_touched)
+        self.assertTrue(fx_monthly_state.to_frame(state, CODES).equals(update_macro_monthly.compute_fx_monthly(self.daily)))
+        return state
+
+    def test_versions_log_limits_the_load_to_changed_months(self):
+        state, load, loads, versions = self._versioned("2024-02-25", {2: "2024-02-20"})
+        self.daily.loc["2024-02-20":, "USD"] += 1.5
+
+        state = self._check_versioned(state, load, versions, 2)
+        self.assertEqual(loads, [pd.Timestamp("2024-02-01")])
+        self.assertEqual(state["version"], 2)
+
+    def test_revision_in_an_earlier_version_moves_the_load_back(self):
+        state, load, loads, versions = self._versioned("2024-03-18", {2: "2023-12-05", 3: "2024-03-19"})
+        self.daily.loc["2023-12-05", "EUR"] += 0.7
+
+        self._check_versioned(state, load, versions, 2)
+        self.assertEqual(loads, [pd.Timestamp("2023-12-01")])
+
+    def test_meta_only_version_loads_nothing(self):
+        state, load, loads, versions = self._versioned("2024-03-20", {2: None})
+
+        self._check_versioned(state, load, versions, 0)
+        self.assertEqual(loads, [])
+
+    def test_trimmed_log_falls_back_to_the_whole_history(self):
+        state, load, loads, versions = self._versioned("2024-02-25", {2: "2024-02-26", 3: "2024-03-01"})
+        del versions[1]
+
+        self._check_versioned(state, load, versions, 2)
+        self.assertEqual(loads, [None])
+
+    def test_state_round_trips_through_the_cache_file(self):
+        state = self._state_until("2024-03-20")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "state.json"
+            fx_monthly_state.save(state, path)
+            loaded = fx_monthly_state.load(CODES, path)
+            self.assertIsNone(fx_monthly_state.load(CODES[:2], path))
+
+        self.assertTrue(fx_monthly_state.to_frame(loaded, CODES).equals(fx_monthly_state.to_frame(state, CODES)))
+
+
+if __name__ == "__main__":
+    unittest.main()
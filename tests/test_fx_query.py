@@ -0,0 +1,93 @@
+import json
+import sys
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import fx_binary
+import fx_columnar
+import fx_query
+
+
+class FxQueryTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        raw = (REPO_ROOT / "data" / "fx_daily.json").read_bytes()
+        data = json.loads(raw)
+        cls.rows = {row["date"]: row["rates"] for row in data["series"]}
+        # fx_daily.bin не коммитится — собираем его из fx_daily.json
+        cls.tmp = tempfile.TemporaryDirectory()
+        path = Path(cls.tmp.name) / "fx_daily.bin"
+        fx_binary.write(path, data["series"], data["meta"], fx_columnar.sha256_bytes(raw))
+        cls.fx = fx_query.load(path)
+
+    @classmethod
+    def tearDownClass(cls):
+        del cls.fx
+        cls.tmp.cleanup()
+
+    def test_rate_accepts_mixed_date_types(self):
+        dates = ["2024-03-05", date(2024, 3, 6), pd.Timestamp("2024-03-07"), np.datetime64("2024-03-08")]
+
+        rates = self.fx.rate("USD", dates)
+
+        expected = [self.rows[d]["USD"] for d in ("2024-03-05", "2024-03-06", "2024-03-07", "2024-03-08")]
+        np.testing.assert_array_equal(rates, expected)
+        self.assertEqual(self.fx.rate("RUB", "2024-03-05"), 1.0)
+
+    def test_cross_and_convert_match_per_tuple_maths(self):
+        codes = ["USD", "EUR", "RUB", "CNY", "TRY"]
+        dates = ["2020-01-01", "2022-03-01", "2023-07-15", "2025-12-31", "2026-08-22"]
+        amounts = np.array([100.0, 2.5, 1000.0, 7.0, 1e6])
+
+        converted = self.fx.convert(amounts, codes, "EUR", dates)
+        cross = self.fx.cross(codes, "EUR", dates)
+
+        for i, (code, day) in enumerate(zip(codes, dates)):
+            rub = 1.0 if code == "RUB" else self.rows[day][code]
+            self.assertAlmostEqual(cross[i], rub / self.rows[day]["EUR"])
+            self.assertAlmostEqual(converted[i], amounts[i] * rub / self.rows[day]["EUR"])
+
+    def test_out_of_range_dates_and_unknown_codes_raise(self):
+        with self.assertRaises(ValueError):
+            self.fx.rate("USD", ["1999-12-31"])
+        with self.assertRaises(KeyError):
+            self.fx.rate(["USD", "XXX"], ["2024-03-05", "2024-03-05"])
+
+    def test_columns_are_views_of_the_memmap(self):
+        eur = self.fx.columns[self.fx.currencies.index("EUR")]
+
+        self.assertIsInstance(eur, np.memmap)
+        self.assertFalse(eur.flags.owndata)
+        self.assertEqual(eur.strides, (8 * len(self.fx.currencies),))
+        self.assertEqual(self.fx.columns[-1].strides, (0,))
+
+    def test_stale_binary_falls_back_to_json(self):
+        data = json.loads((REPO_ROOT / "data" / "fx_daily.json").read_bytes())
+        path = Path(self.tmp.name) / "stale.bin"
+        stale = data["series"][:10]
+        fx_binary.write(path, stale, {**data["meta"], "rows": len(stale)}, "0" * 64)
+
+        fx = fx_query.load(path)
+
+        self.assertEqual(fx.rows, len(data["series"]))
+        self.assertEqual(fx.rate("USD", "2026-08-22"), self.rows["2026-08-22"]["USD"])
+        self.assertEqual(fx_query.load(Path(self.tmp.name) / "missing.bin").rows, fx.rows)
+
+    def test_from_frame_requires_complete_calendar(self):
+        df = pd.DataFrame({"date": pd.to_datetime(["2024-01-01", "2024-01-03"]), "USD": [90.0, 91.0]})
+
+        with self.assertRaises(ValueError):
+            fx_query.FxTable.from_frame(df)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import sys
+import tempfile
+import threading
+import unittest
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import http_cache
+import http_client
+import update_macro_monthly
+
+
+class _EtagServer:
+    """Serve a mutable body per path with ETag validation; records (path, status) per request."""
+
+    def __init__(self):
+        self.bodies = {}
+        self.log = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                body = server.bodies[self.path]
+                etag = f'"{len(body)}-{hash(body) & 0xFFFF}"'
+                if self.headers.get("If-None-Match") == etag:
+                    server.log.append((self.path, 304))
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                server.log.append((self.path, 200))
+                self.send_response(200)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    def url(self, path):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}{path}"
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+class ResponseCacheTests(unittest.TestCase):
+    def setUp(self):
+        self.server = _EtagServer()
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.server.close()
+        self.tmp.cleanup()
+
+    def _cache(self, **kwargs):
+        return http_cache.ResponseCache(directory=self.tmp.name, **kwargs)
+
+    def test_fresh_entry_is_served_without_request(self):
+        self.server.bodies["/a"] = b"payload"
+        cache = self._cache(ttls={"src": 3600})
+
+        first = http_client.fetch_content(self.server.url("/a"), cache=cache, source="src")
+        second = http_client.fetch_content(self.server.url("/a"), cache=cache, source="src")
+
+        self.assertEqual(first, b"payload")
+        self.assertEqual(second, b"payload")
+        self.assertEqual(self.server.log, [("/a", 200)])
+        self.assertEqual(cache.stats, {"hits": 1, "revalidated": 0, "misses": 1})
+
+    def test_stale_entry_is_revalidated_with_etag(self):
+        self.server.bodies["/a"] = b"payload"
+        cache = self._cache(ttls={"src": 0})
+
+        http_client.fetch_content(self.server.url("/a"), cache=cache, source="src")
+        body = http_client.fetch_content(self.server.url("/a"), cache=cache, source="src")
+        self.server.bodies["/a"] = b"changed payload"
+        changed = http_client.fetch_content(self.server.url("/a"), cache=cache, source="src")
+
+        self.assertEqual(body, b"payload")
+        self.assertEqual(changed, b"changed payload")
+        self.assertEqual(self.server.log, [("/a", 200), ("/a", 304), ("/a", 200)])
+        self.assertEqual(cache.stats, {"hits": 0, "revalidated": 1, "misses": 2})
+
+    def test_cache_persists_across_instances(self):
+        self.server.bodies["/a"] = b"payload"
+        http_client.fetch_content(self.server.url("/a"), cache=self._cache(), source="cbr_fx")
+
+        cache = self._cache()
+        body = http_client.fetch_content(self.server.url("/a"), cache=cache, source="cbr_fx")
+
+        self.assertEqual(body, b"payload")
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(len(self.server.log), 1)
+
+    def test_least_recently_used_entries_are_evicted(self):
+        for path in ("/a", "/b", "/c"):
+            self.server.bodies[path] = b"x" * 100
+        cache = self._cache(max_bytes=250, ttls={"src": 3600})
+
+        http_client.fetch_content(self.server.url("/a"), cache=cache, source="src")
+        http_client.fetch_content(self.server.url("/b"), cache=cache, source="src")
+        http_client.fetch_content(self.server.url("/a"), cache=cache, source="src")
+        http_client.fetch_content(self.server.url("/c"), cache=cache, source="src")
+
+        self.assertEqual(len(list(Path(self.tmp.name).glob("*.body"))), 2)
+        http_client.fetch_content(self.server.url("/a"), cache=cache, source="src")
+        http_client.fetch_content(self.server.url("/b"), cache=cache, source="src")
+        self.assertEqual([path for path, _ in self.server.log], ["/a", "/b", "/c", "/b"])
+
+
+class WindowTests(unittest.TestCase):
+    def test_windows_are_aligned_and_only_the_last_moves(self):
+        day1 = http_cache.windows(date(2023, 5, 17), date(2025, 3, 10))
+        day2 = http_cache.windows(date(2023, 5, 18), date(2025, 3, 11))
+
+        self.assertEqual(day1[:4], [
+            (date(2023, 1, 1), date(2023, 12, 31)),
+            (date(2024, 1, 1), date(2024, 12, 31)),
+            (date(2025, 1, 1), date(2025, 1, 31)),
+            (date(2025, 2, 1), date(2025, 2, 28)),
+        ])
+        self.assertEqual(day2[:4], day1[:4])
+        self.assertEqual((day1[-1], day2[-1]), ((date(2025, 3, 1), date(2025, 3, 10)), (date(2025, 3, 1), date(2025, 3, 11))))
+        self.assertEqual(http_cache.windows(date(2025, 3, 5), date(2025, 3, 10)), [(date(2025, 3, 1), date(2025, 3, 10))])
+
+    def test_key_rate_windows_merge_past_years_and_a_short_month(self):
+        self.assertEqual(
+            update_macro_monthly.key_rate_windows(date(2023, 5, 1), date(2025, 3, 20)),
+            [(date(2023, 1, 1), date(2024, 12, 31)), (date(2025, 1, 1), date(2025, 1, 31)),
+             (date(2025, 2, 1), date(2025, 2, 28)), (date(2025, 3, 1), date(2025, 3, 20))],
+        )
+        self.assertEqual(
+            update_macro_monthly.key_rate_windows(date(2025, 2, 20), date(2025, 3, 5)),
+            [(date(2025, 2, 1), date(2025, 3, 5))],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
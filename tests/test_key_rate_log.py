@@ -0,0 +1,75 @@
+import sys
+import tempfile
+import unittest
+from datetime import date, datetime
+from pathlib import Path
+from unittest import mock
+
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import key_rate_log
+import update_macro_monthly
+
+
+def _page(rows):
+    body = []
+    for day, rate in rows:
+        value = f"{rate:.2f}".replace(".", ",")
+        body.append(f"<tr><td>{day:%d.%m.%Y}</td><td>{value}</td></tr>")
+    return f"<html><body><table><tr><th>Дата</th><th>Ставка</th></tr>{''.join(body)}</table></body></html>".encode("utf-8")
+
+
+def _business_days(start, end, rate_for):
+    return [(d.date(), rate_for(d.date())) for d in pd.bdate_range(start, end)][::-1]
+
+
+class KeyRateLogTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.log_file = Path(tmp.name) / "key_rate_changes.json"
+        self.urls = []
+
+    def _fetch(self, rows):
+        def fetch_content(url, **kwargs):
+            self.urls.append(url)
+            start = datetime.strptime(url.split("From=")[1].split("&")[0], "%d.%m.%Y").date()
+            return _page([(d, r) for d, r in rows if d >= start])
+
+        with mock.patch.object(update_macro_monthly, "KEY_RATE_FILE", self.log_file), mock.patch.object(
+            update_macro_monthly.http_client, "fetch_content", side_effect=fetch_content
+        ):
+            return update_macro_monthly.fetch_key_rate_changes()
+
+    def test_rows_are_kept_only_where_the_rate_changes(self):
+        rows = _business_days("2024-01-01", "2024-03-29", lambda d: 16.0 if d < date(2024, 2, 16) else 17.5)
+        log = key_rate_log.merge(key_rate_log.empty(), update_macro_monthly.parse_key_rate_table(_page(rows)), date(2000, 1, 1))
+
+        self.assertEqual(log["changes"], [{"date": "2024-01-01", "rate": 16.0}, {"date": "2024-02-16", "rate": 17.5}])
+        self.assertEqual(log["meta"]["checked_to"], "2024-03-29")
+
+    def test_second_run_fetches_only_the_window_and_picks_up_revisions(self):
+        history = _business_days("2013-09-13", "2024-03-29", lambda d: 5.5 if d < date(2020, 1, 1) else 16.0)
+        self._fetch(history)
+        revised = [(d, 18.0 if d >= date(2024, 3, 25) else r) for d, r in history]
+        revised = _business_days("2024-04-01", "2024-04-05", lambda d: 18.0) + revised
+
+        daily = self._fetch(revised)
+
+        self.assertIn("From=01.01.2000", self.urls[0])
+        self.assertIn("From=15.03.2024", self.urls[1])
+        log = key_rate_log.read(self.log_file)
+        self.assertEqual([c["rate"] for c in log["changes"]], [5.5, 16.0, 18.0])
+        self.assertEqual(log["meta"]["checked_to"], "2024-04-05")
+        self.assertTrue(pd.isna(daily.loc["2013-09-12", "rate"]))
+        self.assertEqual(daily.loc["2019-12-31", "rate"], 5.5)
+        self.assertEqual(daily.loc["2024-03-24", "rate"], 16.0)
+        self.assertEqual(daily.loc["2024-04-07", "rate"], 18.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+import copy
+import json
+import sys
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import macro_merge
+
+CODES = ["USD", "EUR"]
+
+
+def _legacy_merge(series, fx_monthly, key_mean, key_end, cpi, codes, mode, refresh_from, last_month, current_month):
+    """The per-row loops update_macro_monthly.main() ran before macro_merge."""
+    do_rates = mode in {"full", "rates"}
+    do_cpi = mode in {"full", "cpi"}
+    target_months = sorted(m for m in fx_monthly.index if last_month < m < current_month) if do_rates else []
+    rate_fields = []
+    for code in codes:
+        rate_fields.append(f"rate_{code.lower()}")
+        rate_fields.append(f"rate_{code.lower()}_end")
+    if do_rates:
+        for row in series:
+            for field in rate_fields:
+                row.setdefault(field, None)
+            row.setdefault("key_rate", None)
+            row.setdefault("key_rate_end", None)
+            row.setdefault("cpi_mom", None)
+            row.setdefault("cpi_yoy", None)
+            row.setdefault("cpi_ytd", None)
+
+    new_rows = []
+    for month in target_months:
+        if month not in key_mean.index or month not in key_end.index:
+            continue
+        fx_row = fx_monthly.loc[month]
+        key_val = key_mean.loc[month]
+        key_val_end = key_end.loc[month]
+        if any(pd.isna(v) for v in [key_val, key_val_end]):
+            continue
+        cpi_row = cpi.loc[month] if do_cpi and month in cpi.index else None
+        if mode == "full":
+            required = [None if cpi_row is None else cpi_row.get(f) for f in ("cpi_mom", "cpi_yoy", "cpi_ytd")]
+            if any(pd.isna(v) for v in required):
+                continue
+        row = {
+            "date": month.to_timestamp().strftime("%Y-%m-%d"),
+            "month": str(month),
+            "key_rate": float(key_val),
+            "key_rate_end": float(key_val_end),
+        }
+        for field in ("cpi_mom", "cpi_yoy", "cpi_ytd"):
+            row[field] = float(cpi_row[field]) if cpi_row is not None and not pd.isna(cpi_row[field]) else None
+        missing_fx = False
+        for code in codes:
+            avg_val = fx_row.get(f"rate_{code.lower()}")
+            end_val = fx_row.get(f"rate_{code.lower()}_end")
+            if pd.isna(avg_val) or pd.isna(end_val):
+                missing_fx = True
+                break
+            row[f"rate_{code.lower()}"] = float(avg_val)
+            row[f"rate_{code.lower()}_end"] = float(end_val)
+        if not missing_fx:
+            new_rows.append(row)
+
+    refreshed = 0
+    if refresh_from is not None:
+        for row in series:
+            if not row.get("month"):
+                continue
+            month = pd.Period(row["month"], freq="M")
+            if month < refresh_from or month >= current_month or month not in fx_monthly.index:
+                continue
+            fx_row = fx_monthly.loc[month]
+            values = {}
+            for code in codes:
+                for field in (f"rate_{code.lower()}", f"rate_{code.lower()}_end"):
+                    value = fx_row.get(field)
+                    if pd.isna(value):
+                        raise ValueError(f"Incomplete FX data for {month}: {code}")
+                    values[field] = float(value)
+            if any(row.get(field) != value for field, value in values.items()):
+                row.update(values)
+                refreshed += 1
+
+    filled = 0
+    if do_cpi:
+        for row in series:
+            if not row.get("month"):
+                continue
+            month = pd.Period(row["month"], freq="M")
+            if month >= current_month or month not in cpi.index:
+                continue
+            cpi_row = cpi.loc[month]
+            if any(pd.isna(cpi_row.get(k)) for k in ("cpi_mom", "cpi_yoy", "cpi_ytd")):
+                continue
+            if not any(pd.isna(row.get(k)) for k in ("cpi_mom", "cpi_yoy", "cpi_ytd")):
+                continue
+            for k in ("cpi_mom", "cpi_yoy", "cpi_ytd"):
+                row[k] = float(cpi_row[k])
+            filled += 1
+    return new_rows, refreshed, filled
+
+
+def _sources(start="2020-01", months=30, seed=3):
+    rng = np.random.default_rng(seed)
+    index = pd.period_range(start, periods=months, freq="M")
+    fx = pd.DataFrame(
+        {f: np.round(rng.uniform(50, 100, months), 4) for f in macro_merge.rate_fields(CODES)}, index=index
+    )
+    key_mean = pd.Series(np.round(rng.uniform(4, 20, months), 2), index=index)
+    key_end = key_mean.copy()
+    cpi = pd.DataFrame({f: np.round(rng.normal(0.5, 0.3, months), 3) for f in macro_merge.CPI_FIELDS}, index=index)
+    return fx, key_mean, key_end, cpi
+
+
+def _series(fx, cpi, count):
+    series = []
+    for i, month in enumerate(fx.index[:count]):
+        row = {"date": month.to_timestamp().strftime("%Y-%m-%d"), "month": str(month)}
+        if i % 3 == 0:
+            row["cpi_yoy"] = None
+        row["key_rate"] = 7.5
+        row.update({f: float(fx.iloc[i][f]) for f in macro_merge.rate_fields(CODES)[: 2 if i % 4 else 4]})
+        if i % 5 != 1:
+            row.update({f: float(cpi.iloc[i][f]) for f in macro_merge.CPI_FIELDS})
+        series.append(row)
+    series.append({"date": "", "month": "", "key_rate": None})
+    return series
+
+
+class MacroMergeTests(unittest.TestCase):
+    def _check(self, mode, refresh_from=None, tweak=None):
+        fx, key_mean, key_end, cpi = _sources()
+        series = _series(fx, cpi, 20)
+        if tweak:
+            tweak(fx, key_mean, cpi, series)
+        last_month = pd.Period(series[-2]["month"], freq="M")
+        current_month = fx.index[-3]
+        expected_series = copy.deepcopy(series)
+        expected = _legacy_merge(
+            expected_series, fx, key_mean, key_end, cpi, CODES, mode, refresh_from, last_month, current_month
+        )
+
+        do_rates = mode in {"full", "rates"}
+        if do_rates:
+            macro_merge.ensure_fields(series, macro_merge.rate_fields(CODES) + ["key_rate", "key_rate_end", *macro_merge.CPI_FIELDS])
+        months = fx.index[(fx.index > last_month) & (fx.index < current_month)] if do_rates else fx.index[:0]
+        new_rows = macro_merge.new_rows(months, fx, key_mean, key_end, cpi if mode != "rates" else None, CODES, mode == "full")
+        index = macro_merge.month_index(series)
+        refreshed = macro_merge.refresh_rates(series, index, fx, CODES, refresh_from, current_month) if refresh_from else 0
+        filled = macro_merge.fill_cpi(series, index, cpi, current_month) if mode != "rates" else 0
+
+        self.assertEqual((new_rows, refreshed, filled), expected)
+        # тот же JSON, включая порядок ключей в строках
+        self.assertEqual(json.dumps(series), json.dumps(expected_series))
+        self.assertEqual(json.dumps(new_rows), json.dumps(expected[0]))
+        return expected
+
+    def test_full_mode_matches_row_loops(self):
+        def tweak(fx, key_mean, cpi, series):
+            key_mean.iloc[21] = np.nan
+            cpi.iloc[23, 1] = np.nan
+            fx.iloc[24, 3] = np.nan
+
+        new_rows, refreshed, filled = self._check("full", tweak=tweak)
+        self.assertEqual(len(new_rows), 4)
+        self.assertGreater(filled, 0)
+
+    def test_rates_mode_with_refresh(self):
+        def tweak(fx, key_mean, cpi, series):
+            fx.iloc[12:, 0] += 0.5
+
+        new_rows, refreshed, _ = self._check("rates", refresh_from=pd.Period("2020-07", freq="M"), tweak=tweak)
+        self.assertEqual(len(new_rows), 7)
+        self.assertEqual(refreshed, 13)
+        self.assertIsNone(new_rows[0]["cpi_mom"])
+
+    def test_cpi_mode(self):
+        _, _, filled = self._check("cpi")
+        self.assertEqual(filled, 4)
+
+    def test_refresh_with_missing_fx_raises(self):
+        fx, key_mean, key_end, cpi = _sources()
+        fx.iloc[5, 1] = np.nan
+        series = _series(fx, cpi, 10)
+        with self.assertRaisesRegex(ValueError, "Incomplete FX data for 2020-06: USD"):
+            macro_merge.refresh_rates(series, macro_merge.month_index(series), fx, CODES, pd.Period("2020-01", freq="M"), fx.index[-1])
+
+
+if __name__ == "__main__":
+    unittest.main()
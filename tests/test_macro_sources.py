@@ -0,0 +1,94 @@
+import subprocess
+import sys
+import textwrap
+import time
+import unittest
+from pathlib import Path
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import http_client
+import update_macro_monthly
+
+
+def _sleep(seconds, value):
+    def loader(deadline):
+        time.sleep(seconds)
+        return value
+    return loader
+
+
+class LoadSourcesTests(unittest.TestCase):
+    def test_sources_run_concurrently(self):
+        loaders = {name: _sleep(0.3, name) for name in ("fx", "key_rate", "cpi")}
+
+        started = time.perf_counter()
+        results = update_macro_monthly.load_sources(loaders)
+        wall = time.perf_counter() - started
+
+        self.assertLess(wall, 0.6)
+        self.assertEqual({name: value for name, (value, _, _) in results.items()}, {n: n for n in loaders})
+        for _, error, seconds in results.values():
+            self.assertIsNone(error)
+            self.assertGreaterEqual(seconds, 0.29)
+
+    def test_failure_is_isolated(self):
+        def broken(deadline):
+            raise ConnectionError("rosstat is down")
+
+        results = update_macro_monthly.load_sources({"fx": _sleep(0.1, "rates"), "cpi": broken})
+
+        self.assertEqual(results["fx"][:2], ("rates", None))
+        self.assertIsNone(results["cpi"][0])
+        self.assertIsInstance(results["cpi"][1], ConnectionError)
+
+    def test_slow_source_times_out_without_holding_others(self):
+        seen = {}
+
+        def slow(deadline):
+            seen["remaining"] = deadline.remaining()
+            time.sleep(1.0)
+            return "late"
+
+        started = time.perf_counter()
+        results = update_macro_monthly.load_sources(
+            {"fx": _sleep(0.05, "rates"), "cpi": slow}, timeouts={"cpi": 0.2}
+        )
+
+        self.assertLess(time.perf_counter() - started, 0.8)
+        self.assertEqual(results["fx"][0], "rates")
+        self.assertIsInstance(results["cpi"][1], TimeoutError)
+        self.assertLessEqual(seen["remaining"], 0.2)
+
+    def test_hung_source_does_not_keep_the_process_alive(self):
+        script = textwrap.dedent(f"""
+            import sys, time
+            sys.path.insert(0, {str(REPO_ROOT / "scripts")!r})
+            import update_macro_monthly
+
+            def hung(deadline):
+                time.sleep(60)
+
+            results = update_macro_monthly.load_sources({{"cpi": hung}}, timeouts={{"cpi": 0.2}})
+            print(type(results["cpi"][1]).__name__)
+        """)
+
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=30)
+
+        self.assertLess(time.perf_counter() - started, 10)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        self.assertEqual(proc.stdout.strip(), "TimeoutError")
+
+    def test_fx_loader_honours_its_deadline(self):
+        deadline = http_client.Deadline(0.001)
+        time.sleep(0.01)
+
+        with self.assertRaises(TimeoutError):
+            update_macro_monthly.load_fx_monthly(deadline=deadline)
+
+
+if __name__ == "__main__":
+    unittest.main()
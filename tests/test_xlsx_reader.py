@@ -0,0 +1,73 @@
+import os
+import sys
+import tempfile
+import unittest
+from io import BytesIO
+from pathlib import Path
+from unittest import mock
+
+import openpyxl
+import pandas as pd
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "scripts"))
+
+import data_cache
+import update_macro_monthly
+import xlsx_reader
+
+ROSSTAT_FILE = REPO_ROOT / "data" / "rosstat_ipc_mes.xlsx"
+
+
+def _workbook():
+    wb = openpyxl.Workbook()
+    wb.active.title = "Содержание"
+    ws = wb.create_sheet("01")
+    ws["A1"] = "Индексы потребительских цен"
+    ws.append([])
+    ws.append([None, 2023, 2024.0, "2025*"])
+    ws.append(["январь", 100.84, 100.86, 101.23])
+    ws.append([])
+    ws.append(["февраль", 100.46, 100.68])
+    ws.append(["март", 100.37, "…", 100.65])
+    ws.cell(row=8, column=6, value="сноска")
+    wb.create_sheet("02")["A1"] = "другой лист"
+    out = BytesIO()
+    wb.save(out)
+    return out.getvalue()
+
+
+class XlsxReaderTests(unittest.TestCase):
+    def test_frame_matches_read_excel(self):
+        content = _workbook()
+        for header_row, nrows in ((3, 4), (3, 5), (1, 2)):
+            expected = pd.read_excel(BytesIO(content), sheet_name="01", header=header_row - 1, nrows=nrows, engine="openpyxl")
+            frame = xlsx_reader.read_frame(content, "01", header_row=header_row, nrows=nrows)
+            pd.testing.assert_frame_equal(frame, expected)
+
+    @unittest.skipUnless(ROSSTAT_FILE.exists(), "no local Rosstat workbook")
+    def test_rosstat_cpi_table_matches_read_excel(self):
+        content = ROSSTAT_FILE.read_bytes()
+        expected = pd.read_excel(BytesIO(content), sheet_name="01", header=3, nrows=13, engine="openpyxl")
+
+        pd.testing.assert_frame_equal(xlsx_reader.read_frame(content, "01", header_row=4, nrows=13), expected)
+
+    def test_unknown_sheet_raises(self):
+        with self.assertRaises(KeyError):
+            xlsx_reader.read_rows(_workbook(), "99", 1, 3)
+
+    @unittest.skipUnless(ROSSTAT_FILE.exists(), "no local Rosstat workbook")
+    def test_unchanged_cpi_file_is_not_parsed_again(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.dict(os.environ, {"ROSSTAT_CPI_LOCAL": str(ROSSTAT_FILE)}):
+            expected = update_macro_monthly.load_cpi(parsed_cache=data_cache.ParsedCache(Path(tmp)))
+            cache = data_cache.ParsedCache(Path(tmp))
+            with mock.patch.object(xlsx_reader, "read_rows", side_effect=AssertionError("parsed again")):
+                cpi = update_macro_monthly.load_cpi(parsed_cache=cache)
+
+        pd.testing.assert_frame_equal(cpi, expected)
+        self.assertEqual(cache.stats, {"memory": 0, "disk": 1, "parsed": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()